@@ -0,0 +1,448 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Index of archive members (path, size, CRC, archive, volume, remote)
+#       for locating files without listing or downloading archives.
+#       Lookup by path prefix or file name prefix uses SQLite B-tree range
+#       scans (NOCASE), a few ms for millions of members.
+#       Extraction fetches only the volumes holding the member plus the
+#       first (signature header) and last volume (7z header), missing
+#       volumes are sparse placeholders.
+#       The restore cache holds complete downloads only, placeholders are
+#       created per extraction in a directory of links (volume_set()).
+#       Zip members on a remote are fetched as byte ranges (rclone cat).
+#       Member paths are also stored relative to the data root (from the
+#       night directory on), archives built with 7z -spf hold absolute
+#       paths, path prefix and glob queries match the relative path.
+#
+#       Usage:  index = ArchiveIndex()
+#               index.add_7z("tmp/test.7z")             from 7z l -slt
+#               index.add_zip("tmp/test.zip")
+#               index.set_remote("tmp/test.7z", "iasdata:test-upload/tmp")
+#               index.locate("2024-10-12/M 31/")       list of Location
+#               index.extract(location, "restore")
+#               archive = cached_archive(archive)       volumes downloaded to the restore cache
+#               first = volume_set(archive, volumes, volume_size, dir)
+#               record_archive(archive, remote)         add and/or set remote, for worker threads,
+#                                                       uses the process-wide index (qshared) by default
+#               python qarchindex.py locate PATTERN     glob with * or ?, [ is not special
+
+import os
+import re
+import glob
+import shutil
+import time
+import zlib
+import struct
+import sqlite3
+import zipfile
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import namedtuple
+
+# Local modules
+from qverbose import verbose, warning, error
+from qcache import cache_file, cache_dir
+from qcatalog import DATE_RE
+from qjobs import SEVENZIP, RCLONE
+from qshared import shared
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qarchindex"
+
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    id          INTEGER PRIMARY KEY,
+    path        TEXT UNIQUE,        -- local archive path, first volume without .001
+    format      TEXT,               -- 7z, zip
+    created     REAL,
+    size        INTEGER,            -- total size of all volumes
+    volume_size INTEGER,            -- 0 = single file
+    volumes     INTEGER,
+    remote      TEXT                -- rclone remote:path of upload, or NULL
+);
+CREATE TABLE IF NOT EXISTS members (
+    archive     INTEGER,
+    path        TEXT COLLATE NOCASE,
+    name        TEXT COLLATE NOCASE,
+    size        INTEGER,
+    crc         INTEGER,
+    volume      INTEGER,            -- first and last volume (0-based) holding the data
+    last_volume INTEGER,
+    offset      INTEGER,            -- zip: local header offset
+    csize       INTEGER,
+    method      INTEGER,
+    rel         TEXT COLLATE NOCASE -- path from the night directory on
+);
+CREATE INDEX IF NOT EXISTS members_path ON members(path);
+CREATE INDEX IF NOT EXISTS members_name ON members(name);
+CREATE INDEX IF NOT EXISTS members_archive ON members(archive);
+"""
+
+# Indexes older than the rel column get it on open
+MIGRATE_REL = """
+ALTER TABLE members ADD COLUMN rel TEXT COLLATE NOCASE;
+UPDATE members SET rel = relative_path(path);
+"""
+
+SIGNATURE_HEADER = 32           # 7z: packed streams start after signature header
+LOCATE_LIMIT = 500
+
+Location = namedtuple("Location", "path size crc archive format volume last_volume volumes "
+                                  "volume_size remote offset csize method")
+
+
+
+# archive.7z.001, archive.7z.002, ... or archive itself
+def volume_files(archive: str) -> list:
+    vols = sorted(glob.glob(glob.escape(archive) + ".[0-9][0-9][0-9]"))
+    return vols or ([ archive ] if os.path.exists(archive) else [])
+
+def volume_name(archive: str, volume: int, volumes: int) -> str:
+    return archive if volumes <= 1 else f"{archive}.{volume + 1:03d}"
+
+
+# Member path relative to the data root: from the night directory on, 7z
+# -spf stores absolute paths ("data/2024-10-12/M 31/x.fits", "C:/...")
+def relative_path(path: str) -> str:
+    parts = path.split("/")
+    for i, part in enumerate(parts[:-1]):
+        if DATE_RE.search(part):
+            return "/".join(parts[i:])
+    return path
+
+
+# Archive name in the restore cache, a volume file there is a complete
+# download (moved in after rclone finished), never a placeholder
+def cached_archive(archive: str) -> str:
+    name = os.path.basename(archive)
+    return os.path.join(cache_dir("restore", name, "volumes"), name)
+
+
+# Volumes for one extraction in dir: links to the downloaded volumes (copies
+# if links are not supported), placeholders of the volume size for the
+# others, so 7z can open the archive. The cache is not touched, a running
+# 7z never holds a file open that a download replaces (Windows).
+# Returns the archive name in dir.
+def volume_set(archive: str, volumes: int, volume_size: int, dir: str) -> str:
+    for v in range(volumes):
+        fetched = volume_name(archive, v, volumes)
+        path = os.path.join(dir, os.path.basename(fetched))
+        if os.path.exists(fetched):
+            try:
+                os.link(fetched, path)
+            except OSError:
+                shutil.copyfile(fetched, path)
+        else:
+            with open(path, "wb") as f:
+                f.truncate(volume_size)
+    return os.path.join(dir, os.path.basename(archive))
+
+
+# Records of "key = value" lines from 7z l -slt, separated by empty lines
+def parse_slt(text: str) -> tuple:
+    head, _, body = text.partition("\n----------\n")
+    records = []
+    for block in re.split(r"\n\s*\n", body):
+        rec = dict(line.split(" = ", 1) for line in block.splitlines() if " = " in line)
+        if "Path" in rec:
+            records.append(rec)
+    info = dict(line.split(" = ", 1) for line in head.splitlines() if " = " in line)
+    return info, records
+
+
+
+class ArchiveIndex:
+    def __init__(self, dbfile: str=None):
+        self.dbfile = dbfile or cache_file("archives.sqlite")
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.dbfile, check_same_thread=False)
+        self.db.create_function("relative_path", 1, relative_path, deterministic=True)
+        self.db.executescript(SCHEMA)
+        if "rel" not in [ row[1] for row in self.db.execute("PRAGMA table_info(members)") ]:
+            verbose(f"{self.dbfile}: adding relative member paths")
+            self.db.executescript(MIGRATE_REL)
+        self.db.execute("CREATE INDEX IF NOT EXISTS members_rel ON members(rel)")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+    ##### Recording #####
+    def _add(self, archive: str, format: str, volume_size: int, volumes: list, members: list):
+        archive = os.path.abspath(archive)
+        size = sum(os.path.getsize(v) for v in volumes)
+        with self.lock, self.db:
+            row = self.db.execute("SELECT id, remote FROM archives WHERE path = ?", (archive,)).fetchone()
+            remote = None
+            if row:
+                self.db.execute("DELETE FROM members WHERE archive = ?", (row[0],))
+                self.db.execute("DELETE FROM archives WHERE id = ?", (row[0],))
+                remote = row[1]
+            cur = self.db.execute("INSERT INTO archives (path, format, created, size, volume_size, volumes, remote) "
+                                  "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                  (archive, format, time.time(), size, volume_size, len(volumes), remote))
+            id = cur.lastrowid
+            self.db.executemany("INSERT INTO members VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                ((id, path, path.rsplit("/", 1)[-1]) + tuple(rest) + (relative_path(path),)
+                                 for path, *rest in members))
+        verbose(f"{archive}: {len(members)} members, {len(volumes)} volume(s) indexed")
+
+    # Member list from 7z l -slt, volume from the packed stream offsets of
+    # the solid blocks
+    def add_7z(self, archive: str, program: str=None):
+        volumes = volume_files(archive)
+        if not volumes:
+            raise FileNotFoundError(archive)
+        out = subprocess.run([ program or SEVENZIP, "l", "-slt", volumes[0] ],
+                             capture_output=True, check=True).stdout.decode("utf8", "replace")
+        _, records = parse_slt(out.replace("\r\n", "\n"))
+        volume_size = os.path.getsize(volumes[0]) if len(volumes) > 1 else 0
+
+        # Start of each block's packed data
+        packed = {}
+        for rec in records:
+            if rec.get("Block", "") != "" and rec.get("Packed Size", "") != "":
+                packed[int(rec["Block"])] = int(rec["Packed Size"])
+        starts = {}
+        pos = SIGNATURE_HEADER
+        for block in sorted(packed):
+            starts[block] = pos
+            pos += packed[block]
+
+        members = []
+        for rec in records:
+            if rec.get("Folder") == "+" or rec.get("Attributes", "").startswith("D"):
+                continue
+            if rec.get("Type"):
+                # Archive record of split/7z containers
+                continue
+            path = rec["Path"].replace("\\", "/")
+            block = int(rec["Block"]) if rec.get("Block", "") != "" else None
+            first = last = 0
+            if block is not None and volume_size:
+                first = starts[block] // volume_size
+                last = (starts[block] + packed[block] - 1) // volume_size
+            crc = int(rec["CRC"], 16) if rec.get("CRC") else None
+            members.append((path, int(rec.get("Size") or 0), crc, first, last, None, None, None))
+        self._add(archive, "7z", volume_size, volumes, members)
+
+    def add_zip(self, zipname: str):
+        with zipfile.ZipFile(zipname) as z:
+            members = [ (i.filename, i.file_size, i.CRC, 0, 0, i.header_offset, i.compress_size, i.compress_type)
+                        for i in z.infolist() if not i.is_dir() ]
+        self._add(zipname, "zip", 0, [ zipname ], members)
+
+    def set_remote(self, archive: str, remote: str):
+        with self.lock, self.db:
+            self.db.execute("UPDATE archives SET remote = ? WHERE path = ?", (remote, os.path.abspath(archive)))
+
+
+    ##### Lookup #####
+    # Path prefix (relative to the data root) if query contains "/", file
+    # name prefix otherwise, glob pattern (case-sensitive, full scan) with *
+    # or ?. [ is matched literally, file names like "M 31 [L].fits" are
+    # common.
+    def locate(self, query: str, limit: int=LOCATE_LIMIT) -> list:
+        query = query.replace("\\", "/")
+        sql = ("SELECT m.path, m.size, m.crc, a.path, a.format, m.volume, m.last_volume, a.volumes, "
+               "a.volume_size, a.remote, m.offset, m.csize, m.method "
+               "FROM members m JOIN archives a ON a.id = m.archive WHERE ")
+        if any(c in query for c in "*?"):
+            sql += "m.rel GLOB ?"
+            query = query.replace("[", "[[]")
+            args = (query if "/" in query else "*" + query,)
+        else:
+            col = "m.rel" if "/" in query else "m.name"
+            sql += f"{col} >= ? AND {col} < ?"
+            args = (query, query + "\U0010ffff")
+        sql += " ORDER BY m.path LIMIT ?"
+        with self.lock:
+            return [ Location(*row) for row in self.db.execute(sql, args + (limit,)) ]
+
+    def archives(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM archives").fetchone()[0]
+
+    def members(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM members").fetchone()[0]
+
+
+    ##### Extraction #####
+    def extract(self, loc: Location, dest: str, program: str=None, rclone: str=None) -> str:
+        os.makedirs(dest, exist_ok=True)
+        if all(os.path.exists(volume_name(loc.archive, v, loc.volumes)) for v in range(loc.volumes)):
+            return self._extract_local(loc, loc.archive, dest, program)
+        if not loc.remote:
+            raise FileNotFoundError(f"{loc.archive} not available locally and no remote recorded")
+        if loc.format == "zip":
+            return self._extract_zip_range(loc, dest, rclone)
+        archive = self.fetch_volumes(loc, rclone)
+        dir = tempfile.mkdtemp(prefix="extract-", dir=os.path.dirname(archive))
+        try:
+            return self._extract_local(loc, volume_set(archive, loc.volumes, loc.volume_size, dir), dest, program)
+        finally:
+            shutil.rmtree(dir, ignore_errors=True)
+
+    def _extract_local(self, loc: Location, archive: str, dest: str, program: str=None) -> str:
+        target = os.path.join(dest, *loc.path.split("/"))
+        if loc.format == "zip":
+            with zipfile.ZipFile(archive) as z:
+                return z.extract(loc.path, dest)
+        first = volume_name(archive, 0, loc.volumes)
+        subprocess.run([ program or SEVENZIP, "x", "-y", f"-o{dest}", first, loc.path ],
+                       capture_output=True, check=True)
+        return target
+
+    # Volumes holding the member, the first volume with the signature header
+    # and the last volume with the 7z header are downloaded to the restore
+    # cache, the others are placeholders of volume_set()
+    def fetch_volumes(self, loc: Location, rclone: str=None) -> str:
+        archive = cached_archive(loc.archive)
+        cache = os.path.dirname(archive)
+        needed = set(range(loc.volume, loc.last_volume + 1)) | { 0, loc.volumes - 1 }
+        names = [ os.path.basename(volume_name(archive, v, loc.volumes)) for v in sorted(needed) ]
+        missing = [ n for n in names if not os.path.exists(os.path.join(cache, n)) ]
+        if missing:
+            # Own download directory, complete volumes are moved to the cache
+            incoming = tempfile.mkdtemp(prefix="incoming-", dir=os.path.dirname(cache))
+            try:
+                args = [ rclone or RCLONE, "copy", loc.remote, incoming, "--transfers", str(len(missing)) ]
+                for n in missing:
+                    args += [ "--include", re.sub(r"([\\*?\[\]{}])", r"\\\1", n) ]
+                subprocess.run(args, capture_output=True, check=True)
+                for n in missing:
+                    os.replace(os.path.join(incoming, n), os.path.join(cache, n))
+            finally:
+                shutil.rmtree(incoming, ignore_errors=True)
+        verbose(f"{loc.archive}: fetched volumes {', '.join(names)}")
+        return archive
+
+    # Local header and compressed data via rclone cat --offset --count
+    def _extract_zip_range(self, loc: Location, dest: str, rclone: str=None) -> str:
+        remote = f"{loc.remote.rstrip('/')}/{os.path.basename(loc.archive)}"
+        def cat(offset: int, count: int) -> bytes:
+            return subprocess.run([ rclone or RCLONE, "cat", remote, "--offset", str(offset), "--count", str(count) ],
+                                  capture_output=True, check=True).stdout
+        header = cat(loc.offset, 30)
+        name_len, extra_len = struct.unpack("<HH", header[26:30])
+        data = cat(loc.offset + 30 + name_len + extra_len, loc.csize)
+        if loc.method == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -15)
+        if zlib.crc32(data) != loc.crc:
+            raise ValueError(f"{loc.path}: CRC error")
+        target = os.path.join(dest, *loc.path.split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+        return target
+
+
+
+# Errors are reported only, archiving/upload succeeded anyway
+def record_archive(archive: str, remote: str=None, add: bool=True, index: "ArchiveIndex"=None):
+    index = index or shared("archindex", ArchiveIndex)
+    try:
+        if add:
+            if archive.lower().endswith(".zip"):
+                index.add_zip(archive)
+            else:
+                index.add_7z(archive)
+        if remote:
+            index.set_remote(archive, remote)
+    except (OSError, ValueError, subprocess.CalledProcessError, zipfile.BadZipFile) as e:
+        warning(f"{archive}: index not updated: {e}")
+
+
+
+def benchmark(dbfile: str, archives: int, members: int):
+    index = ArchiveIndex(dbfile)
+    t0 = time.perf_counter()
+    with index.lock, index.db:
+        for a in range(archives):
+            date = time.strftime("%Y-%m-%d", time.gmtime(1.6e9 + a * 86400))
+            cur = index.db.execute("INSERT INTO archives (path, format, created, size, volume_size, volumes) "
+                                   "VALUES (?, '7z', 0, 0, 0, 1)", (f"/archive/{date}.7z",))
+            index.db.executemany("INSERT INTO members VALUES (?, ?, ?, 0, 0, 0, 0, NULL, NULL, NULL, ?)",
+                                 ((cur.lastrowid, f"data/{date}/T{m % 50}/light-{m:05d}.fits", f"light-{m:05d}.fits",
+                                   f"{date}/T{m % 50}/light-{m:05d}.fits") for m in range(members)))
+    print(f"indexed {archives} archives x {members} members in {time.perf_counter() - t0:.1f}s")
+    for query in ("2021-06-01/T7/", "light-00042", "2021-06-01/T7/light-00357.fits", "*T3/light-0001?.fits"):
+        t0 = time.perf_counter()
+        n = len(index.locate(query))
+        print(f"{query:32s} {n:5d} hits {(time.perf_counter() - t0) * 1000:8.2f} ms")
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Index of archive members",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--db", help="index database (default in cache directory)")
+    sub = arg.add_subparsers(dest="command", required=True)
+    a = sub.add_parser("add", help="add archives")
+    a.add_argument("-r", "--remote", help="rclone remote:path the archives were uploaded to")
+    a.add_argument("archives", nargs="+", help="7z or zip archives")
+    a = sub.add_parser("locate", help="find members by path or file name prefix")
+    a.add_argument("query", help="path prefix (with /), file name prefix or glob pattern")
+    a = sub.add_parser("extract", help="extract members matching query")
+    a.add_argument("-o", "--output", default=".", help="output directory")
+    a.add_argument("query", help="path prefix (with /), file name prefix or glob pattern")
+    a = sub.add_parser("benchmark", help="lookup times with synthetic index")
+    a.add_argument("-a", "--archives", type=int, default=2000, help="number of archives")
+    a.add_argument("-m", "--members", type=int, default=1000, help="members per archive")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose)
+
+    if args.command == "benchmark":
+        with tempfile.TemporaryDirectory() as tmp:
+            benchmark(os.path.join(tmp, "bench.sqlite"), args.archives, args.members)
+        return
+
+    index = ArchiveIndex(args.db)
+    if args.command == "add":
+        for archive in args.archives:
+            record_archive(archive, args.remote, index=index)
+    elif args.command == "locate":
+        for loc in index.locate(args.query):
+            vol = f"vol {loc.volume + 1}/{loc.volumes}" if loc.volumes > 1 else ""
+            print(f"{loc.path}  {loc.size:,}  {loc.archive} {vol} {loc.remote or ''}")
+    elif args.command == "extract":
+        for loc in index.locate(args.query):
+            print(index.extract(loc, args.output))
+    index.close()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Common location for persistent caches and indexes
+#
+#       Usage:  from qcache import cache_dir, cache_file
+#               cache_dir(*subdirs)     directory below the cache root, created if needed
+#               cache_file(name)        path of a file in the cache root
+#               set_cache_root(path)    override default (~/.qt-workbench or $QT_WORKBENCH_CACHE)
+
+import os
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qcache"
+
+
+
+_cache_root = None
+
+
+def set_cache_root(path: str):
+    global _cache_root
+    _cache_root = path
+
+
+def cache_root() -> str:
+    if _cache_root:
+        return _cache_root
+    return os.environ.get("QT_WORKBENCH_CACHE") or os.path.join(os.path.expanduser("~"), ".qt-workbench")
+
+
+def cache_dir(*subdirs: str) -> str:
+    path = os.path.join(cache_root(), *subdirs)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_file(name: str, *subdirs: str) -> str:
+    return os.path.join(cache_dir(*subdirs), name)
@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Persistent catalog of observation data, keyed by date, subdirectory
+#       and target
+#       Per-night aggregates (files, bytes), updated incrementally
+#       Directories of a night from the scanned directories, empty ones
+#       included (watched for new files). Files of directories modified in
+#       the last RESTAT_SECONDS are restatted on scan even if the directory
+#       mtime is unchanged, rewrites in place don't change it.
+#
+#       Layout of the data root:
+#               [<subdir>_]YYYY-MM-DD/[<target>/]...files...
+#       e.g.    _asteroids_2024-10-12/2024 AB1/light-001.fits
+#               2024-10-12/flats.fits
+#
+#       Usage:  catalog = Catalog(root)
+#               catalog.start_scan(callback)    background (incremental) scan
+#               catalog.update_dir(path)        rescan single directory, e.g. after fs event
+#               catalog.files(date, subdir, targets)
+#               catalog.nights()                list of dates
+#               catalog.paths()                 list of all files
+#               catalog.night_dirs(date)        directories for date
+#               catalog.recent_dirs(n)          directories of the latest n nights
+#               catalog.night_roots(date)       dict subdir -> top-level night directories
+#               catalog.night_stats()           dict date -> (files, bytes)
+#               catalog.scan_messages           warnings/summary of the last scan,
+#                                               logged by the caller of start_scan()
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import argparse
+
+# Local modules
+from qverbose import verbose, warning, error
+from qcache import cache_file
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qcatalog"
+
+
+
+DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path    TEXT PRIMARY KEY,
+    dir     TEXT NOT NULL,
+    date    TEXT NOT NULL,
+    subdir  TEXT NOT NULL,
+    target  TEXT NOT NULL,
+    size    INTEGER NOT NULL,
+    mtime   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_date ON files (date, subdir, target);
+CREATE INDEX IF NOT EXISTS files_dir  ON files (dir);
+CREATE TABLE IF NOT EXISTS dirs (
+    path    TEXT PRIMARY KEY,
+    mtime   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nights (
+    date    TEXT PRIMARY KEY,
+    files   INTEGER NOT NULL,
+    bytes   INTEGER NOT NULL
+);
+"""
+
+# Commit scan results in batches of this many directories
+BATCH_DIRS = 200
+# Files of directories with files modified this recently are restatted
+RESTAT_SECONDS = 2 * 86400
+
+
+
+# Return (date, subdir, target) for a path relative to the data root, or None
+def parse_path(relpath: str) -> tuple:
+    parts = relpath.replace("\\", "/").split("/")
+    for i, part in enumerate(parts[:-1]):
+        m = DATE_RE.search(part)
+        if m:
+            subdir = part[:m.start()].rstrip("_")
+            # Target directory only if file is below the night directory
+            target = parts[i + 1] if i + 2 < len(parts) else ""
+            return (m.group(1), subdir, target)
+    return None
+
+
+
+# Range of paths below directory, B-tree range instead of LIKE, where _ and %
+# in directory names would be wildcards
+def _below(path: str) -> tuple:
+    prefix = path + os.sep
+    return (prefix, prefix[:-1] + chr(ord(os.sep) + 1))
+
+
+
+class Catalog:
+    def __init__(self, root: str, dbfile: str=None):
+        self.root = os.path.abspath(root)
+        if dbfile is None:
+            # One catalog per data root
+            key = re.sub(r"[^A-Za-z0-9]+", "_", self.root).strip("_")
+            dbfile = cache_file(f"{key}.sqlite", "catalog")
+        self.dbfile = dbfile
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(dbfile, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        # Catalog created before per-night aggregates existed
+        if self.db.execute("SELECT COUNT(*) FROM nights").fetchone()[0] == 0:
+            with self.db:
+                self.db.execute("INSERT INTO nights SELECT date, COUNT(*), SUM(size) FROM files GROUP BY date")
+        self.thread = None
+        self.abort = False
+        self.scan_messages = []         # (warning, message) from background scan
+
+
+    def close(self):
+        self.stop_scan()
+        with self.lock:
+            self.db.close()
+
+
+    ##### Lookup #####
+    def files(self, date: str, subdir: str=None, targets: list=None) -> list:
+        sql = "SELECT path, size FROM files WHERE date = ?"
+        args = [ date ]
+        if subdir is not None:
+            sql += " AND subdir = ?"
+            args.append(subdir)
+        if targets:
+            sql += f" AND target IN ({','.join('?' * len(targets))})"
+            args.extend(targets)
+        sql += " ORDER BY path"
+        with self.lock:
+            return self.db.execute(sql, args).fetchall()
+
+    def nights(self) -> list:
+        with self.lock:
+            return [ r[0] for r in self.db.execute("SELECT DISTINCT date FROM files ORDER BY date") ]
+
+    def subdirs(self) -> list:
+        with self.lock:
+            return [ r[0] for r in self.db.execute("SELECT DISTINCT subdir FROM files ORDER BY subdir") ]
+
+    def targets(self, date: str) -> list:
+        with self.lock:
+            return [ r[0] for r in self.db.execute("SELECT DISTINCT target FROM files WHERE date = ? ORDER BY target",
+                                                   (date,)) ]
+
+    # Date of a directory below the data root, None outside of nights
+    def _night(self, dir: str) -> str:
+        for part in os.path.relpath(dir, self.root).replace("\\", "/").split("/"):
+            m = DATE_RE.search(part)
+            if m:
+                return m.group(1)
+        return None
+
+    # Scanned directories by date, including directories without files yet
+    def _dirs_by_night(self) -> dict:
+        with self.lock:
+            dirs = [ r[0] for r in self.db.execute("SELECT path FROM dirs") ]
+        nights = {}
+        for dir in dirs:
+            date = self._night(dir)
+            if date:
+                nights.setdefault(date, []).append(dir)
+        return nights
+
+    def night_dirs(self, date: str) -> list:
+        return sorted(self._dirs_by_night().get(date, []))
+
+    def recent_dirs(self, nights: int) -> list:
+        by_night = self._dirs_by_night()
+        return sorted(d for date in sorted(by_night)[-nights:] for d in by_night[date])
+
+    # Top-level [<subdir>_]YYYY-MM-DD directories for date, by subdir
+    def night_roots(self, date: str) -> dict:
+        with self.lock:
+            rows = self.db.execute("SELECT DISTINCT dir, subdir FROM files WHERE date = ?", (date,)).fetchall()
+        roots = {}
+        for dir, subdir in rows:
+            parts = os.path.relpath(dir, self.root).replace("\\", "/").split("/")
+            for i, part in enumerate(parts):
+                if DATE_RE.search(part):
+                    roots.setdefault(subdir, set()).add(os.path.join(self.root, *parts[:i + 1]))
+                    break
+        return { subdir: sorted(dirs) for subdir, dirs in sorted(roots.items()) }
+
+    def paths(self) -> list:
+        with self.lock:
+            return [ r[0] for r in self.db.execute("SELECT path FROM files") ]
+
+    def night_stats(self) -> dict:
+        with self.lock:
+            return { date: (files, size) for date, files, size in self.db.execute("SELECT * FROM nights") }
+
+
+    ##### Scanning #####
+    def start_scan(self, callback=None):
+        if self.thread and self.thread.is_alive():
+            return
+        self.abort = False
+        # Messages are not written from the scan thread, callback logs them
+        self.thread = threading.Thread(target=self.scan, args=(callback, True), name=NAME, daemon=True)
+        self.thread.start()
+
+    def stop_scan(self):
+        if self.thread and self.thread.is_alive():
+            self.abort = True
+            self.thread.join()
+        self.thread = None
+
+
+    # Walk the data root, restat files only in directories with changed mtime
+    def scan(self, callback=None, quiet: bool=False) -> int:
+        t0 = time.perf_counter()
+        messages = []
+        with self.lock:
+            known = dict(self.db.execute("SELECT path, mtime FROM dirs"))
+            recent = set(r[0] for r in self.db.execute("SELECT dir FROM files GROUP BY dir HAVING MAX(mtime) >= ?",
+                                                       (time.time() - RESTAT_SECONDS,)))
+        seen = set()
+        pending = []
+        changed = 0
+        stack = [ self.root ]
+
+        while stack and not self.abort:
+            d = stack.pop()
+            try:
+                st = os.stat(d)
+                entries = list(os.scandir(d))
+            except OSError as e:
+                messages.append((True, f"scan {d}: {e}"))
+                continue
+            seen.add(d)
+            stack.extend(e.path for e in entries if e.is_dir(follow_symlinks=False))
+            if known.get(d) == st.st_mtime:
+                if d not in recent:
+                    continue
+                # Same directory mtime, files may have been rewritten in place
+                rows = self._stat_files(entries)
+                if self._unchanged(d, rows):
+                    continue
+            else:
+                rows = self._stat_files(entries)
+            pending.append((d, st.st_mtime, rows))
+            changed += 1
+            if len(pending) >= BATCH_DIRS:
+                self._store(pending)
+                pending = []
+        self._store(pending)
+
+        if not self.abort:
+            # Directories removed since last scan
+            removed = [ d for d in known if d not in seen ]
+            with self.lock, self.db:
+                dates = set()
+                for d in removed:
+                    dates.update(self._dates("dir = ?", (d,)))
+                    self.db.execute("DELETE FROM files WHERE dir = ?", (d,))
+                    self.db.execute("DELETE FROM dirs WHERE path = ?", (d,))
+                self._update_nights(dates)
+            # Removals change the per-night stats too
+            changed += len(removed)
+
+        messages.append((False, f"scan {self.root}: {changed} changed dirs, {time.perf_counter() - t0:.2f}s"))
+        self.scan_messages = messages
+        if not quiet:
+            self.log_scan_messages()
+        if callback:
+            callback(changed)
+        return changed
+
+
+    def log_scan_messages(self):
+        for is_warning, msg in self.scan_messages:
+            (warning if is_warning else verbose)(msg)
+
+
+    # Rescan a single directory (non-recursive), new subdirectories are scanned too
+    def update_dir(self, path: str):
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+            entries = list(os.scandir(path))
+        except OSError:
+            # Directory removed
+            below = _below(path)
+            with self.lock, self.db:
+                dates = self._dates("dir = ? OR (dir >= ? AND dir < ?)", (path,) + below)
+                self.db.execute("DELETE FROM files WHERE dir = ? OR (dir >= ? AND dir < ?)", (path,) + below)
+                self.db.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path,) + below)
+                self._update_nights(dates)
+            return
+        self._store([ (path, st.st_mtime, self._stat_files(entries)) ])
+        with self.lock:
+            known = set(r[0] for r in self.db.execute("SELECT path FROM dirs WHERE path >= ? AND path < ?", _below(path)))
+        for e in entries:
+            if e.is_dir(follow_symlinks=False) and e.path not in known:
+                self.update_dir(e.path)
+
+
+    def _stat_files(self, entries: list) -> list:
+        rows = []
+        for e in entries:
+            if not e.is_file(follow_symlinks=False):
+                continue
+            key = parse_path(os.path.relpath(e.path, self.root))
+            if key is None:
+                continue
+            try:
+                st = e.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            rows.append((e.path, os.path.dirname(e.path)) + key + (st.st_size, st.st_mtime))
+        return rows
+
+
+    def _unchanged(self, dir: str, rows: list) -> bool:
+        with self.lock:
+            old = set(self.db.execute("SELECT path, size, mtime FROM files WHERE dir = ?", (dir,)))
+        return old == set((r[0], r[5], r[6]) for r in rows)
+
+
+    def _store(self, pending: list):
+        if not pending:
+            return
+        with self.lock, self.db:
+            dates = set()
+            for d, mtime, rows in pending:
+                dates.update(self._dates("dir = ?", (d,)))
+                dates.update(r[2] for r in rows)
+                self.db.execute("DELETE FROM files WHERE dir = ?", (d,))
+                self.db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self.db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (d, mtime))
+            self._update_nights(dates)
+
+
+    # Must be called with lock held
+    def _dates(self, where: str, args: tuple) -> set:
+        return set(r[0] for r in self.db.execute(f"SELECT DISTINCT date FROM files WHERE {where}", args))
+
+    def _update_nights(self, dates: set):
+        for date in dates:
+            self.db.execute("DELETE FROM nights WHERE date = ?", (date,))
+            self.db.execute("INSERT INTO nights SELECT date, COUNT(*), SUM(size) FROM files WHERE date = ? GROUP BY date",
+                            (date,))
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Scan data root and query catalog",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--date", help="list files for DATE (YYYY-MM-DD)")
+    arg.add_argument("-s", "--subdir", help="restrict to SUBDIR, e.g. _asteroids")
+    arg.add_argument("-t", "--target", help="restrict to comma-separated list of TARGETs")
+    arg.add_argument("root", help="data root directory")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose)
+
+    catalog = Catalog(args.root)
+    catalog.scan()
+    if args.date:
+        targets = [ t.strip() for t in args.target.split(",") ] if args.target else None
+        t0 = time.perf_counter()
+        files = catalog.files(args.date, args.subdir, targets)
+        dt = time.perf_counter() - t0
+        for path, size in files:
+            print(f"{size:12d} {path}")
+        verbose(f"{len(files)} files, lookup {dt * 1000:.1f}ms")
+    else:
+        for date in catalog.nights():
+            print(date)
+    catalog.close()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Compression settings benchmark on a sample of real data: grid of 7z
+#       method, level, dictionary size and thread count, plus Python zlib
+#       and lzma for reference. Wall time, CPU time, peak RSS and ratio per
+#       setting, Pareto table and chart. The recommended 7z profile (best
+#       ratio still faster than the upload) is saved to the cache and
+#       loaded by qrun-7z/qrun-cli.
+#
+#       Usage:  python qcompress.py -s 500 /data/2026-10-18          benchmark 500 MB sample
+#               python qcompress.py -m LZMA2 -l 1,5 -t 1,4 -S /data     save recommended profile
+#               profile_options()                                     7z options of saved profile
+#               limit_threads(options, 4)                             -mmt at most 4 (lane budget)
+#               python qcompress.py -P                                show saved profile
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import itertools
+import subprocess
+from collections import namedtuple
+
+# Local modules
+from qverbose import verbose, warning, error
+from qcache import cache_file
+from qjobs import SEVENZIP
+
+# resource and os.wait4 are not available on Windows, CPU time and RSS are
+# only reported on Linux/macOS
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# matplotlib is imported for the chart only
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qcompress"
+
+
+
+MB = 1000 * 1000
+
+SAMPLE_MB    = 500
+METHODS      = [ "LZMA2", "BZip2", "Deflate" ]
+LEVELS       = [ 1, 3, 5, 7, 9 ]
+DICTS        = [ None ]         # None = default of level
+THREADS      = [ 1, os.cpu_count() or 1 ]
+PY_CODECS    = [ ("zlib", 1), ("zlib", 6), ("lzma", 1), ("lzma", 6) ]
+CHUNK        = 1024 * 1024
+PROFILE_FILE = "7z-profile.json"
+DICT_METHODS = ("LZMA2", "LZMA")
+
+Result = namedtuple("Result", "name options wall cpu rss size packed")
+
+
+
+##### Sample #####
+# Random files per extension, in proportion to the bytes of each extension,
+# so a sample of a night has the same mix of FITS frames, calibration and
+# other files as the full tree
+def sample_files(dir: str, total_mb: int, seed: int=42) -> list:
+    groups = {}
+    total = 0
+    for dirpath, _, filenames in os.walk(dir):
+        for f in filenames:
+            path = os.path.join(dirpath, f)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            if size == 0:
+                continue
+            groups.setdefault(os.path.splitext(f)[1].lower(), []).append((path, size))
+            total += size
+    if not total:
+        return []
+    budget = total_mb * MB
+    if budget >= total:
+        return sorted(p for files in groups.values() for p, _ in files)
+
+    rnd = random.Random(seed)
+    sample = []
+    for ext, files in sorted(groups.items()):
+        quota = budget * sum(s for _, s in files) / total
+        rnd.shuffle(files)
+        n = 0
+        for path, size in files:
+            if n and n + size > quota:
+                continue
+            sample.append(path)
+            n += size
+            if n >= quota:
+                break
+    return sorted(sample)
+
+
+
+##### 7z runs #####
+def seven_zip_options(method: str, level: int, dict: str, threads: int) -> list:
+    options = [ f"-m0={method}", f"-mx={level}" ]
+    if dict and method in DICT_METHODS:
+        options.append(f"-md={dict}")
+    options.append(f"-mmt={threads}")
+    return options
+
+
+# -mmt of options, at most threads, e.g. the share of the cores of a
+# scheduler slot
+def limit_threads(options: list, threads: int) -> list:
+    mmt = [ o for o in options if o.startswith("-mmt") ]
+    value = mmt[-1][4:].lstrip("=") if mmt else ""
+    if value.isdigit():
+        threads = min(threads, int(value))
+    return [ o for o in options if not o.startswith("-mmt") ] + [ f"-mmt={threads}" ]
+
+
+def grid(methods: list, levels: list, dicts: list, threads: list) -> list:
+    settings = []
+    for method, level, dict, mmt in itertools.product(methods, levels, dicts, threads):
+        if dict and method not in DICT_METHODS:
+            continue
+        options = seven_zip_options(method, level, dict, mmt)
+        if options not in settings:
+            settings.append(options)
+    return settings
+
+
+def _maxrss(ru) -> int:
+    # Linux: KiB, macOS: bytes
+    return ru.ru_maxrss if sys.platform == "darwin" else ru.ru_maxrss * 1024
+
+
+# 7z with list file, CPU time and peak RSS of the child from wait4()
+def run_7z(files: list, options: list, tmp: str, program: str=None) -> Result:
+    listfile = os.path.join(tmp, "files.txt")
+    with open(listfile, "w", encoding="utf8") as f:
+        f.write("\n".join(files) + "\n")
+    archive = os.path.join(tmp, "bench.7z")
+    if os.path.exists(archive):
+        os.remove(archive)
+    args = [ program or SEVENZIP, "a", "-t7z", "-scsUTF-8", "-bso0", "-bsp0" ] + options + [ archive, "@" + listfile ]
+
+    # stderr to a file, many per-file warnings would fill a pipe not read
+    # before wait4()
+    errfile = os.path.join(tmp, "stderr.txt")
+    t0 = time.perf_counter()
+    with open(errfile, "wb") as f:
+        p = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=f)
+    if resource and hasattr(os, "wait4"):
+        _, status, ru = os.wait4(p.pid, 0)
+        p.returncode = os.waitstatus_to_exitcode(status)
+        cpu, rss = ru.ru_utime + ru.ru_stime, _maxrss(ru)
+    else:
+        p.wait()
+        cpu, rss = None, None
+    wall = time.perf_counter() - t0
+    with open(errfile, "rb") as f:
+        err = f.read().decode("utf8", "replace").strip()
+    if p.returncode != 0:
+        raise RuntimeError(f"7z {' '.join(options)}: exit code {p.returncode} {err}")
+
+    size = sum(os.path.getsize(f) for f in files)
+    return Result("7z " + " ".join(options), options, wall, cpu, rss, size, os.path.getsize(archive))
+
+
+
+##### Python codecs, one fresh process per run for per-run RSS #####
+def _py_worker(args: tuple) -> tuple:
+    codec, level, files = args
+    import zlib
+    import lzma
+
+    t0 = time.perf_counter()
+    c0 = time.process_time()
+    comp = zlib.compressobj(level) if codec == "zlib" else lzma.LZMACompressor(preset=level)
+    packed = 0
+    for path in files:
+        with open(path, "rb") as f:
+            while data := f.read(CHUNK):
+                packed += len(comp.compress(data))
+    packed += len(comp.flush())
+    wall = time.perf_counter() - t0
+    cpu = time.process_time() - c0
+    rss = _maxrss(resource.getrusage(resource.RUSAGE_SELF)) if resource else None
+    return wall, cpu, rss, packed
+
+
+def run_py(files: list, codec: str, level: int) -> Result:
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(1) as pool:
+        wall, cpu, rss, packed = pool.submit(_py_worker, (codec, level, files)).result()
+    size = sum(os.path.getsize(f) for f in files)
+    return Result(f"python {codec} {level}", None, wall, cpu, rss, size, packed)
+
+
+
+##### Evaluation #####
+def ratio(r: Result) -> float:
+    return r.size / r.packed if r.packed else 0.0
+
+def speed(r: Result) -> float:
+    return r.size / r.wall / MB if r.wall else 0.0
+
+
+# Not dominated by a result that is at least as fast and compresses at
+# least as well
+def pareto(results: list) -> set:
+    front = set()
+    for r in results:
+        if not any(o is not r and o.wall <= r.wall and o.packed <= r.packed
+                   and (o.wall < r.wall or o.packed < r.packed) for o in results):
+            front.add(r.name)
+    return front
+
+
+# Best ratio among 7z settings on the Pareto front that keep up with
+# min_speed MB/s and stay below max_rss, otherwise the fastest 7z setting
+def recommend(results: list, min_speed: float, max_rss: int=None) -> Result:
+    front = pareto(results)
+    candidates = [ r for r in results if r.options and r.name in front ]
+    if max_rss:
+        candidates = [ r for r in candidates if r.rss is None or r.rss <= max_rss ]
+    fast = [ r for r in candidates if speed(r) >= min_speed ]
+    if fast:
+        return max(fast, key=ratio)
+    seven = [ r for r in results if r.options ]
+    return min(seven, key=lambda r: r.wall) if seven else None
+
+
+def print_table(results: list, best: Result=None):
+    front = pareto(results)
+    print(f"{'setting':44s} {'wall s':>8s} {'cpu s':>8s} {'rss MB':>7s} {'ratio':>6s} {'MB/s':>7s}  pareto")
+    for r in sorted(results, key=lambda r: r.wall):
+        cpu = f"{r.cpu:8.1f}" if r.cpu is not None else f"{'-':>8s}"
+        rss = f"{r.rss / MB:7.0f}" if r.rss is not None else f"{'-':>7s}"
+        mark = ("*" if r.name in front else "") + (" recommended" if best is not None and r is best else "")
+        print(f"{r.name:44s} {r.wall:8.1f} {cpu} {rss} {ratio(r):6.3f} {speed(r):7.1f}  {mark}")
+
+
+def plot(results: list, file: str, best: Result=None):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        from matplotlib.figure import Figure
+    except ImportError as e:
+        warning(f"no chart: {e}")
+        return
+    front = pareto(results)
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    for r in results:
+        color = "tab:blue" if r.options else "tab:gray"
+        ax.scatter(speed(r), ratio(r), color=color, marker="o" if r.name in front else "x")
+        ax.annotate(r.name.replace("-m0=", "").replace("-m", ""), (speed(r), ratio(r)), fontsize=6)
+    pts = sorted((speed(r), ratio(r)) for r in results if r.name in front)
+    ax.plot([ p[0] for p in pts ], [ p[1] for p in pts ], color="tab:orange", linewidth=1)
+    if best is not None:
+        ax.scatter(speed(best), ratio(best), s=150, facecolors="none", edgecolors="tab:red")
+    ax.set_xlabel("throughput MB/s")
+    ax.set_ylabel("compression ratio")
+    ax.set_title("7z (blue) / Python (gray) settings, Pareto front")
+    ax.grid(True)
+    fig.savefig(file, dpi=120)
+    verbose(f"chart {file}")
+
+
+
+##### Profile #####
+def save_profile(best: Result, sample_mb: float, file: str=None):
+    file = file or cache_file(PROFILE_FILE)
+    profile = { "options": best.options, "ratio": round(ratio(best), 3), "speed": round(speed(best), 1),
+                "rss": best.rss, "sample_mb": round(sample_mb), "created": time.strftime("%Y-%m-%d %H:%M:%S") }
+    tmp = f"{file}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, file)
+    verbose(f"profile {' '.join(best.options)} -> {file}")
+
+
+def load_profile(file: str=None) -> dict:
+    file = file or cache_file(PROFILE_FILE)
+    try:
+        with open(file) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        warning(f"{file}: {e}")
+        return None
+
+
+# 7z options of saved profile, [] = 7z defaults
+def profile_options(file: str=None) -> list:
+    profile = load_profile(file)
+    return list(profile.get("options") or []) if profile else []
+
+
+
+def csv_list(conv):
+    return lambda s: [ conv(x) for x in s.split(",") if x ]
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Benchmark 7z and Python compression settings on a sample of real data",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-s", "--sample", type=int, default=SAMPLE_MB, metavar="MB", help=f"sample size (default {SAMPLE_MB})")
+    arg.add_argument("-m", "--methods", type=csv_list(str), default=METHODS, help=f"7z methods (default {','.join(METHODS)})")
+    arg.add_argument("-l", "--levels", type=csv_list(int), default=LEVELS, help=f"7z levels (default {','.join(map(str, LEVELS))})")
+    arg.add_argument("-d", "--dicts", type=csv_list(str), default=DICTS, help="LZMA/LZMA2 dictionary sizes, e.g. 16m,64m,256m (default of level)")
+    arg.add_argument("-t", "--threads", type=csv_list(int), default=THREADS, help=f"7z -mmt threads (default {','.join(map(str, THREADS))})")
+    arg.add_argument("-n", "--no-python", action="store_true", help="skip Python zlib/lzma")
+    arg.add_argument("-p", "--program", help="path of 7z executable")
+    arg.add_argument("--min-speed", type=float, metavar="MB/s", help="required throughput, default upload throughput of --dest")
+    arg.add_argument("--dest", default="iasdata:test-upload/tmp", help="rclone destination for upload throughput")
+    arg.add_argument("--max-rss", type=int, metavar="MB", help="memory limit for recommended setting")
+    arg.add_argument("-c", "--chart", help="save chart to PNG file")
+    arg.add_argument("-j", "--json", help="save all results to JSON file")
+    arg.add_argument("-S", "--save", action="store_true", help="save recommended profile for qrun-7z/qrun-cli")
+    arg.add_argument("-P", "--show-profile", action="store_true", help="show saved profile")
+    arg.add_argument("dir", nargs="?", help="data directory to sample")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose)
+
+    if args.show_profile:
+        print(json.dumps(load_profile(), indent=2))
+        return
+    if not args.dir:
+        arg.error("data directory required")
+
+    files = sample_files(args.dir, args.sample)
+    if not files:
+        error(f"no files in {args.dir}")
+    sample_mb = sum(os.path.getsize(f) for f in files) / MB
+    print(f"sample: {len(files)} files, {sample_mb:.0f} MB from {args.dir}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix=NAME) as tmp:
+        for options in grid(args.methods, args.levels, args.dicts, args.threads):
+            verbose(f"7z {' '.join(options)}")
+            try:
+                results.append(run_7z(files, options, tmp, args.program))
+            except (OSError, RuntimeError) as e:
+                warning(str(e))
+    if not args.no_python:
+        for codec, level in PY_CODECS:
+            verbose(f"python {codec} {level}")
+            results.append(run_py(files, codec, level))
+    if not results:
+        error("no results")
+
+    min_speed = args.min_speed
+    if min_speed is None:
+        # Throughput of whole upload jobs, all parallel transfers included
+        from qvolumes import measured_throughput
+        min_speed = measured_throughput(args.dest) / MB
+    best = recommend(results, min_speed, args.max_rss * MB if args.max_rss else None)
+
+    print_table(results, best)
+    print(f"required throughput {min_speed:.1f} MB/s")
+    if best is not None:
+        print(f"recommended: {' '.join(best.options)}, ratio {ratio(best):.3f}, {speed(best):.1f} MB/s")
+    if args.chart:
+        plot(results, args.chart, best)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([ dict(r._asdict(), ratio=ratio(r), speed=speed(r)) for r in results ], f, indent=2)
+    if args.save:
+        if best is None:
+            error("no 7z result, profile not saved")
+        save_profile(best, sample_mb)
+
+
+
+if __name__ == "__main__":
+    main()
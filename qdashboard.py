@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Dashboard for the job history recorded by qmetrics: throughput
+#       per night and per remote
+#
+#       Usage:  python qdashboard.py
+#               DashboardWindow(parent).show()  from the other tools
+
+import sys
+import time
+
+# The following libs must be installed with pip
+import pandas as pd
+import matplotlib
+matplotlib.use("QtAgg")
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+from matplotlib.figure import Figure
+
+# Local modules
+from qverbose import verbose, warning, error
+from qmetrics import MetricsStore
+
+# PyQt6 must be installed with pip
+from PyQt6.QtWidgets import (
+    QApplication,
+    QMainWindow,
+    QVBoxLayout,
+    QHBoxLayout,
+    QWidget,
+    QLabel,
+    QComboBox,
+    QPushButton
+)
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qdashboard"
+
+
+
+# Only the columns needed for the plots are read from the Parquet files
+COLUMNS = [ "kind", "start", "night", "remote", "duration", "bytes", "files", "exit_code" ]
+RANGES  = { "Last 30 nights": 30, "Last 365 nights": 365, "All": None }
+
+
+
+# Throughput per night and group column, MB/s = sum(bytes) / sum(duration)
+def throughput(df: pd.DataFrame, by: str) -> pd.DataFrame:
+    g = df.groupby([ "night", by ])[[ "bytes", "duration" ]].sum()
+    g["mbps"] = g["bytes"] / g["duration"].where(g["duration"] > 0) / 1e6
+    result = g["mbps"].unstack(by).sort_index()
+    result.index = pd.to_datetime(result.index)
+    return result
+
+
+
+class DashboardWindow(QMainWindow):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        t0 = time.perf_counter()
+        self.setMinimumSize(800, 600)
+        self.setWindowTitle(f"{NAME} {VERSION}")
+        self.store = MetricsStore()
+
+        layout = QVBoxLayout()
+        controls = QHBoxLayout()
+        self.range = QComboBox()
+        self.range.addItems(RANGES.keys())
+        self.range.currentIndexChanged.connect(self.plot)
+        controls.addWidget(self.range)
+        btn_reload = QPushButton("Reload")
+        btn_reload.clicked.connect(self.reload)
+        controls.addWidget(btn_reload)
+        self.summary = QLabel()
+        controls.addWidget(self.summary, 1)
+        layout.addLayout(controls)
+
+        self.figure = Figure(figsize=(8, 6), layout="constrained")
+        self.canvas = FigureCanvasQTAgg(self.figure)
+        layout.addWidget(self.canvas)
+
+        w = QWidget()
+        w.setLayout(layout)
+        self.setCentralWidget(w)
+
+        self.reload()
+        self.statusBar().showMessage(f"Loaded in {time.perf_counter() - t0:.2f}s")
+
+
+    def reload(self):
+        self.df = self.store.jobs(COLUMNS)
+        self.plot()
+
+
+    def plot(self):
+        df = self.df
+        days = RANGES[self.range.currentText()]
+        if days and not df.empty:
+            cutoff = (pd.Timestamp.now() - pd.Timedelta(days=days)).date().isoformat()
+            df = df[df["night"] >= cutoff]
+
+        ok = df[df["exit_code"] == 0]
+        self.summary.setText(f"{len(df)} jobs, {df['bytes'].sum() / 1e9:.1f} GB, "
+                             f"{df['files'].sum()} files, {(df['exit_code'] != 0).sum()} failed")
+
+        self.figure.clear()
+        ax1, ax2 = self.figure.subplots(2, 1, sharex=True)
+        if not ok.empty:
+            throughput(ok, "kind").plot(ax=ax1, marker=".")
+            rclone = ok[ok["kind"] == "rclone"]
+            if not rclone.empty:
+                throughput(rclone, "remote").plot(ax=ax2, marker=".")
+        ax1.set_title("Throughput per night")
+        ax1.set_ylabel("MB/s")
+        ax2.set_title("Upload throughput per remote")
+        ax2.set_ylabel("MB/s")
+        ax2.set_xlabel("Night")
+        self.canvas.draw_idle()
+
+
+
+def main():
+    verbose.set_prog(NAME)
+    verbose.enable()
+
+    app = QApplication(sys.argv)
+    window = DashboardWindow()
+    window.show()
+    app.exec()
+
+
+
+if __name__ == "__main__":
+    main()
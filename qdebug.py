@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Drop-in replacement for icecream's ic, which imports icecream only
+#       when debug output is enabled
+#
+#       Usage:  from qdebug import ic
+#               ic(args)                returns args like icecream
+#               ic.enable()             imports icecream
+#               ic.disable()
+
+import sys
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qdebug"
+
+
+
+class LazyIc:
+    def __init__(self):
+        self._ic = None
+
+    def __call__(self, *args):
+        if self._ic is not None and self._ic.enabled:
+            # Format with the caller's frame, so that icecream shows the
+            # argument expressions of the caller, not of this wrapper
+            self._ic.outputFunction(self._ic._format(sys._getframe(1), *args))
+        if not args:
+            return None
+        return args[0] if len(args) == 1 else args
+
+    @property
+    def enabled(self) -> bool:
+        return self._ic is not None and self._ic.enabled
+
+    def enable(self):
+        if self._ic is None:
+            # The following libs must be installed with pip
+            from icecream import ic
+            self._ic = ic
+        self._ic.enable()
+
+    def disable(self):
+        if self._ic is not None:
+            self._ic.disable()
+
+
+ic = LazyIc()
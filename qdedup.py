@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Find byte-identical files: group by size, then partial hash (head
+#       and tail), then full hash only for remaining collisions. Files up
+#       to PARTIAL bytes are hashed completely by the partial hash.
+#
+#       Usage:  result = find_duplicates(paths, workers)   workers e.g. from qscheduler.run_in_lane()
+#               result.unique                   paths to archive
+#               result.aliases                  dict duplicate -> original
+#               result.saved                    bytes not archived
+
+import os
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Local modules
+from qverbose import verbose, warning, error
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qdedup"
+
+
+
+PARTIAL   = 64 * 1024               # bytes hashed at head and tail
+BLOCKSIZE = 1024 * 1024
+MIN_SIZE  = 1                       # empty files are never deduplicated
+
+
+
+def partial_hash(path: str) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL))
+        size = os.fstat(f.fileno()).st_size
+        if size > 2 * PARTIAL:
+            f.seek(-PARTIAL, os.SEEK_END)
+            h.update(f.read(PARTIAL))
+    return h.digest()
+
+
+def full_hash(path: str) -> bytes:
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        while block := f.read(BLOCKSIZE):
+            h.update(block)
+    return h.digest()
+
+
+# Groups of paths with equal func(path), all paths hashed through the pool together
+def _group(paths: list, func, pool: ThreadPoolExecutor) -> list:
+    groups = {}
+    for path, key in zip(paths, pool.map(func, paths)):
+        groups.setdefault(key, []).append(path)
+    return [ g for g in groups.values() if len(g) > 1 ]
+
+
+
+class Duplicates:
+    def __init__(self):
+        self.unique = []
+        self.aliases = {}
+        self.saved = 0
+        self.hashed = 0             # bytes read for full hashes
+
+
+
+def find_duplicates(paths: list, workers: int=None) -> Duplicates:
+    result = Duplicates()
+    sizes = {}
+    by_size = {}
+    for path in paths:
+        try:
+            sizes[path] = os.path.getsize(path)
+            by_size.setdefault(sizes[path], []).append(path)
+        except OSError as e:
+            warning(f"dedup {path}: {e}")
+
+    candidates = [ p for size, g in by_size.items() if size >= MIN_SIZE and len(g) > 1 for p in g ]
+    if candidates:
+        with ThreadPoolExecutor(workers) as pool:
+            pgroups = _group(candidates, lambda p: (sizes[p], partial_hash(p)), pool)
+            # Small files were already hashed completely
+            fgroups = [ g for g in pgroups if sizes[g[0]] <= PARTIAL ]
+            large = [ p for g in pgroups if sizes[g[0]] > PARTIAL for p in g ]
+            fgroups += _group(large, lambda p: (sizes[p], full_hash(p)), pool)
+            result.hashed = sum(sizes[p] for p in large)
+        for fgroup in fgroups:
+            original = min(fgroup)
+            for dup in fgroup:
+                if dup != original:
+                    result.aliases[dup] = original
+                    result.saved += sizes[dup]
+
+    result.unique = [ p for p in paths if p not in result.aliases ]
+    verbose(f"dedup: {len(paths)} files, {len(result.aliases)} duplicates, {result.saved / 1e6:.1f} MB saved")
+    return result
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Find duplicate files",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("dir", nargs="+", help="directories to check")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose)
+
+    paths = []
+    for d in args.dir:
+        for dirpath, _, files in os.walk(d):
+            paths.extend(os.path.join(dirpath, f) for f in files)
+    result = find_duplicates(paths)
+    for dup, original in sorted(result.aliases.items()):
+        print(f"{dup} = {original}")
+    print(f"{len(result.aliases)} duplicates, {result.saved} bytes saved")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Table of per-file events (index, op, path, size, time) from 7z
+#       output. Array-backed columns, inserts are batched by a timer,
+#       sorting and filtering are done on whole columns in Python.
+#       Sizes from qjobs SIZE events (no stat in the GUI thread), the flush
+#       timer only runs while inserts or sizes are pending.
+#       Sorted inserts: each batch is placed with bisect and inserted with
+#       beginInsertRows() per run (one layout change for many runs), rows
+#       whose size changed while sorted by size are moved the same way.
+#       Filtering is done in the model with a match flag per row, computed
+#       on insert, no proxy model.
+#
+#       Usage:  table = FileTable()                 widget with filter line and view
+#               table.model.add(n, op, path)
+#               table.model.set_size(path, size)
+#               table.model.clear()
+
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Local modules
+from qverbose import verbose, warning, error
+
+# PyQt6 must be installed with pip
+from PyQt6.QtCore    import Qt, QAbstractTableModel, QModelIndex, QTimer
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QTableView, QHeaderView
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qfiletable"
+
+
+
+HEADERS  = [ "#", "Op", "Path", "Size", "Time" ]
+COL_N, COL_OP, COL_PATH, COL_SIZE, COL_TIME = range(len(HEADERS))
+FLUSH_MS  = 100             # batch interval for inserts
+FILTER_MS = 300             # debounce for filter input
+RUNS_MAX  = 64              # more runs per flush: one layout change instead
+
+
+
+class FileEventModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = []
+        self.pending_sizes = {}         # path -> size
+        self.sort_column = None         # column of last sort(), None = storage order
+        self.descending = False
+        self.text = ""                  # filter, casefolded
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(FLUSH_MS)
+        self.timer.timeout.connect(self.flush)
+        self._reset_columns()
+
+    def _reset_columns(self):
+        self.n     = array("q")
+        self.op    = bytearray()
+        self.path  = []
+        self.size  = array("q")         # -1 = unknown
+        self.time  = array("d")         # seconds since clear()
+        self.match = bytearray()        # storage row -> matches filter
+        self.order = array("l")         # visible storage rows, ascending by _key()
+        self.rows  = {}                 # path -> storage row
+        self.t0    = time.perf_counter()
+
+    def clear(self):
+        self.beginResetModel()
+        self.pending = []
+        self.pending_sizes = {}
+        self._reset_columns()
+        self.endResetModel()
+
+
+    ##### Inserts #####
+    def add(self, n: int, op: str, path: str):
+        self.pending.append((n, op, path, time.perf_counter() - self.t0))
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def set_size(self, path: str, size: int):
+        self.pending_sizes[path] = size
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        self.timer.stop()
+        if self.pending:
+            batch = self.pending
+            self.pending = []
+            first = len(self.path)
+            for n, op, path, t in batch:
+                self.rows[path] = len(self.path)
+                self.n.append(n)
+                self.op.append(ord(op[0]) if op else 32)
+                self.path.append(path)
+                self.size.append(-1)
+                self.time.append(t)
+                self.match.append(not self.text or self.text in path.casefold())
+            self._insert([ i for i in range(first, len(self.path)) if self.match[i] ])
+        if self.pending_sizes:
+            sizes = self.pending_sizes
+            self.pending_sizes = {}
+            changed = []
+            for path, size in sizes.items():
+                i = self.rows.get(path)
+                if i is None:
+                    # FILE event not flushed yet
+                    self.pending_sizes[path] = size
+                elif self.size[i] != size:
+                    changed.append((i, size))
+            if not changed:
+                return
+            if self.sort_column == COL_SIZE:
+                # Moved to the position of the new size
+                visible = [ i for i, _ in changed if self.match[i] ]
+                key = self._key()
+                self._remove(sorted(self._find(key, i) for i in visible))
+                for i, size in changed:
+                    self.size[i] = size
+                self._insert(visible)
+            else:
+                for i, size in changed:
+                    self.size[i] = size
+                if self.order:
+                    self.dataChanged.emit(self.index(0, COL_SIZE), self.index(len(self.order) - 1, COL_SIZE))
+
+
+    ##### Model interface #####
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.order)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() in (COL_N, COL_SIZE, COL_TIME):
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        i = self.order[self._pos(index.row())]
+        col = index.column()
+        if col == COL_N:
+            return str(self.n[i])
+        if col == COL_OP:
+            return chr(self.op[i])
+        if col == COL_PATH:
+            return self.path[i]
+        if col == COL_SIZE:
+            return "" if self.size[i] < 0 else f"{self.size[i]:,}"
+        if col == COL_TIME:
+            return f"{self.time[i]:.3f}"
+        return None
+
+
+    ##### Sorting/filtering on whole columns #####
+    # self.order is ascending, a descending view reads it from the end
+    def _column(self, column: int):
+        return { COL_N: self.n, COL_OP: self.op, COL_PATH: self.path,
+                 COL_SIZE: self.size, COL_TIME: self.time }.get(column)
+
+    # (value, storage row): unique, same order as a stable sort
+    def _key(self):
+        col = self._column(self.sort_column)
+        return None if col is None else (lambda i: (col[i], i))
+
+    # Position of storage row i in self.order, or where it would be inserted
+    def _find(self, key, i: int) -> int:
+        if key is None:
+            return bisect_left(self.order, i)
+        return bisect_left(self.order, key(i), key=key)
+
+    # View row <-> position in self.order, n = length of self.order
+    def _pos(self, row: int, n: int=None) -> int:
+        return (len(self.order) if n is None else n) - 1 - row if self.descending else row
+
+    def sort(self, column: int, order: Qt.SortOrder=Qt.SortOrder.AscendingOrder):
+        self.flush()
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        rows = [ self.order[self._pos(p.row())] for p in persistent ]
+        self.sort_column = column if self._column(column) is not None else None
+        self.descending = self.sort_column is not None and order == Qt.SortOrder.DescendingOrder
+        key = self._key()
+        self.order = array("l", sorted(self.order, key=key))
+        # Move persistent indexes (selection, current) along
+        self.changePersistentIndexList(persistent,
+            [ self.index(self._pos(self._find(key, i)), p.column()) for i, p in zip(rows, persistent) ])
+        self.layoutChanged.emit()
+
+    def set_filter(self, text: str):
+        self.flush()
+        text = text.casefold()
+        if text == self.text:
+            return
+        # More specific text, only visible rows can match
+        narrow = self.text in text
+        self.text = text
+        self.match = bytearray(not text or text in p.casefold() for p in self.path)
+        self.beginResetModel()
+        if narrow:
+            self.order = array("l", (i for i in self.order if self.match[i]))
+        else:
+            self.order = array("l", sorted((i for i in range(len(self.path)) if self.match[i]), key=self._key()))
+        self.endResetModel()
+
+    # Storage rows into the sorted order, beginInsertRows() per run of rows
+    # at the same position
+    def _insert(self, rows: list):
+        if not rows:
+            return
+        key = self._key()
+        rows.sort(key=key)
+        pos = [ self._find(key, i) for i in rows ]
+        runs = [ a for a in range(len(pos)) if a == 0 or pos[a] != pos[a - 1] ] + [ len(pos) ]
+        if len(runs) - 1 <= RUNS_MAX:
+            # From the end, positions of earlier runs stay valid
+            for a, b in reversed(list(zip(runs, runs[1:]))):
+                p = pos[a]
+                first = len(self.order) - p if self.descending else p
+                self.beginInsertRows(QModelIndex(), first, first + b - a - 1)
+                self.order[p:p] = array("l", rows[a:b])
+                self.endInsertRows()
+        else:
+            order = array("l")
+            prev = 0
+            for a, b in zip(runs, runs[1:]):
+                order.extend(self.order[prev:pos[a]])
+                order.extend(array("l", rows[a:b]))
+                prev = pos[a]
+            order.extend(self.order[prev:])
+            self._relayout(order, lambda r: r + bisect_right(pos, r))
+
+    # Positions (sorted) out of the order, beginRemoveRows() per run
+    def _remove(self, pos: list):
+        if not pos:
+            return
+        runs = []                       # (first, last + 1)
+        for p in pos:
+            if runs and runs[-1][1] == p:
+                runs[-1][1] = p + 1
+            else:
+                runs.append([ p, p + 1 ])
+        if len(runs) <= RUNS_MAX:
+            for a, b in reversed(runs):
+                first = len(self.order) - b if self.descending else a
+                self.beginRemoveRows(QModelIndex(), first, first + b - a - 1)
+                del self.order[a:b]
+                self.endRemoveRows()
+        else:
+            order = array("l")
+            prev = 0
+            for a, b in runs:
+                order.extend(self.order[prev:a])
+                prev = b
+            order.extend(self.order[prev:])
+            removed = set(pos)
+            self._relayout(order, lambda r: None if r in removed else r - bisect_left(pos, r))
+
+    # New order in one layout change, remap(position) -> new position or None
+    def _relayout(self, order: array, remap):
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        moved = [ remap(self._pos(p.row())) for p in persistent ]
+        self.order = order
+        self.changePersistentIndexList(persistent,
+            [ QModelIndex() if r is None else self.index(self._pos(r), p.column()) for r, p in zip(moved, persistent) ])
+        self.layoutChanged.emit()
+
+
+
+class FileTable(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = FileEventModel(self)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.filter = QLineEdit()
+        self.filter.setPlaceholderText("Filter path")
+        self.filter.setClearButtonEnabled(True)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_MS)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter.textChanged.connect(self.filter_timer.start)
+        layout.addWidget(self.filter)
+
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setSortingEnabled(True)
+        self.view.sortByColumn(-1, Qt.SortOrder.AscendingOrder)
+        # Fixed row height and no content-based column sizing, both would
+        # query every row
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.view.verticalHeader().setDefaultSectionSize(self.view.fontMetrics().height() + 4)
+        self.view.verticalHeader().hide()
+        self.view.horizontalHeader().setStretchLastSection(False)
+        self.view.horizontalHeader().setSectionResizeMode(COL_PATH, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+    def apply_filter(self):
+        self.model.set_filter(self.filter.text())
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Index of FITS header keywords OBJECT, DATE-OBS, FILTER, EXPTIME,
+#       keyed by path and mtime. Only the leading 2880-byte header blocks
+#       are read (mmap), parsing runs in a process pool. Files without
+#       a valid header get a marker row (all keywords NULL), so they are
+#       not read again. The target map is updated with new rows.
+#       The process pool runs in a cpu slot of the shared scheduler, sized
+#       to the slot's share of the cores.
+#
+#       Usage:  index = FitsIndex()
+#               index.update(paths)             parse new/changed files (slow, not
+#                                               in the GUI thread)
+#               index.target_paths(targets)     set of paths, lookup only
+#               index.filter_targets(paths, targets)
+#               index.header(path)              dict of indexed keywords
+
+import os
+import re
+import mmap
+import sqlite3
+import threading
+import time
+import argparse
+
+# Local modules
+from qverbose import verbose, warning, error
+from qcache import cache_file
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qfitsindex"
+
+
+
+BLOCK    = 2880
+CARD     = 80
+KEYWORDS = ("OBJECT", "DATE-OBS", "FILTER", "EXPTIME")
+FITS_EXT = (".fits", ".fit", ".fts")
+# Give up on headers longer than this
+MAX_BLOCKS = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS headers (
+    path     TEXT PRIMARY KEY,
+    mtime    REAL NOT NULL,
+    object   TEXT,
+    date_obs TEXT,
+    filter   TEXT,
+    exptime  REAL
+);
+CREATE INDEX IF NOT EXISTS headers_object ON headers (object);
+"""
+
+
+
+def is_fits(path: str) -> bool:
+    return path.lower().endswith(FITS_EXT)
+
+
+# Normalized target name for matching, "M 31" == "m31"
+def target_key(name: str) -> str:
+    return re.sub(r"\s+", "", name or "").casefold()
+
+
+def parse_value(value: str):
+    value = value.strip()
+    if value.startswith("'"):
+        # String value, '' is an escaped quote
+        m = re.match(r"'((?:[^']|'')*)'", value)
+        return m.group(1).replace("''", "'").rstrip() if m else value.strip("'").rstrip()
+    value = value.split("/", 1)[0].strip()
+    try:
+        return float(value)
+    except ValueError:
+        return value or None
+
+
+# Read header cards from mmapped file until END, return dict of KEYWORDS
+def read_header(path: str) -> dict:
+    header = {}
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < BLOCK:
+            return None
+        with mmap.mmap(f.fileno(), min(size, BLOCK * MAX_BLOCKS), access=mmap.ACCESS_READ) as m:
+            if m[:9] != b"SIMPLE  =":
+                return None
+            for block in range(0, len(m) - BLOCK + 1, BLOCK):
+                for pos in range(block, block + BLOCK, CARD):
+                    key = m[pos:pos + 8].rstrip().decode("ascii", "replace")
+                    if key == "END":
+                        return header
+                    if key in KEYWORDS and m[pos + 8:pos + 10] == b"= ":
+                        header[key] = parse_value(m[pos + 10:pos + CARD].decode("ascii", "replace"))
+    return header
+
+
+# Process pool worker, returns row for headers table, marker row for files
+# without valid header, None if not readable
+def index_file(args: tuple) -> tuple:
+    path, mtime = args
+    try:
+        h = read_header(path)
+    except OSError:
+        return None
+    except ValueError:
+        h = None
+    if h is None:
+        return (path, mtime, None, None, None, None)
+    exptime = h.get("EXPTIME")
+    return (path, mtime, h.get("OBJECT"), h.get("DATE-OBS"), h.get("FILTER"),
+            exptime if isinstance(exptime, float) else None)
+
+
+
+class FitsIndex:
+    def __init__(self, dbfile: str=None, workers: int=None):
+        self.dbfile = dbfile or cache_file("fitsindex.sqlite")
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.dbfile, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        # target_key(OBJECT) -> set of paths and path -> target_key, built lazily
+        self.targets = None
+        self.objects = None
+
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+    # Parse headers of new or modified FITS files, returns number of files parsed
+    def update(self, paths: list) -> int:
+        t0 = time.perf_counter()
+        with self.lock:
+            known = dict(self.db.execute("SELECT path, mtime FROM headers"))
+        todo = []
+        for path in paths:
+            if not is_fits(path):
+                continue
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if known.get(path) != mtime:
+                todo.append((path, mtime))
+        if not todo:
+            return 0
+
+        if len(todo) < 50:
+            rows = [ index_file(t) for t in todo ]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            from qscheduler import run_in_lane
+            def parse(workers: int) -> list:
+                with ProcessPoolExecutor(self.workers or workers) as pool:
+                    return list(pool.map(index_file, todo, chunksize=64))
+            rows = run_in_lane(f"FITS headers {len(todo)} files", parse, stage="index")
+        rows = [ r for r in rows if r is not None ]
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO headers VALUES (?, ?, ?, ?, ?, ?)", rows)
+            if self.targets is not None:
+                for path, _, obj, *_ in rows:
+                    self._map(path, obj)
+        verbose(f"indexed {sum(1 for r in rows if r[2:] != (None,) * 4)}/{len(todo)} FITS headers, {time.perf_counter() - t0:.2f}s")
+        return len(todo)
+
+
+    def header(self, path: str) -> dict:
+        with self.lock:
+            r = self.db.execute("SELECT object, date_obs, filter, exptime FROM headers WHERE path = ?",
+                                (path,)).fetchone()
+        # Marker row for files without valid header
+        return dict(zip(KEYWORDS, r)) if r and any(v is not None for v in r) else None
+
+
+    def _target_map(self) -> dict:
+        with self.lock:
+            if self.targets is None:
+                self.targets = {}
+                self.objects = {}
+                for path, obj in self.db.execute("SELECT path, object FROM headers WHERE object IS NOT NULL"):
+                    self._map(path, obj)
+            return self.targets
+
+    # Must be called with lock held
+    def _map(self, path: str, obj: str):
+        old = self.objects.pop(path, None)
+        if old is not None:
+            self.targets[old].discard(path)
+        if obj is not None:
+            key = self.objects[path] = target_key(obj)
+            self.targets.setdefault(key, set()).add(path)
+
+
+    # Set of all paths with OBJECT in targets
+    def target_paths(self, targets: list) -> set:
+        tmap = self._target_map()
+        result = set()
+        for t in targets:
+            result |= tmap.get(target_key(t), set())
+        return result
+
+
+    # Subset of paths with OBJECT in targets
+    def filter_targets(self, paths: list, targets: list) -> list:
+        selected = self.target_paths(targets)
+        return [ p for p in paths if p in selected ]
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Index FITS headers",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-t", "--target", help="list files for comma-separated list of TARGETs")
+    arg.add_argument("dir", nargs="+", help="directories to index")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose)
+
+    paths = []
+    for d in args.dir:
+        for dirpath, _, files in os.walk(d):
+            paths.extend(os.path.abspath(os.path.join(dirpath, f)) for f in files)
+
+    index = FitsIndex()
+    index.update(paths)
+    if args.target:
+        for path in index.filter_targets(paths, args.target.split(",")):
+            print(path)
+    else:
+        for path in paths:
+            h = index.header(path)
+            if h:
+                print(path, h)
+    index.close()
+
+
+
+if __name__ == "__main__":
+    main()
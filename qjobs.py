@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       GUI-independent job engine for 7z and rclone: command lines,
+#       output parsers, asyncio runner. The QProcess runner is in qprocess.
+#       BYTES event from rclone progress, job info (source, destination)
+#       7z test job, blocking runner with cancellation for worker threads
+#       Output is read into a capped buffer (OutputBuffer), progress-only
+#       lines are dropped when the parser falls behind, BUFFER event with
+#       peak buffer usage at job end
+#       7z extract job for selected members (list file)
+#       SIZE event after FILE event for 7z add jobs (7z reports no sizes),
+#       the only place where added files are stat'ed, FileSizer thread for
+#       the QProcess runner
+#
+#       Usage:  job = Job.seven_zip("tmp/test.7z", [ "testdata" ])
+#               job = Job.rclone("tmp/test.7z", "iasdata:test-upload/tmp")
+#               code = asyncio.run(run_async(job, callback))
+#               code = run_blocking(job, callback, cancel_event)
+#
+#       Events passed to callback(event) are tuples:
+#               (PROGRESS, percent)
+#               (FILE, n, op, path)
+#               (SIZE, n, path, size)           size of file added by 7z
+#               (BYTES, done, total)
+#               (TEXT, line)
+#               (BUFFER, peak, dropped)         output buffer peak bytes, dropped lines
+#               (EXIT, code)
+
+import os
+import re
+import sys
+import shutil
+import queue
+import threading
+import subprocess
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qjobs"
+
+
+
+# Default executables, override with environment or found in PATH
+SEVENZIP = os.environ.get("QT_WORKBENCH_7Z") or shutil.which("7z") or "C:/Program Files/7-Zip/7z.exe"
+RCLONE   = os.environ.get("QT_WORKBENCH_RCLONE") or shutil.which("rclone") or "C:/Tools/rclone/rclone.exe"
+
+# Event types
+PROGRESS = "progress"
+FILE     = "file"
+SIZE     = "size"
+BYTES    = "bytes"
+TEXT     = "text"
+BUFFER   = "buffer"
+EXIT     = "exit"
+
+EVENT_FIELDS = {
+    PROGRESS: ("percent",),
+    FILE:     ("n", "op", "path"),
+    SIZE:     ("n", "path", "size"),
+    BYTES:    ("done", "total"),
+    TEXT:     ("line",),
+    BUFFER:   ("peak", "dropped"),
+    EXIT:     ("code",),
+}
+
+
+# Output buffer size per stream
+BUFFER_CAP = 1024 * 1024
+
+
+def event_dict(event: tuple) -> dict:
+    return dict(zip(("event",) + EVENT_FIELDS[event[0]], event))
+
+
+
+##### Output buffer #####
+# Fixed-size bytearray, written through a memoryview and compacted in
+# place. If new data does not fit, complete lines matching the parser's
+# DROP pattern (progress only) are removed. Lines with file or error
+# information are never dropped, if they alone fill the buffer the caller
+# has to parse before writing more (feed()).
+class OutputBuffer:
+    SEPARATORS = (b"\n", b"\r", b"\b")
+
+    def __init__(self, cap: int=BUFFER_CAP, drop: re.Pattern=None):
+        self.cap = cap
+        self.buf = bytearray(cap)
+        self.view = memoryview(self.buf)
+        self.start = 0
+        self.end = 0
+        self.drop = drop
+        self.peak = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def free(self) -> int:
+        return self.cap - len(self)
+
+    def _compact(self):
+        if self.start:
+            n = self.end - self.start
+            self.buf[0:n] = self.view[self.start:self.end]
+            self.start, self.end = 0, n
+
+    # Remove progress-only lines from the complete lines in the buffer
+    def _drop_lines(self):
+        buf = self.buf
+        pos = w = self.start
+        while pos < self.end:
+            cut = min((i for i in (buf.find(s, pos, self.end) for s in self.SEPARATORS) if i >= 0), default=-1)
+            if cut < 0:
+                break
+            cut += 1
+            if self.drop.match(buf, pos, cut):
+                # Only lines with content, not each of 7z's backspaces
+                if buf[pos:cut - 1].strip():
+                    self.dropped += 1
+            else:
+                if w != pos:
+                    buf[w:w + cut - pos] = self.view[pos:cut]
+                w += cut - pos
+            pos = cut
+        if pos != w:
+            buf[w:w + self.end - pos] = self.view[pos:self.end]
+        self.end = w + self.end - pos
+
+    # Number of bytes written, less than len(data) if the buffer is full
+    def write(self, data) -> int:
+        n = len(data)
+        if self.end + n > self.cap:
+            self._compact()
+            if self.end + n > self.cap and self.drop is not None:
+                self._drop_lines()
+                self._compact()
+            n = min(n, self.cap - self.end)
+        self.view[self.end:self.end + n] = data[:n]
+        self.end += n
+        self.peak = max(self.peak, len(self))
+        return n
+
+    # Write all data, parse(text) is called if the buffer stays full
+    def feed(self, data, parse):
+        data = memoryview(data)
+        while data:
+            n = self.write(data)
+            data = data[n:]
+            if data:
+                parse(self.read())
+
+    # Complete lines, at most limit bytes, everything if final or a
+    # single line fills the buffer. A line longer than limit is returned in
+    # parts (the parser keeps incomplete fragments), "" means an incomplete
+    # line is waiting for more data.
+    def read(self, limit: int=None, final: bool=False) -> str:
+        end = self.end if limit is None else min(self.end, self.start + limit)
+        cut = end
+        if not final:
+            cut = max(self.buf.rfind(s, self.start, end) for s in self.SEPARATORS) + 1
+            if cut <= 0:
+                cut = end if len(self) >= self.cap or end < self.end else self.start
+        text = str(self.view[self.start:cut], "utf8", "replace")
+        self.start = cut
+        if self.start == self.end:
+            self.start = self.end = 0
+        return text
+
+
+
+##### Output parsers #####
+class Parser:
+    # Separators of output fragments, 7z progress uses backspaces
+    SPLIT = re.compile(r"[\r\n\b]+")
+    # Lines which can be dropped from the output buffer (bytes pattern)
+    DROP_STDOUT = None
+    DROP_STDERR = None
+
+    def __init__(self):
+        self.rest = { "stdout": "", "stderr": "" }
+
+    def _fragments(self, stream: str, data: str) -> list:
+        parts = self.SPLIT.split(self.rest[stream] + data)
+        self.rest[stream] = parts.pop()
+        return [ p.strip() for p in parts if p.strip() ]
+
+    def stdout(self, data: str) -> list:
+        return [ ev for line in self._fragments("stdout", data) for ev in self.parse_stdout(line) ]
+
+    def stderr(self, data: str) -> list:
+        return [ ev for line in self._fragments("stderr", data) for ev in self.parse_stderr(line) ]
+
+    # Remaining incomplete fragments at process end
+    def flush(self) -> list:
+        events = []
+        for stream, func in (("stdout", self.stdout), ("stderr", self.stderr)):
+            if self.rest[stream]:
+                events += func("\n")
+        return events
+
+    def parse_stdout(self, line: str) -> list:
+        return [ (TEXT, line) ]
+
+    def parse_stderr(self, line: str) -> list:
+        return [ (TEXT, line) ]
+
+
+
+class SevenZipParser(Parser):
+    PERCENT = re.compile(r"(\d{1,3})%")
+    FILE    = re.compile(r"(\d+) ([A-Z+]) (.+)$")
+    # Percentage and file count only, no file name, or empty
+    DROP_STDERR = re.compile(rb"[ \t]*(\d{1,3}%( +\d+)?[ \t]*)?[\r\n\b]")
+
+    # With -bsp2 the progress indicator goes to stderr
+    def parse_stderr(self, line: str) -> list:
+        events = []
+        m = self.PERCENT.search(line)
+        if m:
+            events.append((PROGRESS, int(m.group(1))))
+        m = self.FILE.search(line)
+        if m:
+            (n, op, file) = m.groups()
+            events.append((FILE, int(n), op, file))
+        if not events:
+            events.append((TEXT, line))
+        return events
+
+
+
+# "1.234 MiB" -> bytes
+def parse_size(value: str, unit: str) -> int:
+    factor = 1024 ** "BKMGTP".find(unit[:1].upper()) if unit[:1].upper() in "KMGTP" else 1
+    return int(float(value) * factor)
+
+
+
+class RcloneParser(Parser):
+    PERCENT = re.compile(r"(\d{1,3})%")
+    INFO    = re.compile(r"(.*INFO  : .+\(.+\))")
+    # Byte counts only, not the "Transferred: 3 / 10, 30%" file count line
+    BYTES   = re.compile(r"Transferred:\s+([\d.]+)\s*([KMGTP]?i?B(?:ytes)?)\s*/\s*([\d.]+)\s*([KMGTP]?i?B(?:ytes)?),")
+    # -P statistics block except "Errors:", or empty
+    DROP_STDOUT = re.compile(rb"[ \t]*((Transferred:|Checks:|Elapsed time:|Transferring:|\* )[^\r\n\b]*)?[\r\n\b]")
+
+    # With -P the progress goes to stdout, -v log messages to stderr
+    def parse_stdout(self, line: str) -> list:
+        events = []
+        m = self.PERCENT.search(line)
+        if m:
+            events.append((PROGRESS, int(m.group(1))))
+        m = self.BYTES.search(line)
+        if m:
+            events.append((BYTES, parse_size(m.group(1), m.group(2)), parse_size(m.group(3), m.group(4))))
+        m = self.INFO.search(line)
+        if m:
+            events.append((TEXT, m.group(1)))
+        return events
+
+
+
+##### Jobs #####
+class Job:
+    def __init__(self, name: str, program: str, args: list, parser: Parser, sizes: bool=False, **info):
+        self.name = name
+        # SIZE events for FILE events
+        self.sizes = sizes
+        self.program = program
+        self.args = args
+        self.parser = parser
+        # source, dest for metrics
+        self.info = info
+
+    def __str__(self):
+        return " ".join([ self.program ] + self.args)
+
+    # The key option (switch) is "-bsp2" go get the progress indicator via stderr
+    @staticmethod
+    def seven_zip(archive: str, sources: list, options: list=None, program: str=None):
+        args = [ "a", "-t7z", "-r", "-spf", "-bso1", "-bse2", "-bsp2" ] + (options or []) + [ archive ] + sources
+        return Job("7z", program or SEVENZIP, args, SevenZipParser(), sizes=True, source=" ".join(sources), dest=archive)
+
+    @staticmethod
+    def seven_zip_test(archive: str, program: str=None):
+        args = [ "t", "-bso1", "-bse2", "-bsp2", archive ]
+        return Job("7z-test", program or SEVENZIP, args, SevenZipParser(), source=archive, dest="")
+
+    # Members listed in listfile, one path per line (UTF-8)
+    @staticmethod
+    def seven_zip_extract(archive: str, dest: str, listfile: str, program: str=None):
+        args = [ "x", "-y", "-scsUTF-8", "-bso1", "-bse2", "-bsp2", f"-o{dest}", archive, "@" + listfile ]
+        return Job("7z-extract", program or SEVENZIP, args, SevenZipParser(), source=archive, dest=dest)
+
+    # -I (--ignore-times) copies unconditionally, without it rclone skips
+    # files already on the remote with same size and time (volume uploads)
+    @staticmethod
+    def rclone(source: str, dest: str, options: list=None, program: str=None, ignore_times: bool=True):
+        args = [ "copy", source, dest, "-v", "-P" ] + ([ "-I" ] if ignore_times else []) + (options or [])
+        return Job("rclone", program or RCLONE, args, RcloneParser(), source=source, dest=dest)
+
+
+
+##### File sizes #####
+def size_event(ev: tuple) -> tuple:
+    try:
+        return (SIZE, ev[1], ev[3], os.path.getsize(ev[3]))
+    except OSError:
+        return None
+
+
+# Callback with SIZE events after FILE events, for runners outside the GUI thread
+def with_sizes(job: Job, callback):
+    if not job.sizes or callback is None:
+        return callback
+    def func(ev: tuple):
+        callback(ev)
+        if ev[0] == FILE:
+            size = size_event(ev)
+            if size:
+                callback(size)
+    return func
+
+
+# Worker thread for the QProcess runner: events are passed through a queue
+# in order, emit() is called from the worker with a SIZE event after each
+# FILE event
+class FileSizer:
+    def __init__(self, emit):
+        self.emit = emit
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name="filesizer", daemon=True)
+        self.thread.start()
+
+    def put(self, ev: tuple):
+        self.queue.put(ev)
+
+    def close(self):
+        self.queue.put(None)
+
+    def _run(self):
+        while (ev := self.queue.get()) is not None:
+            self.emit(ev)
+            if ev[0] == FILE:
+                size = size_event(ev)
+                if size:
+                    self.emit(size)
+
+
+
+def buffers(job: Job, cap: int=BUFFER_CAP) -> tuple:
+    return (OutputBuffer(cap, job.parser.DROP_STDOUT), OutputBuffer(cap, job.parser.DROP_STDERR))
+
+def buffer_event(bufs: tuple) -> tuple:
+    return (BUFFER, max(b.peak for b in bufs), sum(b.dropped for b in bufs))
+
+
+
+##### asyncio runner #####
+async def _read_stream(stream, buf: OutputBuffer, parse, callback):
+    def parse_all(text: str):
+        for ev in parse(text):
+            callback(ev)
+    while True:
+        data = await stream.read(65536)
+        if not data:
+            break
+        buf.feed(data, parse_all)
+        parse_all(buf.read())
+    parse_all(buf.read(final=True))
+
+
+async def run_async(job: Job, callback, cap: int=BUFFER_CAP) -> int:
+    # Not imported at module level, the GUI tools do not need asyncio
+    import asyncio
+    callback = with_sizes(job, callback)
+    proc = await asyncio.create_subprocess_exec(job.program, *job.args,
+                                                stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.PIPE)
+    bufs = buffers(job, cap)
+    await asyncio.gather(_read_stream(proc.stdout, bufs[0], job.parser.stdout, callback),
+                         _read_stream(proc.stderr, bufs[1], job.parser.stderr, callback))
+    code = await proc.wait()
+    for ev in job.parser.flush():
+        callback(ev)
+    callback(buffer_event(bufs))
+    callback((EXIT, code))
+    return code
+
+
+
+##### Blocking runner, for worker threads #####
+def run_blocking(job: Job, callback=None, cancel: threading.Event=None, cap: int=BUFFER_CAP) -> int:
+    callback = with_sizes(job, callback)
+    p = subprocess.Popen([ job.program ] + job.args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    lock = threading.Lock()
+    bufs = buffers(job, cap)
+
+    errors = []
+
+    # Exceptions of the callback must not stop draining the pipe, the child
+    # would block. The first one is raised after the process has ended.
+    def reader(stream, buf, parse):
+        def parse_all(text: str):
+            events = parse(text)
+            if callback and not errors:
+                with lock:
+                    try:
+                        for ev in events:
+                            callback(ev)
+                    except Exception as e:
+                        errors.append(e)
+        while data := stream.read1(65536):
+            buf.feed(data, parse_all)
+            parse_all(buf.read())
+        parse_all(buf.read(final=True))
+
+    threads = [ threading.Thread(target=reader, args=(p.stdout, bufs[0], job.parser.stdout)),
+                threading.Thread(target=reader, args=(p.stderr, bufs[1], job.parser.stderr)) ]
+    for t in threads:
+        t.start()
+    while p.poll() is None:
+        if cancel is not None and cancel.wait(0.1):
+            p.kill()
+            break
+        elif cancel is None:
+            p.wait()
+    code = p.wait()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    if callback:
+        for ev in job.parser.flush():
+            callback(ev)
+        callback(buffer_event(bufs))
+        callback((EXIT, code))
+    return code
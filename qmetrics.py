@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Job history: per-job metrics of 7z and rclone runs, stored as
+#       monthly Parquet files (jobs-YYYY-MM.parquet, series-YYYY-MM.parquet)
+#       Peak output buffer usage and dropped progress lines per job
+#       One Parquet file per job in monthly directories (jobs-YYYY-MM/,
+#       series-YYYY-MM/), written without read-modify-write, so parallel
+#       jobs in threads and processes do not lose rows. Monthly files of
+#       earlier versions are still read. Unique job id per job.
+#       Blocking runner recording the metrics (scheduler tasks, uploads)
+#       Per-job files are compacted into the monthly files on read, for past
+#       months and once the current month has COMPACT_FILES files. jobs()
+#       can read only the latest months.
+#       run_recorded(tool=) also feeds the Prometheus job metrics
+#
+#       Usage:  m = JobMetrics(job)
+#               m.event(ev)                     feed qjobs events
+#               m.finish(code)
+#               MetricsStore().append(m)
+#               MetricsStore().jobs()           DataFrame of all jobs
+#               MetricsStore().jobs(columns, months=2)  latest 2 months only
+#               MetricsStore().compact("2026-09")
+#               code = run_recorded(job, callback, cancel_event)
+#               code = run_recorded(job, callback, cancel_event, tool=NAME)
+
+import os
+import time
+import glob
+import uuid
+import datetime
+
+# Local modules
+from qverbose import verbose, warning, error
+from qcache import cache_dir
+from qjobs import Job, FILE, SIZE, BYTES, BUFFER, EXIT, run_blocking
+from qprometheus import job_observer
+
+# pandas and pyarrow (Parquet) are imported by MetricsStore only, recording
+# the metrics must not slow down the tools
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qmetrics"
+
+
+
+SAMPLE_S = 0.5                  # throughput time series resolution
+COMPACT_FILES = 50              # per-job files of the current month before compaction
+LOCK_STALE_S  = 600             # compaction lock of a crashed process
+# Observing night: date of the evening, i.e. start time minus 12 hours
+NIGHT_OFFSET = datetime.timedelta(hours=12)
+
+JOB_COLUMNS = [ "job_id", "kind", "start", "night", "remote", "source", "dest",
+                "duration", "bytes", "files", "throughput", "exit_code", "buffer_peak", "dropped_lines" ]
+
+
+
+def remote_of(dest: str) -> str:
+    # "iasdata:test-upload/tmp" -> "iasdata", local paths (incl. "C:/...") -> "local"
+    if ":" in dest and len(dest.split(":", 1)[0]) > 1:
+        return dest.split(":", 1)[0]
+    return "local"
+
+
+
+class JobMetrics:
+    def __init__(self, job: Job):
+        self.job = job
+        self.start = time.time()
+        self.t0 = time.perf_counter()
+        self.bytes = 0
+        self.files = 0
+        self.exit_code = None
+        self.duration = 0.0
+        self.buffer_peak = 0
+        self.dropped_lines = 0
+        self.series = [ (0.0, 0) ]       # (seconds, bytes)
+        # Unique for parallel jobs of the same kind in one process
+        self.id = (f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.start))}-{job.name}-"
+                   f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+
+    def event(self, ev: tuple):
+        if ev[0] == BYTES:
+            self.bytes = ev[1]
+        elif ev[0] == FILE:
+            self.files += 1
+        elif ev[0] == SIZE:
+            # 7z reports no sizes, SIZE event from qjobs
+            self.bytes += ev[3]
+        elif ev[0] == BUFFER:
+            (_, self.buffer_peak, self.dropped_lines) = ev
+            return
+        elif ev[0] == EXIT:
+            self.finish(ev[1])
+            return
+        t = time.perf_counter() - self.t0
+        if t - self.series[-1][0] >= SAMPLE_S:
+            self.series.append((t, self.bytes))
+
+    def finish(self, code: int):
+        if self.exit_code is not None:
+            return
+        self.exit_code = code
+        self.duration = time.perf_counter() - self.t0
+        self.series.append((self.duration, self.bytes))
+
+    def job_id(self) -> str:
+        return self.id
+
+    def row(self) -> dict:
+        start = datetime.datetime.fromtimestamp(self.start)
+        return {
+            "job_id":     self.job_id(),
+            "kind":       self.job.name,
+            "start":      start,
+            "night":      (start - NIGHT_OFFSET).date().isoformat(),
+            "remote":     remote_of(self.job.info.get("dest", "")) if self.job.name == "rclone" else "local",
+            "source":     self.job.info.get("source", ""),
+            "dest":       self.job.info.get("dest", ""),
+            "duration":   self.duration,
+            "bytes":      self.bytes,
+            "files":      self.files,
+            "throughput": self.bytes / self.duration if self.duration else 0.0,
+            "exit_code":  self.exit_code if self.exit_code is not None else -1,
+            "buffer_peak": self.buffer_peak,
+            "dropped_lines": self.dropped_lines,
+        }
+
+
+
+class MetricsStore:
+    def __init__(self, dir: str=None):
+        self.dir = dir or cache_dir("metrics")
+
+    def _partition(self, prefix: str, month: str) -> str:
+        return os.path.join(self.dir, f"{prefix}-{month}")
+
+    # New file per job, no lock needed. The temporary file is hidden, Parquet
+    # readers skip it.
+    def append(self, m: JobMetrics):
+        import pandas as pd
+
+        row = m.row()
+        jobs = pd.DataFrame([ row ], columns=JOB_COLUMNS)
+        series = pd.DataFrame(m.series, columns=[ "t", "bytes" ])
+        series.insert(0, "job_id", row["job_id"])
+        month = time.strftime('%Y-%m', time.localtime(m.start))
+        for prefix, df in (("jobs", jobs), ("series", series)):
+            dir = self._partition(prefix, month)
+            os.makedirs(dir, exist_ok=True)
+            tmp = os.path.join(dir, f".{row['job_id']}.tmp")
+            df.to_parquet(tmp, index=False, compression="zstd")
+            os.replace(tmp, os.path.join(dir, f"{row['job_id']}.parquet"))
+        verbose(f"metrics: {row['job_id']} {row['bytes'] / 1e6:.1f} MB, {row['throughput'] / 1e6:.2f} MB/s")
+
+    # Months with partitions, oldest first
+    def _months(self, prefix: str) -> list:
+        months = set()
+        for p in glob.glob(os.path.join(self.dir, f"{prefix}-*")):
+            name = os.path.basename(p)
+            if name.endswith(".parquet") or os.path.isdir(p):
+                months.add(name[len(prefix) + 1:len(prefix) + 8])
+        return sorted(months)
+
+    def _job_files(self, prefix: str, month: str) -> list:
+        return sorted(glob.glob(os.path.join(self._partition(prefix, month), "*.parquet")))
+
+    # Per-job files of the month merged into the monthly file, only the files
+    # read are removed. One compaction at a time (lock file), appends of
+    # other processes go on. Readers drop the duplicates until the removal.
+    def compact(self, month: str):
+        import pandas as pd
+
+        lock = os.path.join(self.dir, ".compact.lock")
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            if time.time() - os.path.getmtime(lock) > LOCK_STALE_S:
+                os.remove(lock)
+            return
+        try:
+            for prefix in ("jobs", "series"):
+                files = self._job_files(prefix, month)
+                if not files:
+                    continue
+                dir = self._partition(prefix, month)
+                monthly = dir + ".parquet"
+                dfs = [ pd.read_parquet(monthly) ] if os.path.exists(monthly) else []
+                df = pd.concat(dfs + [ pd.read_parquet(f) for f in files ], ignore_index=True)
+                tmp = os.path.join(self.dir, f".{prefix}-{month}.tmp")
+                df.to_parquet(tmp, index=False, compression="zstd")
+                os.replace(tmp, monthly)
+                for f in files:
+                    try:
+                        os.remove(f)
+                    except OSError:
+                        pass
+                if month != time.strftime("%Y-%m"):
+                    try:
+                        os.rmdir(dir)
+                    except OSError:
+                        pass
+                verbose(f"metrics: {len(files)} files compacted into {os.path.basename(monthly)}")
+        finally:
+            os.remove(lock)
+
+    # months = number of latest months to read, None = all
+    def jobs(self, columns: list=None, months: int=None):
+        import pandas as pd
+
+        current = time.strftime("%Y-%m")
+        all_months = self._months("jobs")
+        for month in all_months:
+            n = len(self._job_files("jobs", month))
+            if n and (month != current or n >= COMPACT_FILES):
+                try:
+                    self.compact(month)
+                except (OSError, ValueError) as e:
+                    warning(f"metrics: compaction of {month}: {e}")
+        # job_id for dropping rows read twice during a compaction
+        read = None if columns is None else list(dict.fromkeys([ "job_id" ] + columns))
+        dfs = []
+        for month in all_months[-months:] if months else all_months:
+            monthly = self._partition("jobs", month) + ".parquet"
+            if os.path.exists(monthly):
+                dfs.append(pd.read_parquet(monthly, columns=read))
+            for f in self._job_files("jobs", month):
+                try:
+                    dfs.append(pd.read_parquet(f, columns=read))
+                except FileNotFoundError:
+                    # Compacted meanwhile, in the next read
+                    pass
+        if not dfs:
+            return pd.DataFrame(columns=columns or JOB_COLUMNS)
+        df = pd.concat(dfs, ignore_index=True).drop_duplicates("job_id", ignore_index=True)
+        return df if columns is None else df[columns]
+
+    def series(self, job_id: str):
+        import pandas as pd
+
+        month = f"{job_id[:4]}-{job_id[4:6]}"
+        path = os.path.join(self._partition("series", month), f"{job_id}.parquet")
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+        path = self._partition("series", month) + ".parquet"
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=[ "job_id", "t", "bytes" ])
+        return pd.read_parquet(path, filters=[ ("job_id", "==", job_id) ])
+
+
+
+# run_blocking() with metrics recorded to the store, errors of the store
+# (e.g. pandas not installed) are reported only
+def run_recorded(job: Job, callback=None, cancel=None, store: MetricsStore=None, tool: str=None) -> int:
+    m = JobMetrics(job)
+    observe = job_observer(job, tool) if tool else None
+    def func(ev: tuple):
+        m.event(ev)
+        if observe:
+            observe(ev)
+        if callback:
+            callback(ev)
+    code = run_blocking(job, func, cancel)
+    try:
+        (store or MetricsStore()).append(m)
+    except (ImportError, OSError, ValueError) as e:
+        warning(f"metrics {m.job_id()}: {e}")
+    return code
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Horizontal preview strip of thumbnails (qthumbs). Thumbnails are
+#       requested when the view asks for a row's icon, i.e. only for the
+#       visible part of the strip, and delivered via a queued signal.
+#       Disk cache instance shared by all strips of the process (qshared).
+#
+#       Usage:  strip = PreviewStrip()
+#               strip.set_files(paths)
+
+import os
+
+# Local modules
+from qverbose import verbose, warning, error
+from qshared import shared
+
+# PyQt6 must be installed with pip
+from PyQt6.QtCore    import Qt, QAbstractListModel, QModelIndex, QObject, QSize, pyqtSignal
+from PyQt6.QtGui     import QPixmap, QIcon
+from PyQt6.QtWidgets import QListView
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qpreview"
+
+
+
+# qthumbs callbacks come from worker threads
+class ThumbSignals(QObject):
+    ready = pyqtSignal(str, object)
+
+
+
+class PreviewModel(QAbstractListModel):
+    def __init__(self, parent=None, size: int=None):
+        super().__init__(parent)
+        # Deferred, the process pool and numpy/Pillow are not needed before
+        # the first thumbnail
+        from qthumbs import Thumbnailer, ThumbCache, THUMB_SIZE
+        self.size = size or THUMB_SIZE
+        self.signals = ThumbSignals()
+        self.signals.ready.connect(self.thumb_ready)
+        self.thumbs = Thumbnailer(self.signals.ready.emit, self.size, cache=shared("thumbcache", ThumbCache))
+        self.paths = []
+        self.rows = {}                  # path -> row
+        self.icons = {}                 # path -> QIcon, None = failed
+        self.requested = set()
+
+    def set_files(self, paths: list):
+        self.thumbs.cancel()
+        self.beginResetModel()
+        self.paths = list(paths)
+        self.rows = { p: i for i, p in enumerate(self.paths) }
+        # Icons of other nights are reloaded from the disk cache
+        self.icons = { p: self.icons[p] for p in self.paths if p in self.icons }
+        self.requested = set(self.icons)
+        self.endResetModel()
+
+    def shutdown(self):
+        self.thumbs.shutdown()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.paths)
+
+    def data(self, index: QModelIndex, role: int=Qt.ItemDataRole.DisplayRole):
+        path = self.paths[index.row()]
+        if role == Qt.ItemDataRole.DecorationRole:
+            if path not in self.requested:
+                self.requested.add(path)
+                self.thumbs.request(path)
+            return self.icons.get(path)
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.basename(path)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return path
+        return None
+
+    def thumb_ready(self, path: str, thumbfile: str):
+        self.icons[path] = QIcon(QPixmap(thumbfile)) if thumbfile else None
+        row = self.rows.get(path)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [ Qt.ItemDataRole.DecorationRole ])
+
+
+
+class PreviewStrip(QListView):
+    def __init__(self, parent=None, size: int=None):
+        super().__init__(parent)
+        self.model = PreviewModel(self, size)
+        self.setModel(self.model)
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(False)
+        self.setUniformItemSizes(True)
+        self.setMovement(QListView.Movement.Static)
+        self.setHorizontalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        size = self.model.size
+        self.setIconSize(QSize(size, size))
+        self.setGridSize(QSize(size + 16, size + self.fontMetrics().height() + 12))
+        self.setFixedHeight(size + self.fontMetrics().height() + 40)
+
+    def set_files(self, paths: list):
+        self.model.set_files(paths)
+        self.scrollToTop()
+
+    def shutdown(self):
+        self.model.shutdown()
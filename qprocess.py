@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Run qjobs.Job using QProcess, needs QtCore only, works with
+#       QCoreApplication as well as QApplication
+#       Optional latency hook for output handlers (qprometheus)
+#       Output drained into capped buffers (qjobs.OutputBuffer), parsed in
+#       slices of PARSE_BYTES per event loop iteration
+#       Events of 7z add jobs pass a FileSizer thread, which adds SIZE
+#       events, the GUI thread does not stat files
+#
+#       Usage:  p = JobProcess(job)
+#               p.event.connect(handler)        qjobs event tuples
+#               p.state.connect(handler)        state as text
+#               p.finished.connect(handler)     exit code
+#               p.on_latency = func             func(seconds) after each output handler
+#               p.start()
+
+import time
+
+# Local modules
+from qjobs import Job, TEXT, EXIT, BUFFER_CAP, FileSizer, buffers, buffer_event
+
+# PyQt6 must be installed with pip
+from PyQt6.QtCore import QObject, QProcess, QTimer, pyqtSignal
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qprocess"
+
+
+
+# Parsed per handler call, the rest waits in the buffer for the next
+# event loop iteration
+PARSE_BYTES = 64 * 1024
+
+STATES = {
+    QProcess.ProcessState.NotRunning: "Not running",
+    QProcess.ProcessState.Starting: "Starting...",
+    QProcess.ProcessState.Running: "Running...",
+}
+
+
+
+class JobProcess(QObject):
+    event    = pyqtSignal(object)
+    state    = pyqtSignal(str)
+    finished = pyqtSignal(int)
+
+    def __init__(self, job: Job, parent: QObject=None, cap: int=BUFFER_CAP):
+        super().__init__(parent)
+        self.job = job
+        self.buffers = buffers(job, cap)
+        self.parsers = (job.parser.stdout, job.parser.stderr)
+        self.drain_timer = QTimer(self)
+        self.drain_timer.setSingleShot(True)
+        self.drain_timer.setInterval(0)
+        self.drain_timer.timeout.connect(self.drain)
+        self.p = QProcess(self)
+        self.p.readyReadStandardOutput.connect(self.handle_stdout)
+        self.p.readyReadStandardError.connect(self.handle_stderr)
+        self.p.stateChanged.connect(self.handle_state)
+        self.p.finished.connect(self.handle_finished)
+        self.p.errorOccurred.connect(self.handle_error)
+        self.on_latency = None
+        self.sizer = FileSizer(self._deliver) if job.sizes else None
+
+    def start(self):
+        self.p.start(self.job.program, self.job.args)
+
+    def kill(self):
+        self.p.kill()
+
+    def is_running(self) -> bool:
+        return self.p.state() != QProcess.ProcessState.NotRunning
+
+
+    def handle_stdout(self):
+        self._read(0, self.p.readAllStandardOutput())
+
+    def handle_stderr(self):
+        self._read(1, self.p.readAllStandardError())
+
+    # QProcess's buffer is always emptied, parsing is limited to PARSE_BYTES
+    def _read(self, i: int, data):
+        t0 = time.perf_counter()
+        self.buffers[i].feed(data.data(), lambda text: self._emit(i, text))
+        self._parse(i, PARSE_BYTES)
+        if self.on_latency:
+            self.on_latency(time.perf_counter() - t0)
+
+    # Drain again only if something was parsed, an incomplete line waits for
+    # the next readyRead
+    def _parse(self, i: int, limit: int=None, final: bool=False):
+        text = self.buffers[i].read(limit, final)
+        self._emit(i, text)
+        if text and len(self.buffers[i]) and not final:
+            self.drain_timer.start()
+
+    def _emit(self, i: int, text: str):
+        for ev in self.parsers[i](text):
+            self._post(ev)
+
+    # Through the FileSizer thread if the job has SIZE events, order is kept,
+    # the signals are queued to the receivers' thread
+    def _post(self, ev: tuple):
+        if self.sizer:
+            self.sizer.put(ev)
+        else:
+            self._deliver(ev)
+
+    def _deliver(self, ev: tuple):
+        self.event.emit(ev)
+        if ev[0] == EXIT:
+            self.finished.emit(ev[1])
+
+    def drain(self):
+        for i in (0, 1):
+            if len(self.buffers[i]):
+                self._parse(i, PARSE_BYTES)
+
+    def handle_state(self, state: QProcess.ProcessState):
+        self.state.emit(STATES[state])
+
+    def handle_finished(self, code: int, status: QProcess.ExitStatus):
+        self.drain_timer.stop()
+        for i, data in enumerate((self.p.readAllStandardOutput(), self.p.readAllStandardError())):
+            self.buffers[i].feed(data.data(), lambda text: self._emit(i, text))
+            self._parse(i, final=True)
+        for ev in self.job.parser.flush():
+            self._post(ev)
+        self._post(buffer_event(self.buffers))
+        if status == QProcess.ExitStatus.CrashExit and code == 0:
+            code = -1
+        self._post((EXIT, code))
+        if self.sizer:
+            self.sizer.close()
+
+    # Program could not be started, finished() is not emitted in this case
+    def handle_error(self, err: QProcess.ProcessError):
+        if err == QProcess.ProcessError.FailedToStart:
+            self._post((TEXT, f"{self.job.program}: {self.p.errorString()}"))
+            self._post((EXIT, -1))
+            if self.sizer:
+                self.sizer.close()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Prometheus metrics for the node exporter textfile collector:
+#       counters, gauges and histograms, written atomically (tmp file and
+#       rename) by a background thread. Enabled by setting
+#       $QT_WORKBENCH_TEXTFILE_DIR to the collector directory, otherwise
+#       the metrics are only kept in memory. One exporter per process,
+#       tools hosted together (qworkbench) share it, the last stop() ends it.
+#       Throughput per job (job label, removed when the job ends), running
+#       jobs counted atomically, observer() for jobs that are not qjobs
+#       (in-process zip). Self-test: python qprometheus.py --test
+#
+#       Usage:  exporter = start_exporter(NAME)         None if not enabled
+#               callback = job_observer(job, NAME)      feed qjobs events
+#               callback = observer("zip", NAME, zipname)   same events, e.g. (BYTES, n), (EXIT, code)
+#               LATENCY.observe(seconds, tool=NAME)
+#               exporter.add_collector(func)            called before each write
+#               exporter.remove_collector(func)
+#               exporter.stop()
+#               read_textfile(path)                     dict (name, labels) -> value
+
+import os
+import re
+import time
+import argparse
+import tempfile
+import itertools
+import threading
+from collections import deque
+
+# Local modules
+from qverbose import verbose, warning, error
+from qjobs import Job, FILE, SIZE, BYTES, EXIT
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qprometheus"
+
+
+
+INTERVAL_S      = 15            # node exporter scrapes are typically 15-60s
+PREFIX          = "qtwb_"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+THROUGHPUT_S    = 5.0           # window for current throughput
+
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in sorted(labels.items())) + "}"
+
+def _value(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name: str, help: str, registry=None):
+        self.name = PREFIX + name
+        self.help = help
+        self.lock = threading.Lock()
+        self.values = {}                # label tuple -> value
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(sorted(labels.items()))
+
+    def get(self, **labels) -> float:
+        with self.lock:
+            return self.values.get(self._key(labels), 0)
+
+    def remove(self, **labels):
+        with self.lock:
+            self.values.pop(self._key(labels), None)
+
+    def render(self) -> list:
+        lines = [ f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}" ]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(dict(key))} {_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, value: float=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, value: float=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple=LATENCY_BUCKETS, registry=None):
+        super().__init__(name, help, registry)
+        self.buckets = buckets
+
+    # value per label set: [ count per bucket..., +Inf count, sum ]
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            h = self.values.get(key)
+            if h is None:
+                h = self.values[key] = [ 0 ] * (len(self.buckets) + 1) + [ 0.0 ]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    h[i] += 1
+            h[-2] += 1
+            h[-1] += value
+
+    def get(self, **labels) -> float:
+        with self.lock:
+            h = self.values.get(self._key(labels))
+            return h[-2] if h else 0
+
+    def render(self) -> list:
+        lines = [ f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}" ]
+        with self.lock:
+            for key, h in sorted(self.values.items()):
+                labels = dict(key)
+                for b, n in zip(self.buckets + ("+Inf",), h):
+                    lines.append(f"{self.name}_bucket{_labels(dict(labels, le=b))} {n}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {_value(h[-1])}")
+                lines.append(f"{self.name}_count{_labels(labels)} {h[-2]}")
+        return lines
+
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric: Metric):
+        self.metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for m in self.metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+BYTES_TOTAL = Counter("bytes_total", "Bytes processed by 7z/rclone jobs")
+FILES_TOTAL = Counter("files_total", "Files processed by 7z/rclone jobs")
+JOBS_TOTAL  = Counter("jobs_total", "Finished jobs")
+FAILURES    = Counter("job_failures_total", "Jobs finished with non-zero exit code")
+THROUGHPUT  = Gauge("throughput_bytes_per_second", "Current throughput of running jobs")
+RUNNING     = Gauge("jobs_running", "Running jobs")
+QUEUE_DEPTH = Gauge("queue_depth", "Tasks waiting in scheduler, by stage")
+LATENCY     = Histogram("handler_latency_seconds", "Time spent in process output handlers")
+LAST_WRITE  = Gauge("last_write_timestamp_seconds", "Time of last textfile update")
+
+
+
+class TextfileExporter:
+    def __init__(self, path: str, interval: float=INTERVAL_S, registry: Registry=REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self.collectors = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.users = 0
+
+    def add_collector(self, func):
+        self.collectors.append(func)
+
+    def remove_collector(self, func):
+        if func in self.collectors:
+            self.collectors.remove(func)
+
+    def start(self):
+        if self.thread:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name=NAME, daemon=True)
+        self.thread.start()
+        verbose(f"prometheus metrics -> {self.path}, every {self.interval}s")
+
+    def stop(self):
+        self.users -= 1
+        if not self.thread or self.users > 0:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.write()
+
+    def run(self):
+        while True:
+            self.write()
+            if self.stop_event.wait(self.interval):
+                break
+
+    # Atomic for the collector: tmp file in the same directory and rename
+    def write(self):
+        for func in list(self.collectors):
+            try:
+                func()
+            except Exception as e:
+                warning(f"collector {func}: {e}")
+        LAST_WRITE.set(time.time())
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.write(self.registry.render())
+            os.replace(tmp, self.path)
+        except OSError as e:
+            warning(f"{self.path}: {e}")
+
+
+
+_exporter = None
+
+# Exporter writing <dir>/qt_workbench_<tool>.prom, if $QT_WORKBENCH_TEXTFILE_DIR is set.
+# All metrics are in one registry, further tools in the same process get the
+# exporter of the first one.
+def start_exporter(tool: str, dir: str=None) -> TextfileExporter:
+    global _exporter
+    dir = dir or os.environ.get("QT_WORKBENCH_TEXTFILE_DIR")
+    if not dir:
+        return None
+    if _exporter is None or _exporter.users <= 0:
+        _exporter = TextfileExporter(os.path.join(dir, f"qt_workbench_{tool.replace('-', '_')}.prom"))
+        _exporter.start()
+    _exporter.users += 1
+    return _exporter
+
+
+_job_numbers = itertools.count(1)
+
+# Event callback updating the metrics of one job, kind e.g. 7z, rclone, zip
+def observer(kind: str, tool: str, source: str=""):
+    labels = { "tool": tool, "kind": kind }
+    # Parallel jobs of one kind have their own throughput
+    job_labels = dict(labels, job=f"{os.path.basename(source.rstrip('/')) or kind}-{next(_job_numbers)}")
+    state = { "bytes": 0, "window": deque([ (time.perf_counter(), 0) ]), "done": False }
+    RUNNING.inc(1, **labels)
+
+    def callback(ev: tuple):
+        if state["done"]:
+            return
+        if ev[0] == BYTES:
+            delta = ev[1] - state["bytes"]
+            if delta > 0:
+                BYTES_TOTAL.inc(delta, **labels)
+                state["bytes"] = ev[1]
+        elif ev[0] == FILE:
+            FILES_TOTAL.inc(1, **labels)
+        elif ev[0] == SIZE:
+            # 7z reports no sizes, SIZE event from qjobs
+            BYTES_TOTAL.inc(ev[3], **labels)
+            state["bytes"] += ev[3]
+        elif ev[0] == EXIT:
+            state["done"] = True
+            RUNNING.inc(-1, **labels)
+            THROUGHPUT.remove(**job_labels)
+            JOBS_TOTAL.inc(1, **labels)
+            if ev[1] != 0:
+                FAILURES.inc(1, **labels)
+            return
+        now = time.perf_counter()
+        window = state["window"]
+        if now - window[-1][0] < 0.1:
+            return
+        window.append((now, state["bytes"]))
+        while len(window) > 2 and now - window[0][0] > THROUGHPUT_S:
+            window.popleft()
+        dt = now - window[0][0]
+        if dt > 0:
+            THROUGHPUT.set((state["bytes"] - window[0][1]) / dt, **job_labels)
+
+    return callback
+
+
+def job_observer(job: Job, tool: str):
+    return observer(job.name, tool, job.info.get("source", ""))
+
+
+# Metric samples as dict (name, labels) -> value, e.g. for tests
+LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+UNESCAPE = { "\\\\": "\\", '\\"': '"', "\\n": "\n" }
+
+def read_textfile(path: str) -> dict:
+    samples = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, value = line.rsplit(" ", 1)
+            labels = ()
+            if "{" in name:
+                name, rest = name.split("{", 1)
+                labels = tuple((k, re.sub(r"\\.", lambda m: UNESCAPE.get(m.group(0), m.group(0)), v))
+                               for k, v in LABEL_RE.findall(rest))
+            samples[(name, labels)] = float(value)
+    return samples
+
+
+
+# Parallel observed jobs, textfile written and read back
+def selftest():
+    dir = tempfile.mkdtemp(prefix=NAME)
+    exporter = start_exporter("selftest", dir)
+    sources = [ f"/data/up {i}, \"night\".7z" for i in range(8) ]
+    callbacks = [ observer("rclone", "selftest", src) for src in sources ]
+    def run(callback):
+        for n in range(1, 101):
+            callback((BYTES, n * 1000))
+            callback((FILE, n))
+            time.sleep(0.002)
+    threads = [ threading.Thread(target=run, args=(cb,)) for cb in callbacks ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    exporter.write()
+    samples = read_textfile(exporter.path)
+    labels = (("kind", "rclone"), ("tool", "selftest"))
+    assert samples[(PREFIX + "jobs_running", labels)] == len(sources), samples
+    assert samples[(PREFIX + "bytes_total", labels)] == len(sources) * 100000
+    assert samples[(PREFIX + "files_total", labels)] == len(sources) * 100
+    jobs = sorted(dict(l)["job"] for n, l in samples if n == PREFIX + "throughput_bytes_per_second" and dict(l).get("tool") == "selftest")
+    assert len(jobs) == len(sources) and all(j.startswith("up ") for j in jobs), jobs
+    for i, cb in enumerate(callbacks):
+        cb((EXIT, i % 2))
+    exporter.stop()
+    samples = read_textfile(exporter.path)
+    assert samples[(PREFIX + "jobs_running", labels)] == 0
+    assert samples[(PREFIX + "jobs_total", labels)] == len(sources)
+    assert samples[(PREFIX + "job_failures_total", labels)] == len(sources) // 2
+    assert not any(n == PREFIX + "throughput_bytes_per_second" and dict(l).get("tool") == "selftest" for n, l in samples)
+    os.remove(exporter.path)
+    os.rmdir(dir)
+    print(f"{NAME}: self-test ok")
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Prometheus textfile metrics",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-t", "--test", action="store_true", help="self-test: parallel jobs, textfile written and read back")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.enable(args.verbose)
+
+    if args.test:
+        selftest()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Record/replay of 7z and rclone output, synthetic stand-in binaries
+#       and benchmark of the process output handlers
+#       bench --gui records job metrics to a temporary store, not to the
+#       job history used by the dashboard and volume sizing
+#
+#       Usage:  qreplay.py record CAPTURE -- 7z a ...      record stdout/stderr with timestamps
+#               qreplay.py replay CAPTURE [-s SPEED]       fake binary replaying a capture
+#               qreplay.py synth 7z|rclone [-r RATE] [-n COUNT]
+#                                                          fake binary, synthetic output
+#               qreplay.py bench 7z|rclone [-r RATE] [-n COUNT] [-c CAPTURE] [-g]
+#                                                          benchmark handle_stdout/handle_stderr
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+import argparse
+
+# Local modules
+from qverbose import verbose, warning, error
+from qjobs import Job, SevenZipParser, RcloneParser, PROGRESS, FILE, TEXT, EXIT
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qreplay"
+
+
+
+PARSERS = { "7z": SevenZipParser, "rclone": RcloneParser }
+# Timer interval for measuring event loop latency
+LATENCY_MS = 5
+
+
+
+##### Record #####
+def record(capture: str, cmd: list) -> int:
+    t0 = time.perf_counter()
+    chunks = []
+    lock = threading.Lock()
+    p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def reader(stream, fd):
+        while data := os.read(stream.fileno(), 65536):
+            t = time.perf_counter() - t0
+            with lock:
+                chunks.append((t, fd, data))
+            # Pass through, so that recording looks like the real thing
+            out = sys.stdout if fd == 1 else sys.stderr
+            out.buffer.write(data)
+            out.flush()
+
+    threads = [ threading.Thread(target=reader, args=(p.stdout, 1)),
+                threading.Thread(target=reader, args=(p.stderr, 2)) ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    code = p.wait()
+
+    with open(capture, "w") as f:
+        f.write(json.dumps({ "cmd": cmd, "exit": code, "duration": time.perf_counter() - t0 }) + "\n")
+        for t, fd, data in sorted(chunks):
+            f.write(json.dumps({ "t": round(t, 6), "fd": fd,
+                                 "data": data.decode("utf8", "surrogateescape") }) + "\n")
+    verbose(f"recorded {len(chunks)} chunks -> {capture}")
+    return code
+
+
+##### Replay #####
+def replay(capture: str, speed: float=1.0) -> int:
+    with open(capture) as f:
+        header = json.loads(f.readline())
+        t0 = time.perf_counter()
+        for line in f:
+            chunk = json.loads(line)
+            if speed > 0:
+                delay = chunk["t"] / speed - (time.perf_counter() - t0)
+                if delay > 0:
+                    time.sleep(delay)
+            out = sys.stdout if chunk["fd"] == 1 else sys.stderr
+            out.buffer.write(chunk["data"].encode("utf8", "surrogateescape"))
+            out.flush()
+    return header.get("exit", 0)
+
+
+##### Synthetic output #####
+def synth_7z(n: int, count: int) -> tuple:
+    pct = n * 100 // count
+    line = f"{pct:3d}% {n} + testdata/2024-10-12/frame_{n:06d}.fits"
+    return (2, (line + "\b" * len(line)).encode())
+
+def synth_rclone(n: int, count: int) -> tuple:
+    pct = n * 100 // count
+    line = (f"Transferred:   {n} MiB / {count} MiB, {pct}%, 10.000 MiB/s, ETA 1s\n"
+            f"2024/10/12 20:00:00 INFO  : frame_{n:06d}.7z: Copied (new)\n")
+    return (1, line.encode())
+
+SYNTH = { "7z": synth_7z, "rclone": synth_rclone }
+
+
+# Emit count lines at rate lines/s (0 = as fast as possible) in 10ms batches
+def synth(kind: str, rate: float, count: int) -> int:
+    func = SYNTH[kind]
+    batch = max(1, int(rate / 100)) if rate > 0 else 1000
+    t0 = time.perf_counter()
+    outs = { 1: sys.stdout.buffer, 2: sys.stderr.buffer }
+    n = 1
+    while n <= count:
+        data = { 1: [], 2: [] }
+        for i in range(n, min(n + batch, count + 1)):
+            fd, b = func(i, count)
+            data[fd].append(b)
+        for fd, parts in data.items():
+            if parts:
+                outs[fd].write(b"".join(parts))
+                outs[fd].flush()
+        n += batch
+        if rate > 0:
+            delay = (n - 1) / rate - (time.perf_counter() - t0)
+            if delay > 0:
+                time.sleep(delay)
+    outs[2].write(b"\r\n")
+    outs[1].write(b"Everything is Ok\n" if kind == "7z" else b"")
+    outs[1].flush()
+    outs[2].flush()
+    return 0
+
+
+# Job running this script as stand-in binary
+def fake_job(kind: str, rate: float=0, count: int=10000, capture: str=None, speed: float=1.0) -> Job:
+    if capture:
+        args = [ os.path.abspath(__file__), "replay", capture, "-s", str(speed) ]
+    else:
+        args = [ os.path.abspath(__file__), "synth", kind, "-r", str(rate), "-n", str(count) ]
+    return Job(kind, sys.executable, args, PARSERS[kind]())
+
+
+
+##### Benchmark #####
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def bench(kind: str, rate: float, count: int, capture: str, speed: float, gui: bool) -> dict:
+    # PyQt6 must be installed with pip
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    import qprocess
+
+    # Measure time spent in the output handlers
+    stats = { "calls": 0, "handler_s": 0.0, "handler_max_s": 0.0, "events": {}, "latency": [] }
+
+    class TimedJobProcess(qprocess.JobProcess):
+        def _timed(self, func):
+            t = time.perf_counter()
+            func()
+            dt = time.perf_counter() - t
+            stats["calls"] += 1
+            stats["handler_s"] += dt
+            stats["handler_max_s"] = max(stats["handler_max_s"], dt)
+
+        def handle_stdout(self):
+            self._timed(super().handle_stdout)
+
+        def handle_stderr(self):
+            self._timed(super().handle_stderr)
+
+    def count_event(ev: tuple):
+        stats["events"][ev[0]] = stats["events"].get(ev[0], 0) + 1
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    job = fake_job(kind, rate, count, capture, speed)
+
+    # Event loop latency: lateness of a high-frequency timer
+    expected = [ 0.0 ]
+    def tick():
+        now = time.perf_counter()
+        stats["latency"].append(max(0.0, now - expected[0]))
+        expected[0] = now + LATENCY_MS / 1000
+    timer = QTimer()
+    timer.setInterval(LATENCY_MS)
+    timer.timeout.connect(tick)
+
+    t0 = time.perf_counter()
+    if gui:
+        # Full tool window, including print_text() and progress bar updates
+        import importlib.util
+        tool = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"qrun-{kind}.py")
+        spec = importlib.util.spec_from_file_location(f"qrun_{kind}", tool)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        mod.JobProcess = TimedJobProcess
+        # Replayed job must not end up in the job history or the tool's textfile
+        from qmetrics import MetricsStore
+        from qprometheus import start_exporter
+        tmp = tempfile.mkdtemp(prefix="qreplay-")
+        mod.MetricsStore = lambda: MetricsStore(tmp)
+        if os.environ.get("QT_WORKBENCH_TEXTFILE_DIR"):
+            mod.start_exporter = lambda tool: start_exporter(tool, tmp)
+        window = mod.MainWindow()
+        window.make_job = lambda: job
+        window.show()
+        window.start()
+        window.p.event.connect(count_event)
+        window.p.finished.connect(lambda code: app.exit(code))
+    else:
+        p = TimedJobProcess(job)
+        p.event.connect(count_event)
+        p.finished.connect(lambda code: app.exit(code))
+        p.start()
+    expected[0] = time.perf_counter() + LATENCY_MS / 1000
+    timer.start()
+    app.exec()
+    timer.stop()
+    elapsed = time.perf_counter() - t0
+    if gui:
+        # Metrics are written in a thread started by cleanup()
+        for t in threading.enumerate():
+            if t is not threading.current_thread() and not t.daemon:
+                t.join()
+        if window.exporter:
+            window.exporter.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    events = stats["events"]
+    # 7z: one FILE event per line, rclone: one TEXT event per INFO line
+    handled = events.get(FILE, 0) if kind == "7z" else events.get(TEXT, 0)
+    expected_lines = count if not capture else None
+    result = {
+        "kind":          kind,
+        "rate":          rate,
+        "lines":         expected_lines,
+        "handled":       handled,
+        "dropped":       expected_lines - handled if expected_lines is not None else None,
+        "elapsed_s":     round(elapsed, 3),
+        "lines_per_s":   round(handled / elapsed, 1) if elapsed else 0,
+        "handler_calls": stats["calls"],
+        "handler_s":     round(stats["handler_s"], 3),
+        "handler_max_ms": round(stats["handler_max_s"] * 1000, 2),
+        "latency_p50_ms": round(percentile(stats["latency"], 50) * 1000, 2),
+        "latency_p99_ms": round(percentile(stats["latency"], 99) * 1000, 2),
+        "latency_max_ms": round(max(stats["latency"], default=0) * 1000, 2),
+        "gui":           gui,
+    }
+    return result
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Record/replay 7z and rclone output, benchmark output handlers",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    sub = arg.add_subparsers(dest="command", required=True)
+
+    a = sub.add_parser("record", help="run command and record output")
+    a.add_argument("capture", help="capture file (JSON lines)")
+    a.add_argument("cmd", nargs=argparse.REMAINDER, help="command and arguments")
+
+    a = sub.add_parser("replay", help="replay recorded output")
+    a.add_argument("capture", help="capture file (JSON lines)")
+    a.add_argument("-s", "--speed", type=float, default=1.0, help="speed factor, 0 = no delays")
+
+    a = sub.add_parser("synth", help="generate synthetic output")
+    a.add_argument("kind", choices=SYNTH.keys(), help="output format")
+    a.add_argument("-r", "--rate", type=float, default=1000, help="lines/s, 0 = unlimited (default 1000)")
+    a.add_argument("-n", "--count", type=int, default=10000, help="number of lines (default 10000)")
+
+    a = sub.add_parser("bench", help="benchmark output handlers")
+    a.add_argument("kind", choices=SYNTH.keys(), help="output format")
+    a.add_argument("-r", "--rate", type=float, nargs="+", default=[ 1000, 10000, 0 ],
+                   help="lines/s, 0 = unlimited (default 1000 10000 0)")
+    a.add_argument("-n", "--count", type=int, default=20000, help="number of lines (default 20000)")
+    a.add_argument("-c", "--capture", help="replay capture instead of synthetic output")
+    a.add_argument("-s", "--speed", type=float, default=1.0, help="replay speed factor")
+    a.add_argument("-g", "--gui", action="store_true", help="run with the full qrun-* MainWindow")
+    a.add_argument("-o", "--offscreen", action="store_true", help="use Qt offscreen platform")
+    a.add_argument("-j", "--json", action="store_true", help="JSON output")
+
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose)
+
+    if args.command == "record":
+        cmd = args.cmd[1:] if args.cmd[:1] == [ "--" ] else args.cmd
+        if not cmd:
+            arg.error("command required")
+        sys.exit(record(args.capture, cmd))
+    elif args.command == "replay":
+        sys.exit(replay(args.capture, args.speed))
+    elif args.command == "synth":
+        sys.exit(synth(args.kind, args.rate, args.count))
+    elif args.command == "bench":
+        if args.offscreen:
+            os.environ["QT_QPA_PLATFORM"] = "offscreen"
+        rates = [ 0 ] if args.capture else args.rate
+        for rate in rates:
+            r = bench(args.kind, rate, args.count, args.capture, args.speed, args.gui)
+            if args.json:
+                print(json.dumps(r))
+            else:
+                print(" ".join(f"{k}={v}" for k, v in r.items()))
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Selective restore of a night (date, subdir, targets) from the
+#       archive member index (qarchindex). The plan groups the matching
+#       members by the volumes holding their solid block. Each needed volume
+#       is fetched by its own rclone job ("io" lane), the last volume with
+#       the 7z header first; each group is extracted (7z x with member list,
+#       "cpu" lane) as soon as its volumes have arrived, while the others
+#       are still downloading. Volumes not needed are sparse placeholders.
+#       Zip members are fetched as byte ranges. End-to-end throughput is
+#       reported.
+#       Volume 0 (signature header) is always fetched. Fetched volumes are
+#       never replaced while 7z runs: each extraction gets its own directory
+#       of links to the fetched volumes and placeholders for the others
+#       (qarchindex.volume_set()), the cache holds complete downloads only.
+#       The cache is removed after a complete restore (cleanup()).
+#
+#       Usage:  plan = restore_plan(ArchiveIndex(), "2024-10-12", targets=[ "M 31" ])
+#               r = Restore(plan, "restore", callback=print)
+#               r.run()                                 own scheduler, blocking
+#               r.add_to(shared_scheduler())            GUI, r.done() / r.report()
+#               r.stats()                               dict with bytes, seconds, throughput
+#               r.cleanup()                             remove fetched volumes
+#               python qrestore.py -n 2024-10-12 -t "M 31"     show plan only
+
+import os
+import re
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from collections import namedtuple
+
+# Local modules
+from qverbose import verbose, warning, error
+from qcache import cache_dir
+from qcatalog import parse_path
+from qjobs import Job
+from qarchindex import ArchiveIndex, Location, volume_name, cached_archive, volume_set
+from qshared import shared
+from qscheduler import Scheduler, Task, job_task, FINAL, DONE
+from qvolumes import TRANSFERS
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qrestore"
+
+
+
+MB = 1000 * 1000
+
+# Members of one archive extracted together, data in volumes
+Group = namedtuple("Group", "archive volumes members")
+
+
+
+##### Plan #####
+# Members of the night, dict archive -> list of Location
+def restore_plan(index: ArchiveIndex, date: str, subdir: str=None, targets: list=None) -> dict:
+    plan = {}
+    for loc in index.locate(f"*{date}*/*", limit=-1):
+        parsed = parse_path(loc.path)
+        if parsed is None or parsed[0] != date:
+            continue
+        if subdir is not None and parsed[1] != subdir:
+            continue
+        if targets and parsed[2] not in targets:
+            continue
+        plan.setdefault(loc.archive, []).append(loc)
+    return plan
+
+
+# Volumes to fetch: blocks of the members, the first volume (signature
+# header) and the last volume (7z end header)
+def needed_volumes(loc: Location) -> frozenset:
+    if loc.format != "7z" or loc.volumes <= 1:
+        return frozenset([ 0 ])
+    return frozenset(range(loc.volume, loc.last_volume + 1)) | { 0, loc.volumes - 1 }
+
+
+def groups(plan: dict) -> list:
+    result = []
+    for archive, members in sorted(plan.items()):
+        by_volumes = {}
+        for loc in members:
+            by_volumes.setdefault(needed_volumes(loc), []).append(loc)
+        for vols, locs in sorted(by_volumes.items(), key=lambda kv: min(kv[0])):
+            result.append(Group(archive, vols, locs))
+    return result
+
+
+def is_local(loc: Location) -> bool:
+    return all(os.path.exists(volume_name(loc.archive, v, loc.volumes)) for v in range(loc.volumes))
+
+
+def plan_summary(plan: dict) -> str:
+    lines = []
+    for archive, members in sorted(plan.items()):
+        loc = members[0]
+        vols = set().union(*(needed_volumes(m) for m in members))
+        where = "local" if is_local(loc) else (loc.remote or "missing")
+        lines.append(f"{archive}: {len(members)} members, {sum(m.size for m in members) / MB:.1f} MB, "
+                     f"volumes {len(vols)}/{loc.volumes}, {where}")
+    return "\n".join(lines)
+
+
+
+##### Restore #####
+class Restore:
+    def __init__(self, plan: dict, dest: str, callback=None, transfers: int=TRANSFERS,
+                 program: str=None, rclone: str=None):
+        self.plan = plan
+        self.dest = os.path.abspath(dest)
+        self.callback = callback or (lambda msg: None)
+        self.transfers = transfers
+        self.program = program
+        self.rclone = rclone
+        self.lock = threading.Lock()
+        self.tasks = []
+        self.caches = set()             # cache directories of fetched archives
+        self.fetched = 0                # bytes downloaded
+        self.restored = 0               # bytes of extracted members
+        self.files = 0
+        self.t0 = None
+        self.t_end = None
+
+    def _count(self, fetched: int=0, restored: int=0, files: int=0):
+        with self.lock:
+            self.fetched += fetched
+            self.restored += restored
+            self.files += files
+            self.t_end = time.perf_counter()
+
+
+    # Tasks for a scheduler with "io" and "cpu" lanes
+    def make_tasks(self) -> list:
+        tasks = []
+        fetch = {}                      # (archive, volume) -> Task
+        for group in groups(self.plan):
+            loc = group.members[0]
+            if loc.format == "zip" and not is_local(loc):
+                index = shared("archindex", ArchiveIndex)
+                for m in group.members:
+                    tasks.append(Task(f"zip {m.path}", self._zip_range_func(index, m), lane="io", stage="extract"))
+                continue
+            if is_local(loc):
+                archive, deps = loc.archive, []
+            else:
+                if not loc.remote:
+                    warning(f"{loc.archive}: not available locally and no remote recorded")
+                    continue
+                archive = self._prepare(loc)
+                # Header volumes first, then in order
+                for v in sorted(group.volumes, key=lambda v: (v not in (0, loc.volumes - 1), v)):
+                    if (loc.archive, v) not in fetch:
+                        fetch[(loc.archive, v)] = Task(f"fetch {os.path.basename(volume_name(archive, v, loc.volumes))}",
+                                                       self._fetch_func(loc, archive, v), lane="io", stage="fetch")
+                        tasks.append(fetch[(loc.archive, v)])
+                deps = [ fetch[(loc.archive, v)] for v in group.volumes ]
+            tasks.append(Task(f"extract {os.path.basename(loc.archive)} {len(group.members)} files",
+                              self._extract_func(group, archive), deps, lane="cpu", stage="extract"))
+        self.tasks = tasks
+        return tasks
+
+    # Run with own scheduler, blocking
+    def run(self, cpu: int=1) -> bool:
+        scheduler = Scheduler({ "cpu": cpu, "io": self.transfers })
+        self.add_to(scheduler)
+        scheduler.start()
+        scheduler.wait()
+        scheduler.shutdown()
+        if not self.ok():
+            return False
+        self.cleanup()
+        return True
+
+    def add_to(self, scheduler: Scheduler) -> list:
+        self.t0 = time.perf_counter()
+        for task in self.make_tasks():
+            scheduler.add(task)
+        return self.tasks
+
+    def cancel(self, scheduler: Scheduler):
+        scheduler.cancel(self.tasks)
+
+    def done(self) -> bool:
+        return all(t.state in FINAL for t in self.tasks)
+
+    def ok(self) -> bool:
+        return all(t.state == DONE for t in self.tasks)
+
+    # Fetched volumes, kept after a failed restore for the next attempt
+    def cleanup(self):
+        for cache in self.caches:
+            shutil.rmtree(cache, ignore_errors=True)
+            verbose(f"{cache}: removed")
+        self.caches.clear()
+
+    # Throughput from start to the last finished fetch/extraction
+    def stats(self) -> dict:
+        t = ((self.t_end or time.perf_counter()) - self.t0) if self.t0 else 0.0
+        with self.lock:
+            return { "files": self.files, "restored": self.restored, "fetched": self.fetched,
+                     "seconds": round(t, 3),
+                     "throughput": round(self.restored / t, 1) if t > 0 else 0.0,
+                     "fetch_throughput": round(self.fetched / t, 1) if t > 0 else 0.0,
+                     "failed": sum(1 for task in self.tasks if task.state != DONE and task.state in FINAL) }
+
+    def report(self) -> str:
+        s = self.stats()
+        return (f"restored {s['files']} files, {s['restored'] / MB:.1f} MB in {s['seconds']:.1f}s, "
+                f"{s['throughput'] / MB:.1f} MB/s end-to-end, fetched {s['fetched'] / MB:.1f} MB "
+                f"({s['fetch_throughput'] / MB:.1f} MB/s)"
+                + (f", {s['failed']} tasks failed" if s["failed"] else ""))
+
+
+    # Archive in the restore cache (qarchindex), fetched volumes are moved there
+    def _prepare(self, loc: Location) -> str:
+        self.caches.add(cache_dir("restore", os.path.basename(loc.archive)))
+        return cached_archive(loc.archive)
+
+    # Worker threads
+    def _fetch_func(self, loc: Location, archive: str, v: int):
+        def func(task: Task):
+            path = volume_name(archive, v, loc.volumes)
+            name = os.path.basename(path)
+            if os.path.exists(path):
+                self.callback(f"{name}: already fetched")
+                return
+            incoming = tempfile.mkdtemp(prefix="incoming-", dir=os.path.dirname(os.path.dirname(path)))
+            try:
+                include = re.sub(r"([\\*?\[\]{}])", r"\\\1", name)
+                job = Job.rclone(loc.remote, incoming, [ "--include", include ], self.rclone)
+                job_task(job, tool=NAME)(task)
+                # Complete volumes only, the name is not in use by any extraction
+                os.replace(os.path.join(incoming, name), path)
+            finally:
+                shutil.rmtree(incoming, ignore_errors=True)
+            size = os.path.getsize(path)
+            self._count(fetched=size)
+            self.callback(f"{name}: fetched {size / MB:.1f} MB")
+        return func
+
+    def _extract_func(self, group: Group, archive: str):
+        def func(task: Task):
+            loc = group.members[0]
+            os.makedirs(self.dest, exist_ok=True)
+            if loc.format == "zip":
+                import zipfile
+                with zipfile.ZipFile(archive) as z:
+                    for m in group.members:
+                        z.extract(m.path, self.dest)
+            else:
+                fd, listfile = tempfile.mkstemp(prefix=NAME, suffix=".txt")
+                volumes = archive
+                if archive != loc.archive:
+                    dir = tempfile.mkdtemp(prefix="extract-", dir=os.path.dirname(os.path.dirname(archive)))
+                    volumes = volume_set(archive, loc.volumes, loc.volume_size, dir)
+                try:
+                    with os.fdopen(fd, "w", encoding="utf8") as f:
+                        f.write("\n".join(m.path for m in group.members) + "\n")
+                    first = volume_name(volumes, 0, loc.volumes)
+                    job_task(Job.seven_zip_extract(first, self.dest, listfile, self.program), tool=NAME)(task)
+                finally:
+                    os.remove(listfile)
+                    if volumes != archive:
+                        shutil.rmtree(os.path.dirname(volumes), ignore_errors=True)
+            size = sum(m.size for m in group.members)
+            self._count(restored=size, files=len(group.members))
+            self.callback(f"{os.path.basename(loc.archive)}: extracted {len(group.members)} files, {size / MB:.1f} MB")
+        return func
+
+    def _zip_range_func(self, index: ArchiveIndex, loc: Location):
+        def func(task: Task):
+            index.extract(loc, self.dest, self.program, self.rclone)
+            self._count(fetched=loc.csize or 0, restored=loc.size, files=1)
+        return func
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Restore a night from archives, fetching only the needed volumes",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-n", "--dry-run", action="store_true", help="show plan only")
+    arg.add_argument("-s", "--subdir", help="subdirectory, e.g. _asteroids")
+    arg.add_argument("-t", "--target", action="append", help="target (repeatable)")
+    arg.add_argument("-o", "--output", default="restore", help="destination directory (default restore)")
+    arg.add_argument("-T", "--transfers", type=int, default=TRANSFERS, help=f"parallel volume downloads (default {TRANSFERS})")
+    arg.add_argument("-p", "--program", help="path of 7z executable")
+    arg.add_argument("-r", "--rclone", help="path of rclone executable")
+    arg.add_argument("date", help="date YYYY-MM-DD")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose)
+
+    index = ArchiveIndex()
+    plan = restore_plan(index, args.date, args.subdir, args.target)
+    index.close()
+    if not plan:
+        error(f"no archived files for {args.date}")
+    print(plan_summary(plan))
+    if args.dry_run:
+        return
+    r = Restore(plan, args.output, callback=print, transfers=args.transfers,
+                program=args.program, rclone=args.rclone)
+    ok = r.run()
+    print(r.report())
+    if not ok:
+        error("restore incomplete")
+
+
+
+if __name__ == "__main__":
+    main()
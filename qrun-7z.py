@@ -18,19 +18,50 @@
 # ChangeLog
 # Version 0.0 / 2024-10-12
 #       New test script, run 7z.exe
+# Version 0.1 / 2026-10-19
+#       Process handling and output parsing moved to qjobs/qprocess,
+#       shared with headless qrun-cli
+#       icecream imported only when debug is enabled (qdebug), startup
+#       timing with --startup-profile (qstartup)
+#       Job created by make_job(), replaced by qreplay benchmark
+#       Optional event loop stall watchdog (qwatchdog)
+#       Per-file events in sortable/filterable table (qfiletable) instead
+#       of log lines
+#       Job metrics recorded to history (qmetrics), dashboard (qdashboard)
+#       Multi-volume archive, volume size chosen for the upload (qvolumes)
+#       Prometheus textfile metrics, if $QT_WORKBENCH_TEXTFILE_DIR is set
+#       Peak output buffer usage reported per job
+#       Archive members recorded in archive index (qarchindex)
+#       Compression settings from benchmark profile (qcompress)
+#       Job waits for a slot in the shared scheduler's "cpu" lane
+#       (qscheduler), limits parallel jobs of all tools in one process
+#       (qworkbench). Shared objects are closed at exit (qshared).
+
+# Startup timing, must be imported first
+from qstartup import startup
 
 import sys
-import re
+import threading
 
 # The following libs must be installed with pip
-from icecream import ic
-ic.disable()
 
 # Local modules
 from qverbose import verbose, warning, error
+from qwatchdog import StallWatchdog
+from qfiletable import FileTable
+from qdebug import ic
+from qjobs import Job, PROGRESS, FILE, SIZE, TEXT
+from qprocess import JobProcess
+from qmetrics import JobMetrics, MetricsStore
+from qprometheus import start_exporter, job_observer, LATENCY
+from qarchindex import record_archive
+from qvolumes import volume_options, tree_size
+from qcompress import profile_options, limit_threads
+from qscheduler import shared_scheduler, lane_threads, SlotTask, FINAL
+from qshared import close_shared
 
 # PyQt6 must be installed with pip
-from PyQt6.QtCore    import QProcess
+from PyQt6.QtCore    import pyqtSignal
 from PyQt6.QtGui     import QAction, QCloseEvent
 from PyQt6.QtWidgets import (
     QApplication,
@@ -39,32 +70,38 @@ from PyQt6.QtWidgets import (
     QProgressBar,
     QPushButton,
     QVBoxLayout,
+    QTabWidget,
     QWidget,
     QFileDialog,
     QMessageBox
 )
 
 
-VERSION = "0.0 / 2024-10-12"
+VERSION = "0.1 / 2026-10-19"
 AUTHOR  = "Martin Junius"
 NAME    = "qrun-7z"
 
 
 
-STATES = {
-    QProcess.ProcessState.NotRunning: "Not running",
-    QProcess.ProcessState.Starting: "Starting...",
-    QProcess.ProcessState.Running: "Running...",
-}
+# Volume size is chosen for upload to this destination
+UPLOAD_DEST = "iasdata:test-upload/tmp"
 
 
 
 class MainWindow(QMainWindow):
+    # Emitted by scheduler worker thread, queued to GUI thread
+    slot_granted = pyqtSignal(object)
+    slot_stop    = pyqtSignal()
+
     def __init__(self):
         super().__init__()
 
         # Hold process reference
         self.p = None
+        # Scheduler slot for job
+        self.slot = None
+        self.slot_granted.connect(self.start)
+        self.slot_stop.connect(self.stop)
 
         # Size
         self.setMinimumSize(500, 200) 
@@ -73,9 +110,13 @@ class MainWindow(QMainWindow):
         # Central widget
         layout = QVBoxLayout()
 
+        tabs = QTabWidget()
         self.text = QPlainTextEdit()
         self.text.setReadOnly(True)
-        layout.addWidget(self.text)
+        tabs.addTab(self.text, "Log")
+        self.files = FileTable()
+        tabs.addTab(self.files, "Files")
+        layout.addWidget(tabs)
 
         verbose.set_widget(self.text)
 
@@ -84,7 +125,7 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.progress)
 
         btn_run = QPushButton("Execute 7z")
-        btn_run.clicked.connect(self.start)
+        btn_run.clicked.connect(self.queue_start)
         layout.addWidget(btn_run)
 
         w = QWidget()
@@ -120,6 +161,12 @@ class MainWindow(QMainWindow):
         menu_debug = QAction("Debug", self, checkable=True)
         menu_debug.triggered.connect(self.toggle_debug)
         menu_options.addAction(menu_debug)
+        self.watchdog = StallWatchdog(self)
+        self.exporter = start_exporter(NAME)
+        self.watchdog.add_actions(menu_options)
+        menu_history = QAction("Job history...", self)
+        menu_history.triggered.connect(self.show_history)
+        menu_options.addAction(menu_history)
 
         # Status bar
         self.statusBar().setEnabled(True)
@@ -131,6 +178,11 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event: QCloseEvent):
         warning("quit?")
         if self.yes_no_dialog("Really quit?"):
+            self.watchdog.stop()
+            if self.slot:
+                shared_scheduler().cancel([ self.slot ])
+            if self.exporter:
+                self.exporter.stop()
             event.accept()
         else:
             event.ignore()
@@ -155,6 +207,13 @@ class MainWindow(QMainWindow):
             verbose(f"select dir {directory}")
 
 
+    def show_history(self):
+        # Deferred import, pandas/matplotlib are only needed here
+        from qdashboard import DashboardWindow
+        self.dashboard = DashboardWindow(self)
+        self.dashboard.show()
+
+
     def toggle_verbose(self):
         option_v = self.sender().isChecked()
         self.print_status("Verbose", "enabled" if option_v else "disabled")
@@ -194,71 +253,103 @@ class MainWindow(QMainWindow):
 
 
     ##### Run external program using QProcess #####
-    def start(self):
-        if self.p is not None:
+    # Started when the shared scheduler grants a slot, qreplay calls start()
+    # directly
+    def queue_start(self):
+        # Slot cancelled before it was granted
+        if self.slot is not None and self.p is None and self.slot.state in FINAL:
+            self.slot = None
+        if self.p is not None or self.slot is not None:
             return
+        self.slot = shared_scheduler().add(SlotTask(NAME, self.prepare_job, self.slot_stop.emit,
+                                                    lane="cpu", stage="archive"))
+        self.print_status("Waiting for CPU slot ...")
 
-        self.p = QProcess()
-        self.p.readyReadStandardOutput.connect(self.handle_stdout)
-        self.p.readyReadStandardError.connect(self.handle_stderr)
-        self.p.stateChanged.connect(self.handle_state)
-        self.p.finished.connect(self.cleanup)
+    # Worker thread of the slot, volume options need rclone config, job
+    # history and the source tree size
+    def prepare_job(self):
+        self.slot_granted.emit(self.make_job())
 
-        # Run 7z.exe
-        # The key option (switch) is "-bsp2" go get the progress indicator via stderr
-        self.p.start("C:/Program Files/7-Zip/7z.exe",
-                     [ "a", "-t7z", "-r", "-spf", "-bso1", "-bse2", "-bsp2", "tmp/test.7z", "testdata" ]
-                    )
-        self.progress.setValue(0)
+    def stop(self):
+        if self.p is not None:
+            self.p.kill()
 
+    def start(self, job: Job=None):
+        if self.p is not None:
+            return
 
-    def handle_stderr(self):
-        result = bytes(self.p.readAllStandardError()).decode("utf8")
-        ic("stderr")
-        ic(result)
+        if job is None:
+            job = self.make_job()
+        self.metrics = JobMetrics(job)
+        self.p = JobProcess(job)
+        self.p.event.connect(self.metrics.event)
+        if self.exporter:
+            self.p.event.connect(job_observer(job, NAME))
+            self.p.on_latency = lambda t: LATENCY.observe(t, tool=NAME)
+        self.p.event.connect(self.handle_event)
+        self.p.state.connect(self.handle_state)
+        self.p.finished.connect(self.cleanup)
+        self.files.model.clear()
+        self.p.start()
+        self.progress.setValue(0)
 
-        m = re.search(r"(\d{1,3})%", result)
-        ic(m)
-        if m:
-            self.progress.setValue(int(m.group(1)))
 
-        m = re.search(r"(\d+) ([A-Z+]) (.+)$", result)
-        ic(m)
-        if m:
-            ic(m.groups())
-            (n, op, file) = m.groups()
-            self.print_text(f"#{int(n):03d} op={op} file={file}")
+    # Overridden by qreplay benchmark, not called in the GUI thread
+    def make_job(self) -> Job:
+        sources = [ "testdata" ]
+        # 7z threads limited to the share of one cpu slot
+        options = limit_threads(profile_options(), lane_threads()) + volume_options(tree_size(sources), UPLOAD_DEST)
+        return Job.seven_zip("tmp/test.7z", sources, options)
 
 
-    def handle_stdout(self):
-        result = bytes(self.p.readAllStandardOutput()).decode("utf8")
-        ic("stdout")
-        ic(result)
-        for line in result.splitlines():
-            line = line.strip()
-            if line:
-                self.print_text(line)
+    def handle_event(self, ev: tuple):
+        ic(ev)
+        if ev[0] == PROGRESS:
+            self.progress.setValue(ev[1])
+        elif ev[0] == FILE:
+            (_, n, op, file) = ev
+            self.files.model.add(n, op, file)
+        elif ev[0] == SIZE:
+            self.files.model.set_size(ev[2], ev[3])
+        elif ev[0] == TEXT:
+            self.print_text(ev[1])
 
 
-    def handle_state(self, state: QProcess.ProcessState):
+    def handle_state(self, state: str):
         ic(state)
-        self.statusBar().showMessage(STATES[state])
-
-
-    def cleanup(self):
+        self.statusBar().showMessage(state)
+
+
+    def cleanup(self, code: int):
+        verbose(f"exit code {code}")
+        verbose(f"output buffer peak {self.metrics.buffer_peak / 1024:.0f} KiB, "
+                f"{self.metrics.dropped_lines} progress lines dropped")
+        # Writing Parquet needs pandas, keep it off the GUI thread
+        threading.Thread(target=MetricsStore().append, args=(self.metrics,)).start()
+        if code == 0 and self.p.job.info.get("dest"):
+            threading.Thread(target=record_archive, args=(self.p.job.info["dest"],)).start()
+        self.files.model.flush()
+        verbose(f"{self.files.model.rowCount()} files")
         self.progress.setValue(100)
         self.p = None
+        if self.slot:
+            self.slot.release(code)
+            self.slot = None
 
 
 
 def main():
+    startup.mark("main")
     verbose.set_prog(NAME)
     verbose.enable()
 
     app = QApplication(sys.argv)
     window = MainWindow()
+    startup.mark("window")
+    startup.watch(app, window)
     window.show()
     app.exec()
+    close_shared()
 
 
 
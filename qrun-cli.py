@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Headless version of qrun-7z/qrun-rclone using the same job engine,
+#       console progress or JSON lines output, warnings to stderr with -j
+#       Job metrics recorded to history (qmetrics)
+#       7z multi-volume archive for upload (-V), rclone upload of all
+#       volumes with parallel transfers
+#       Prometheus textfile metrics, if $QT_WORKBENCH_TEXTFILE_DIR is set
+#       Peak output buffer usage reported per job
+#       7z compression settings from benchmark profile (qcompress), -D for
+#       7z defaults
+#       Selective restore of a night (qrestore), only the needed volumes
+#       are fetched, extraction starts while the others still download,
+#       -p is the 7z program, -r the rclone program of the restore
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# Local modules
+from qverbose import verbose, warning, error
+from qjobs import Job, run_async, event_dict, PROGRESS, FILE, TEXT, BUFFER, EXIT
+from qmetrics import JobMetrics, MetricsStore
+from qvolumes import volume_options, tree_size, rclone_volumes, TRANSFERS
+from qcompress import profile_options
+from qprometheus import start_exporter, job_observer
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qrun-cli"
+
+
+
+class Console:
+    def __init__(self, json_output: bool=False):
+        self.json = json_output
+        self.files = 0
+        self.percent = -1
+        self.buffer = (0, 0)
+        self.t0 = time.perf_counter()
+
+    def __call__(self, ev: tuple):
+        if ev[0] == FILE:
+            self.files += 1
+        elif ev[0] == BUFFER:
+            self.buffer = ev[1:]
+        if self.json:
+            print(json.dumps(event_dict(ev)), flush=True)
+            return
+        if ev[0] == PROGRESS:
+            if ev[1] != self.percent:
+                self.percent = ev[1]
+                bar = "#" * (self.percent // 5)
+                print(f"\r[{bar:20s}] {self.percent:3d}%", end="", file=sys.stderr, flush=True)
+        elif ev[0] == FILE:
+            (_, n, op, file) = ev
+            verbose(f"#{n:03d} op={op} file={file}")
+        elif ev[0] == TEXT:
+            verbose(ev[1])
+        elif ev[0] == EXIT:
+            if self.percent >= 0:
+                print(file=sys.stderr)
+
+    def summary(self, code: int):
+        s = { "event": "summary", "code": code, "files": self.files,
+              "seconds": round(time.perf_counter() - self.t0, 3),
+              "buffer_peak": self.buffer[0], "dropped_lines": self.buffer[1] }
+        if self.json:
+            print(json.dumps(s), flush=True)
+        else:
+            print(f"exit code {code}, {self.files} files, {s['seconds']:.1f}s, "
+                  f"output buffer peak {self.buffer[0] / 1024:.0f} KiB")
+
+
+
+# Alternative runner using QCoreApplication and QProcess, same as the GUI
+def run_qt(job: Job, callback) -> int:
+    from PyQt6.QtCore import QCoreApplication
+    from qprocess import JobProcess
+
+    app = QCoreApplication(sys.argv[:1])
+    p = JobProcess(job)
+    p.event.connect(callback)
+    p.finished.connect(app.exit)
+    p.start()
+    return app.exec()
+
+
+
+# Restore with its own scheduler, fetches and extractions in parallel
+def run_restore(args) -> int:
+    from qarchindex import ArchiveIndex
+    from qrestore import restore_plan, plan_summary, Restore
+
+    index = ArchiveIndex()
+    plan = restore_plan(index, args.date, args.subdir, args.target)
+    index.close()
+    if not plan:
+        warning(f"no archived files for {args.date}")
+        return 1
+    if args.json:
+        for archive, members in sorted(plan.items()):
+            print(json.dumps({ "event": "plan", "archive": archive, "members": len(members),
+                               "size": sum(m.size for m in members) }), flush=True)
+    else:
+        print(plan_summary(plan))
+    if args.dry_run:
+        return 0
+
+    def callback(msg: str):
+        if args.json:
+            print(json.dumps(event_dict((TEXT, msg))), flush=True)
+        else:
+            verbose(msg)
+    r = Restore(plan, args.output, callback, args.transfers, program=args.program, rclone=args.rclone)
+    code = 0 if r.run() else 1
+    if args.json:
+        print(json.dumps(dict(r.stats(), event="summary", code=code)), flush=True)
+    else:
+        print(r.report())
+    return code
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Run 7z/rclone jobs without GUI",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-j", "--json", action="store_true", help="machine-readable output, one JSON object per line")
+    arg.add_argument("-Q", "--qt", action="store_true", help="use QCoreApplication/QProcess instead of asyncio")
+    arg.add_argument("-p", "--program", help="path of 7z/rclone executable")
+    arg.add_argument("-M", "--no-metrics", action="store_true", help="do not record job metrics")
+    sub = arg.add_subparsers(dest="command", required=True)
+    a = sub.add_parser("7z", help="create 7z archive")
+    a.add_argument("archive", help="archive name")
+    a.add_argument("sources", nargs="+", help="files/directories to add")
+    a.add_argument("-V", "--volumes", metavar="DEST", help="split into volumes sized for upload to rclone DEST")
+    a.add_argument("-D", "--defaults", action="store_true", help="7z default compression, ignore saved qcompress profile")
+    a = sub.add_parser("rclone", help="copy with rclone")
+    a.add_argument("source", help="source file/directory")
+    a.add_argument("-V", "--volumes", action="store_true", help="source is an archive, upload it and all its volumes")
+    a.add_argument("dest", help="rclone destination remote:path")
+    a = sub.add_parser("restore", help="restore files of a night from archives")
+    a.add_argument("date", help="date YYYY-MM-DD")
+    a.add_argument("-s", "--subdir", help="subdirectory, e.g. _asteroids")
+    a.add_argument("-t", "--target", action="append", help="target (repeatable)")
+    a.add_argument("-o", "--output", default="restore", help="destination directory (default restore)")
+    a.add_argument("-T", "--transfers", type=int, default=TRANSFERS, help=f"parallel volume downloads (default {TRANSFERS})")
+    a.add_argument("-n", "--dry-run", action="store_true", help="show plan only")
+    a.add_argument("-r", "--rclone", help="path of rclone executable (-p is 7z)")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose and not args.json)
+    if args.json:
+        # stdout is JSON lines only, warnings and errors go to stderr
+        verbose.set_file(sys.stderr)
+
+    if args.command == "restore":
+        sys.exit(run_restore(args))
+    if args.command == "7z":
+        options = [] if args.defaults else profile_options()
+        if args.volumes:
+            options += volume_options(tree_size(args.sources), args.volumes)
+        job = Job.seven_zip(args.archive, args.sources, options, program=args.program)
+    elif args.volumes:
+        job = rclone_volumes(args.source, args.dest, program=args.program)
+    else:
+        job = Job.rclone(args.source, args.dest, program=args.program)
+    verbose(str(job))
+
+    console = Console(args.json)
+    metrics = JobMetrics(job)
+    exporter = start_exporter(NAME)
+    observer = job_observer(job, NAME) if exporter else None
+    def callback(ev: tuple):
+        metrics.event(ev)
+        if observer:
+            observer(ev)
+        console(ev)
+    try:
+        if args.qt:
+            code = run_qt(job, callback)
+        else:
+            code = asyncio.run(run_async(job, callback))
+    except OSError as e:
+        error(f"{job.program}: {e}")
+    console.summary(code)
+    if exporter:
+        exporter.stop()
+    if not args.no_metrics:
+        MetricsStore().append(metrics)
+    sys.exit(code)
+
+
+
+if __name__ == "__main__":
+    main()
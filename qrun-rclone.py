@@ -18,19 +18,49 @@
 # ChangeLog
 # Version 0.0 / 2024-10-12
 #       New test script, run rclone.exe
+# Version 0.1 / 2026-10-19
+#       Process handling and output parsing moved to qjobs/qprocess,
+#       shared with headless qrun-cli
+#       icecream imported only when debug is enabled (qdebug), startup
+#       timing with --startup-profile (qstartup)
+#       Job created by make_job(), replaced by qreplay benchmark
+#       Optional event loop stall watchdog (qwatchdog)
+#       Job metrics recorded to history (qmetrics), dashboard (qdashboard)
+#       Upload of all archive volumes with parallel transfers (qvolumes)
+#       Prometheus textfile metrics, if $QT_WORKBENCH_TEXTFILE_DIR is set
+#       Peak output buffer usage reported per job
+#       Upload destination recorded in archive index (qarchindex)
+#       Job waits for a slot in the shared scheduler's "io" lane
+#       (qscheduler), limits parallel jobs of all tools in one process
+#       (qworkbench). Shared objects are closed at exit (qshared).
+#       "Restore night..." fetches the needed volumes of a night's archives
+#       and extracts the matching files on the shared scheduler (qrestore),
+#       planned in a worker thread, cache removed after a complete restore
+
+# Startup timing, must be imported first
+from qstartup import startup
 
 import sys
-import re
+import time
+import threading
 
 # The following libs must be installed with pip
-from icecream import ic
-ic.disable()
 
 # Local modules
 from qverbose import verbose, warning, error
+from qwatchdog import StallWatchdog
+from qdebug import ic
+from qjobs import Job, PROGRESS, FILE, TEXT
+from qprocess import JobProcess
+from qmetrics import JobMetrics, MetricsStore
+from qprometheus import start_exporter, job_observer, LATENCY
+from qarchindex import record_archive
+from qvolumes import rclone_volumes
+from qscheduler import shared_scheduler, SlotTask, FINAL
+from qshared import shared, close_shared
 
 # PyQt6 must be installed with pip
-from PyQt6.QtCore    import QProcess
+from PyQt6.QtCore    import pyqtSignal
 from PyQt6.QtGui     import QAction, QCloseEvent
 from PyQt6.QtWidgets import (
     QApplication,
@@ -41,30 +71,42 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
     QWidget,
     QFileDialog,
+    QInputDialog,
     QMessageBox
 )
 
 
-VERSION = "0.0 / 2024-10-12"
+VERSION = "0.1 / 2026-10-19"
 AUTHOR  = "Martin Junius"
 NAME    = "qrun-rclone"
 
 
 
-STATES = {
-    QProcess.ProcessState.NotRunning: "Not running",
-    QProcess.ProcessState.Starting: "Starting...",
-    QProcess.ProcessState.Running: "Running...",
-}
+RESTORE_DIR = "restore"
 
 
 
 class MainWindow(QMainWindow):
+    # Emitted by scheduler worker thread, queued to GUI thread
+    slot_granted = pyqtSignal()
+    slot_stop    = pyqtSignal()
+    # Restore messages from worker threads
+    restore_text    = pyqtSignal(str)
+    restore_started = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
 
         # Hold process reference
         self.p = None
+        # Scheduler slot for job
+        self.slot = None
+        self.slot_granted.connect(self.start)
+        self.slot_stop.connect(self.stop)
+        self.restore = None
+        self.restore_thread = None
+        self.restore_text.connect(self.print_text)
+        self.restore_started.connect(self.set_restore)
 
         # Size
         self.setMinimumSize(500, 200) 
@@ -84,7 +126,7 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.progress)
 
         btn_run = QPushButton("Execute 7z")
-        btn_run.clicked.connect(self.start)
+        btn_run.clicked.connect(self.queue_start)
         layout.addWidget(btn_run)
 
         w = QWidget()
@@ -105,6 +147,10 @@ class MainWindow(QMainWindow):
         menu_dir.triggered.connect(self.select_dir)
         menu_file.addAction(menu_dir)
 
+        menu_restore = QAction("Restore night...", self)
+        menu_restore.triggered.connect(self.restore_dialog)
+        menu_file.addAction(menu_restore)
+
 
 
         menu_quit = QAction("Quit", self)
@@ -120,6 +166,12 @@ class MainWindow(QMainWindow):
         menu_debug = QAction("Debug", self, checkable=True)
         menu_debug.triggered.connect(self.toggle_debug)
         menu_options.addAction(menu_debug)
+        self.watchdog = StallWatchdog(self)
+        self.exporter = start_exporter(NAME)
+        self.watchdog.add_actions(menu_options)
+        menu_history = QAction("Job history...", self)
+        menu_history.triggered.connect(self.show_history)
+        menu_options.addAction(menu_history)
 
         # Status bar
         self.statusBar().setEnabled(True)
@@ -131,6 +183,13 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event: QCloseEvent):
         warning("quit?")
         if self.yes_no_dialog("Really quit?"):
+            self.watchdog.stop()
+            if self.slot:
+                shared_scheduler().cancel([ self.slot ])
+            if self.restore:
+                self.restore.cancel(shared_scheduler())
+            if self.exporter:
+                self.exporter.stop()
             event.accept()
         else:
             event.ignore()
@@ -155,6 +214,53 @@ class MainWindow(QMainWindow):
             verbose(f"select dir {directory}")
 
 
+    ##### Restore from archives (qrestore) #####
+    def restore_dialog(self):
+        if self.restore_thread and self.restore_thread.is_alive():
+            self.print_status("Restore still running.")
+            return
+        date, ok = QInputDialog.getText(self, "Restore night", "Date (YYYY-MM-DD):")
+        if not ok or not date.strip():
+            return
+        targets, ok = QInputDialog.getText(self, "Restore night", "Targets, comma separated (empty = all):")
+        if not ok:
+            return
+        targets = [ t.strip() for t in targets.split(",") if t.strip() ]
+
+        # Index query and planning stat() the archives, not in the GUI thread
+        self.restore_thread = threading.Thread(target=self.restore_run, args=(date.strip(), targets), daemon=True)
+        self.restore_thread.start()
+        self.print_status(f"Restore of {date} started.")
+
+    def set_restore(self, restore):
+        self.restore = restore
+
+    # Worker thread
+    def restore_run(self, date: str, targets: list):
+        from qarchindex import ArchiveIndex
+        from qrestore import restore_plan, plan_summary, Restore
+        plan = restore_plan(shared("archindex", ArchiveIndex), date, targets=targets or None)
+        if not plan:
+            self.restore_text.emit(f"No archived files for {date}.")
+            return
+        self.restore_text.emit(plan_summary(plan))
+        restore = Restore(plan, RESTORE_DIR, self.restore_text.emit)
+        restore.add_to(shared_scheduler())
+        self.restore_started.emit(restore)
+        while not restore.done():
+            time.sleep(0.5)
+        if restore.ok():
+            restore.cleanup()
+        self.restore_text.emit(restore.report())
+
+
+    def show_history(self):
+        # Deferred import, pandas/matplotlib are only needed here
+        from qdashboard import DashboardWindow
+        self.dashboard = DashboardWindow(self)
+        self.dashboard.show()
+
+
     def toggle_verbose(self):
         option_v = self.sender().isChecked()
         self.print_status("Verbose", "enabled" if option_v else "disabled")
@@ -194,67 +300,90 @@ class MainWindow(QMainWindow):
 
 
     ##### Run external program using QProcess #####
+    # Started when the shared scheduler grants a slot, qreplay calls start()
+    # directly
+    def queue_start(self):
+        # Slot cancelled before it was granted
+        if self.slot is not None and self.p is None and self.slot.state in FINAL:
+            self.slot = None
+        if self.p is not None or self.slot is not None:
+            return
+        self.slot = shared_scheduler().add(SlotTask(NAME, self.slot_granted.emit, self.slot_stop.emit,
+                                                    lane="io", stage="upload"))
+        self.print_status("Waiting for I/O slot ...")
+
+    def stop(self):
+        if self.p is not None:
+            self.p.kill()
+
     def start(self):
         if self.p is not None:
             return
 
-        self.p = QProcess()
-        self.p.readyReadStandardOutput.connect(self.handle_stdout)
-        self.p.readyReadStandardError.connect(self.handle_stderr)
-        self.p.stateChanged.connect(self.handle_state)
+        job = self.make_job()
+        self.metrics = JobMetrics(job)
+        self.p = JobProcess(job)
+        self.p.event.connect(self.metrics.event)
+        if self.exporter:
+            self.p.event.connect(job_observer(job, NAME))
+            self.p.on_latency = lambda t: LATENCY.observe(t, tool=NAME)
+        self.p.event.connect(self.handle_event)
+        self.p.state.connect(self.handle_state)
         self.p.finished.connect(self.cleanup)
-
-        # Run rclone.exe
-        self.p.start("C:/Tools/rclone/rclone.exe",
-                     [ "copy", "tmp/test.7z", "iasdata:test-upload/tmp", "-v", "-P", "-I" ]
-                    )
-
+        self.p.start()
         self.progress.setValue(0)
 
 
+    # Overridden by qreplay benchmark
+    def make_job(self) -> Job:
+        return rclone_volumes("tmp/test.7z", "iasdata:test-upload/tmp")
 
-    def handle_stderr(self):
-        result = bytes(self.p.readAllStandardError()).decode("utf8")
-        ic("stderr")
-        ic(result)
-        self.print_text(result.strip())
 
+    def handle_event(self, ev: tuple):
+        ic(ev)
+        if ev[0] == PROGRESS:
+            self.progress.setValue(ev[1])
+        elif ev[0] == FILE:
+            (_, n, op, file) = ev
+            self.print_text(f"#{n:03d} op={op} file={file}")
+        elif ev[0] == TEXT:
+            self.print_text(ev[1])
 
-    def handle_stdout(self):
-        result = bytes(self.p.readAllStandardOutput()).decode("utf8")
-        ic("stdout")
-        ic(result)
 
-        m = re.search(r"(\d{1,3})%", result)
-        ic(m)
-        if m:
-            self.progress.setValue(int(m.group(1)))
-
-        m = re.search(r"(.*INFO  : .+\(.+\))", result)
-        ic(m)
-        if m:
-            self.print_text(m.group(1))
-
-
-    def handle_state(self, state: QProcess.ProcessState):
+    def handle_state(self, state: str):
         ic(state)
-        self.statusBar().showMessage(STATES[state])
-
-
-    def cleanup(self):
+        self.statusBar().showMessage(state)
+
+
+    def cleanup(self, code: int):
+        verbose(f"exit code {code}")
+        verbose(f"output buffer peak {self.metrics.buffer_peak / 1024:.0f} KiB, "
+                f"{self.metrics.dropped_lines} progress lines dropped")
+        # Writing Parquet needs pandas, keep it off the GUI thread
+        threading.Thread(target=MetricsStore().append, args=(self.metrics,)).start()
+        job = self.p.job
+        if code == 0 and job.info.get("dest"):
+            threading.Thread(target=record_archive, args=(job.info["source"], job.info["dest"], False)).start()
         self.progress.setValue(100)
         self.p = None
+        if self.slot:
+            self.slot.release(code)
+            self.slot = None
 
 
 
 def main():
+    startup.mark("main")
     verbose.set_prog(NAME)
     verbose.enable()
 
     app = QApplication(sys.argv)
     window = MainWindow()
+    startup.mark("window")
+    startup.watch(app, window)
     window.show()
     app.exec()
+    close_shared()
 
 
 
@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Dependency graph scheduler for scan -> archive -> test -> upload
+#       pipelines. Ready tasks run on bounded thread pools per lane
+#       ("cpu" for 7z compression/test, "io" for scans and rclone uploads).
+#       Failure or cancellation of a task skips all its dependents.
+#       One shared scheduler per process (qshared), so tools hosted together
+#       respect global lane limits. SlotTask holds a lane slot for a job
+#       running elsewhere, e.g. a QProcess on the GUI thread.
+#       job_task() records job metrics (qmetrics) and feeds the Prometheus
+#       job metrics (qprometheus) of the tool
+#       Listeners are called with (task, state) outside the scheduler lock,
+#       in order of the state changes, exceptions are reported only
+#       Finished tasks are pruned from the task list (counted for status()),
+#       a long-running shared scheduler does not grow without bound.
+#       lane_threads() is the share of the cores of one lane slot (7z -mmt,
+#       pool workers), run_in_lane() runs a pool of that size in a slot.
+#
+#       Usage:  s = Scheduler({ "cpu": 2, "io": 4 })
+#               a = s.add(Task("7z", job_task(job), lane="cpu", stage="archive"))
+#               s.add(Task("rclone", job_task(job2), deps=[a], lane="io", stage="upload"))
+#               s.start()
+#               s.status()                  snapshot, can be polled from GUI
+#               s.cancel()
+#               s.wait()
+#               s = shared_scheduler(lanes)             lanes of first caller
+#               t = s.add(SlotTask("7z", start))        start() when slot is granted
+#               t.release(code)                         job finished
+#               n = lane_threads("cpu")                 cores per cpu slot
+#               rows = run_in_lane("index", func)       func(workers) in a cpu slot, blocking
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Local modules
+from qverbose import verbose, warning, error
+from qjobs import Job
+from qmetrics import run_recorded
+from qshared import shared
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qscheduler"
+
+
+
+PENDING   = "pending"       # waiting for dependencies
+READY     = "ready"         # queued on lane
+RUNNING   = "running"
+DONE      = "done"
+FAILED    = "failed"
+CANCELLED = "cancelled"
+SKIPPED   = "skipped"       # dependency failed
+
+STATES   = [ PENDING, READY, RUNNING, DONE, FAILED, CANCELLED, SKIPPED ]
+FINAL    = { DONE, FAILED, CANCELLED, SKIPPED }
+STAGES   = [ "scan", "archive", "test", "upload", "fetch", "extract" ]
+DEFAULT_LANES = { "cpu": max(1, (os.cpu_count() or 2) // 2), "io": 4 }
+PRUNE_TASKS   = 1000        # prune finished tasks beyond this number
+
+
+
+class Task:
+    def __init__(self, name: str, func, deps: list=(), lane: str="cpu", stage: str=None):
+        self.name = name
+        self.func = func                # func(task) -> result, raises on error
+        self.deps = list(deps)
+        self.lane = lane
+        self.stage = stage or name
+        self.dependents = []
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.finished = threading.Event()       # set in a final state
+        self.t_start = None
+        self.t_end = None
+
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def duration(self) -> float:
+        if self.t_start is None:
+            return 0.0
+        return (self.t_end or time.perf_counter()) - self.t_start
+
+    def __str__(self) -> str:
+        return f"{self.name} [{self.stage}/{self.lane}] {self.state}"
+
+
+
+# Task function running a qjobs Job, killed when the task is cancelled,
+# metrics recorded (qmetrics)
+def job_task(job: Job, callback=None, tool: str=NAME):
+    def func(task: Task):
+        code = run_recorded(job, callback, task.cancel_event, tool=tool)
+        if code != 0 and not task.cancelled():
+            raise RuntimeError(f"{job.name} exit code {code}")
+        return code
+    return func
+
+
+
+# Task holding a lane slot until release(), start() is called from the
+# worker thread, stop() when the task is cancelled while running
+class SlotTask(Task):
+    def __init__(self, name: str, start, stop=None, lane: str="cpu", stage: str=None):
+        super().__init__(name, self._hold, lane=lane, stage=stage)
+        self.start = start
+        self.stop = stop
+        self.code = None
+        self.released = threading.Event()
+
+    def release(self, code: int=0):
+        self.code = code
+        self.released.set()
+
+    def _hold(self, task: Task):
+        self.start()
+        # Slot is given up on cancel, the owner may not be able to release
+        # it any more (window closed)
+        while not self.released.wait(0.2):
+            if self.cancelled():
+                if self.stop:
+                    self.stop()
+                break
+        if self.code != 0 and not self.cancelled():
+            raise RuntimeError(f"exit code {self.code}")
+        return self.code
+
+
+
+class Scheduler:
+    def __init__(self, lanes: dict=None):
+        self.lanes = dict(lanes or DEFAULT_LANES)
+        self.tasks = []
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.pools = {}
+        self.busy = { lane: 0 for lane in self.lanes }
+        self.listeners = []             # listener(task, state), called from worker threads
+        self.events = deque()           # (task, state) for the listeners
+        self.notify_lock = threading.RLock()
+        self.pruned = {}                # stage -> { state: count } of pruned tasks
+        self.prune_at = PRUNE_TASKS
+        self.started = False
+
+    def add(self, task: Task) -> Task:
+        if task.lane not in self.lanes:
+            raise ValueError(f"unknown lane {task.lane}")
+        with self.lock:
+            for dep in task.deps:
+                dep.dependents.append(task)
+            if len(self.tasks) >= self.prune_at:
+                self._prune()
+            self.tasks.append(task)
+            self.done.clear()
+            if self.started:
+                self._check(task)
+        self._notify()
+        return task
+
+    def add_listener(self, listener):
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+
+    def start(self):
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+            for lane, n in self.lanes.items():
+                self.pools[lane] = ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"{NAME}-{lane}")
+            n_tasks = len(self.tasks)
+            for task in list(self.tasks):
+                self._check(task)
+            self._check_done()
+        verbose(f"scheduler: {n_tasks} tasks, lanes {self.lanes}")
+        self._notify()
+
+    # All tasks or only the given ones, e.g. of one tool
+    def cancel(self, tasks: list=None):
+        with self.lock:
+            for task in (self.tasks if tasks is None else tasks):
+                if task.state in (PENDING, READY):
+                    self._set(task, CANCELLED)
+                elif task.state == RUNNING:
+                    task.cancel_event.set()
+            self._check_done()
+        self._notify()
+
+    def wait(self, timeout: float=None) -> bool:
+        return self.done.wait(timeout)
+
+    def shutdown(self):
+        self.cancel()
+        for pool in self.pools.values():
+            pool.shutdown(wait=True)
+        self.pools = {}
+        self.started = False
+
+
+    # Lock held by caller, listeners are called by _notify()
+    def _set(self, task: Task, state: str):
+        task.state = state
+        self.events.append((task, state))
+        if state in FINAL:
+            task.finished.set()
+
+    # Lock held by caller. Finished tasks without unfinished dependents are
+    # removed, only their counts are kept.
+    def _prune(self):
+        keep = []
+        for task in self.tasks:
+            if task.state in FINAL and all(t.state in FINAL for t in task.dependents):
+                counts = self.pruned.setdefault(task.stage, { s: 0 for s in STATES })
+                counts[task.state] += 1
+            else:
+                keep.append(task)
+        self.tasks = keep
+        self.prune_at = max(PRUNE_TASKS, 2 * len(keep))
+
+    # Lock not held, one thread at a time delivers the queued state changes
+    def _notify(self):
+        with self.notify_lock:
+            while True:
+                with self.lock:
+                    if not self.events:
+                        return
+                    task, state = self.events.popleft()
+                    listeners = list(self.listeners)
+                for listener in listeners:
+                    try:
+                        listener(task, state)
+                    except Exception as e:
+                        warning(f"scheduler listener: {e}")
+
+    def _check(self, task: Task):
+        if task.state != PENDING:
+            return
+        states = [ dep.state for dep in task.deps ]
+        if any(s in (FAILED, SKIPPED) for s in states):
+            self._propagate(task, SKIPPED)
+        elif any(s == CANCELLED for s in states):
+            self._propagate(task, CANCELLED)
+        elif all(s == DONE for s in states):
+            self._set(task, READY)
+            self.pools[task.lane].submit(self._run, task)
+
+    # Task and all its pending dependents
+    def _propagate(self, task: Task, state: str):
+        if task.state != PENDING:
+            return
+        self._set(task, state)
+        for t in task.dependents:
+            self._propagate(t, state)
+
+    def _check_done(self):
+        if all(t.state in FINAL for t in self.tasks):
+            self.done.set()
+
+
+    # Worker thread
+    def _run(self, task: Task):
+        with self.lock:
+            if task.state != READY:
+                return
+            self.busy[task.lane] += 1
+            task.t_start = time.perf_counter()
+            self._set(task, RUNNING)
+        self._notify()
+        state = DONE
+        try:
+            task.result = task.func(task)
+            if task.cancelled():
+                state = CANCELLED
+        except Exception as e:
+            task.error = e
+            state = CANCELLED if task.cancelled() else FAILED
+        with self.lock:
+            task.t_end = time.perf_counter()
+            self.busy[task.lane] -= 1
+            self._set(task, state)
+            for t in task.dependents:
+                self._check(t)
+            self._check_done()
+        if state == FAILED:
+            warning(f"{task.name}: {task.error}")
+        verbose(f"{task.name}: {state} ({task.duration():.1f}s)")
+        self._notify()
+
+
+    # Snapshot for display: { "stages": { stage: { state: count } },
+    #                         "lanes": { lane: (busy, capacity) } }
+    def status(self) -> dict:
+        with self.lock:
+            stages = { stage: dict(counts) for stage, counts in self.pruned.items() }
+            for task in self.tasks:
+                counts = stages.setdefault(task.stage, { s: 0 for s in STATES })
+                counts[task.state] += 1
+            lanes = { lane: (self.busy[lane], n) for lane, n in self.lanes.items() }
+        return { "stages": stages, "lanes": lanes }
+
+    def failed(self) -> list:
+        with self.lock:
+            return [ t for t in self.tasks if t.state == FAILED ]
+
+
+
+# Scheduler shared by all tools of the process, started on creation
+def shared_scheduler(lanes: dict=None) -> Scheduler:
+    def create():
+        s = Scheduler(lanes)
+        s.start()
+        return s
+    return shared("scheduler", create)
+
+
+# Share of the cores for one slot of the lane, threads of a 7z job or
+# workers of a pool running in one task
+def lane_threads(lane: str="cpu", scheduler: Scheduler=None) -> int:
+    scheduler = scheduler or shared_scheduler()
+    return max(1, (os.cpu_count() or 2) // scheduler.lanes[lane])
+
+
+# Run func(workers) as task of the shared scheduler and wait for the result,
+# for threads outside the scheduler (a task waiting for its own lane could
+# deadlock)
+def run_in_lane(name: str, func, lane: str="cpu", stage: str=None):
+    scheduler = shared_scheduler()
+    task = scheduler.add(Task(name, lambda task: func(lane_threads(lane, scheduler)), lane=lane, stage=stage))
+    task.finished.wait()
+    if task.state == FAILED:
+        raise task.error
+    if task.state != DONE:
+        raise RuntimeError(f"{name}: {task.state}")
+    return task.result
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Live view of a qscheduler.Scheduler: task counts per stage and
+#       utilization per lane. The scheduler status is polled by a timer,
+#       worker threads never touch the widgets.
+#
+#       Usage:  view = SchedulerView()
+#               view.set_scheduler(scheduler)
+
+# Local modules
+from qverbose import verbose, warning, error
+from qscheduler import STAGES, PENDING, READY, RUNNING, DONE, FAILED, CANCELLED, SKIPPED
+
+# PyQt6 must be installed with pip
+from PyQt6.QtCore    import QTimer, Qt
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+                             QProgressBar, QLabel, QHeaderView)
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qschedview"
+
+
+
+REFRESH_MS = 250
+COLUMNS    = [ ("Waiting", (PENDING, READY)), ("Running", (RUNNING,)), ("Done", (DONE,)),
+               ("Failed", (FAILED,)), ("Cancelled", (CANCELLED, SKIPPED)) ]
+
+
+
+class SchedulerView(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.scheduler = None
+        self.bars = {}
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([ c for c, _ in COLUMNS ])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+        self.lanes = QHBoxLayout()
+        layout.addLayout(self.lanes)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+
+
+    def set_scheduler(self, scheduler):
+        self.scheduler = scheduler
+        for label, bar in self.bars.values():
+            label.deleteLater()
+            bar.deleteLater()
+        self.bars = {}
+        for lane, n in scheduler.lanes.items():
+            label = QLabel(lane)
+            bar = QProgressBar()
+            bar.setRange(0, n)
+            bar.setFormat(f"%v / {n}")
+            self.lanes.addWidget(label)
+            self.lanes.addWidget(bar)
+            self.bars[lane] = (label, bar)
+        self.refresh()
+        self.timer.start()
+
+
+    def refresh(self):
+        if self.scheduler is None:
+            return
+        status = self.scheduler.status()
+        stages = status["stages"]
+        names = [ s for s in STAGES if s in stages ] + sorted(s for s in stages if s not in STAGES)
+        self.table.setRowCount(len(names))
+        self.table.setVerticalHeaderLabels(names)
+        for row, stage in enumerate(names):
+            counts = stages[stage]
+            for col, (_, states) in enumerate(COLUMNS):
+                item = QTableWidgetItem(str(sum(counts[s] for s in states)))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, col, item)
+        for lane, (busy, n) in status["lanes"].items():
+            self.bars[lane][1].setValue(busy)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Process-wide shared objects (scheduler, indexes, caches), created on
+#       first use, so tools hosted in one process (qworkbench) use one
+#       instance each. Closed in reverse order of creation at exit.
+#
+#       Usage:  index = shared("archindex", ArchiveIndex)
+#               is_shared("scheduler")
+#               close_shared()              .shutdown() or .close() of all objects
+
+import threading
+
+# Local modules
+from qverbose import verbose, warning, error
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qshared"
+
+
+
+_objects = {}                   # name -> object, in order of creation
+_lock = threading.RLock()       # factories may use shared() themselves
+
+
+def shared(name: str, factory):
+    with _lock:
+        obj = _objects.get(name)
+        if obj is None:
+            obj = _objects[name] = factory()
+            verbose(f"shared {name} created")
+        return obj
+
+
+def is_shared(name: str) -> bool:
+    with _lock:
+        return name in _objects
+
+
+def close_shared():
+    with _lock:
+        objects = list(_objects.items())
+        _objects.clear()
+    for name, obj in reversed(objects):
+        try:
+            if hasattr(obj, "shutdown"):
+                obj.shutdown()
+            elif hasattr(obj, "close"):
+                obj.close()
+        except Exception as e:
+            warning(f"shared {name}: {e}")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Startup timing for the GUI tools
+#       Benchmark includes the qworkbench host
+#
+#       In the tools:
+#               from qstartup import startup    import first
+#               startup.mark("main")
+#               startup.watch(app, window)      report time to first paint
+#       Command line options of the tools:
+#               --startup-profile               print startup report
+#               --startup-exit                  same, exit after first paint
+#       Standalone:
+#               python qstartup.py qtestcal.py  report with -X importtime breakdown
+#               python qstartup.py --benchmark  cold start of all tools
+
+import os
+import sys
+import time
+
+_t0 = time.perf_counter()
+
+# Modules for the standalone mode are imported there, this module must not
+# add to the startup time of the tools
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qstartup"
+
+
+
+TOOLS     = [ "qtemplate.py", "qtestcal.py", "qrun-7z.py", "qrun-rclone.py", "qworkbench.py" ]
+JSON_TAG  = "qstartup-json:"
+IMPORT_RE = r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)"
+
+
+
+class Startup:
+    def __init__(self):
+        self.marks = [ ("import", _t0) ]
+        self.enabled = False
+        self.exit = False
+        for opt in ("--startup-profile", "--startup-exit"):
+            if opt in sys.argv:
+                sys.argv.remove(opt)
+                self.enabled = True
+                self.exit = self.exit or opt == "--startup-exit"
+        self.filter = None
+
+    def mark(self, name: str):
+        self.marks.append((name, time.perf_counter()))
+
+    # Install event filter for the first paint event of window
+    def watch(self, app, window):
+        if not self.enabled:
+            return
+        from PyQt6.QtCore import QObject, QEvent
+
+        startup = self
+        class PaintFilter(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Type.Paint:
+                    obj.removeEventFilter(self)
+                    startup.mark("paint")
+                    startup.report()
+                    if startup.exit:
+                        # exit() does not close the windows, no "Really quit?"
+                        app.exit(0)
+                return False
+
+        self.filter = PaintFilter()
+        window.installEventFilter(self.filter)
+
+    def times(self) -> dict:
+        t = { name: round((tm - _t0) * 1000, 1) for name, tm in self.marks }
+        # Spawn time passed by qstartup as parent process
+        spawn = os.environ.get("QT_WORKBENCH_T0")
+        if spawn:
+            t["since_spawn"] = round((time.time() - float(spawn)) * 1000, 1)
+        return t
+
+    def report(self):
+        import json
+        t = self.times()
+        print(" ".join(f"{k}={v}ms" for k, v in t.items()), file=sys.stderr)
+        print(JSON_TAG, json.dumps(t), file=sys.stderr, flush=True)
+
+
+startup = Startup()
+
+
+
+##### Standalone: run tools and measure #####
+def run_tool(tool: str, importtime: bool=False) -> tuple:
+    import re
+    import json
+    import subprocess
+    env = dict(os.environ, QT_WORKBENCH_T0=str(time.time()))
+    cmd = [ sys.executable ] + ([ "-X", "importtime" ] if importtime else []) + [ tool, "--startup-exit" ]
+    t0 = time.perf_counter()
+    r = subprocess.run(cmd, env=env, capture_output=True, text=True, timeout=60)
+    wall = (time.perf_counter() - t0) * 1000
+    times = None
+    imports = []
+    for line in r.stderr.splitlines():
+        if line.startswith(JSON_TAG):
+            times = json.loads(line[len(JSON_TAG):])
+        m = re.match(IMPORT_RE, line)
+        if m:
+            imports.append((int(m.group(2)), int(m.group(1)), len(m.group(3)) // 2, m.group(4)))
+    if times is None:
+        print(r.stderr, file=sys.stderr)
+    return times, wall, imports
+
+
+def profile(tool: str, top: int):
+    times, wall, imports = run_tool(tool, importtime=True)
+    if times is None:
+        print(f"{tool}: no startup report", file=sys.stderr)
+        return
+    print(f"{tool}: " + " ".join(f"{k}={v}ms" for k, v in times.items()) + f" wall={wall:.0f}ms")
+    print(f"{'cumul ms':>9} {'self ms':>8}  module (top-level imports, -X importtime)")
+    for cumul, own, level, name in sorted((i for i in imports if i[2] == 0), reverse=True)[:top]:
+        print(f"{cumul / 1000:9.1f} {own / 1000:8.1f}  {name}")
+
+
+def benchmark(tools: list, n: int):
+    import statistics
+    print(f"{'tool':16s} {'paint ms':>9} {'spawn ms':>9} {'wall ms':>8}  (median of {n})")
+    for tool in tools:
+        paint, spawn, wall = [], [], []
+        for _ in range(n):
+            times, w, _ = run_tool(tool)
+            if times is None:
+                break
+            paint.append(times["paint"])
+            spawn.append(times.get("since_spawn", 0))
+            wall.append(w)
+        if paint:
+            print(f"{tool:16s} {statistics.median(paint):9.1f} {statistics.median(spawn):9.1f} "
+                  f"{statistics.median(wall):8.0f}")
+        else:
+            print(f"{tool:16s} failed")
+
+
+
+def main():
+    import argparse
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Startup profiling of the GUI tools",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-B", "--benchmark", action="store_true", help="measure cold start of tools")
+    arg.add_argument("-n", "--runs", type=int, default=5, help="number of runs for benchmark (default 5)")
+    arg.add_argument("-t", "--top", type=int, default=20, help="number of imports listed (default 20)")
+    arg.add_argument("-o", "--offscreen", action="store_true", help="use Qt offscreen platform, no display needed")
+    arg.add_argument("tools", nargs="*", help=f"tool scripts (default {' '.join(TOOLS)})")
+    args = arg.parse_args()
+
+    if args.offscreen:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    tools = args.tools or TOOLS
+    if args.benchmark:
+        benchmark(tools, args.runs)
+    else:
+        for tool in tools:
+            profile(tool, args.top)
+
+
+
+if __name__ == "__main__":
+    main()
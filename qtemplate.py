@@ -18,6 +18,11 @@
 # ChangeLog
 # Version 0.0 / 2024-xx-xx
 #       TEXT
+#       Startup timing with --startup-profile (qstartup)
+#       Optional event loop stall watchdog (qwatchdog)
+
+# Startup timing, must be imported first
+from qstartup import startup
 
 import sys
 
@@ -25,6 +30,7 @@ import sys
 
 # Local modules
 from qverbose import verbose, warning, error
+from qwatchdog import StallWatchdog
 
 # PyQt6 must be installed with pip
 from PyQt6.QtCore    import Qt
@@ -106,6 +112,8 @@ class MainWindow(QMainWindow):
         menu_debug = QAction("Debug", self, checkable=True)
         menu_debug.triggered.connect(self.toggle_debug)
         menu_options.addAction(menu_debug)
+        self.watchdog = StallWatchdog(self)
+        self.watchdog.add_actions(menu_options)
 
         # Status bar
         self.statusBar().setEnabled(True)
@@ -117,6 +125,7 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event: QCloseEvent):
         warning("quit?")
         if self.yes_no_dialog("Really quit?"):
+            self.watchdog.stop()
             event.accept()
         else:
             event.ignore()
@@ -177,11 +186,14 @@ class MainWindow(QMainWindow):
 
 
 def main():
+    startup.mark("main")
     verbose.set_prog(NAME)
     verbose.enable()
 
     app = QApplication(sys.argv)
     window = MainWindow()
+    startup.mark("window")
+    startup.watch(app, window)
     window.show()
     app.exec()
 
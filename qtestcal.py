@@ -18,19 +18,56 @@
 # ChangeLog
 # Version 0.0 / 2024-10-12
 #       Test calendar widgets
+# Version 0.1 / 2026-10-19
+#       Catalog of data directories (qcatalog), background scan and
+#       incremental updates via QFileSystemWatcher
+#       Calendar heat-map of data volume per night
+#       Target selection also via FITS header OBJECT (qfitsindex)
+#       Zip data for selected date with parallel in-process archiver (qzip),
+#       "wait for ready data" zips once no file changed for READY_SECONDS
+#       Identical files are archived once, aliases listed in DUPLICATES.json
+#       Catalog, FITS index and archiver are imported on first use, startup
+#       timing with --startup-profile (qstartup)
+#       Optional event loop stall watchdog (qwatchdog)
+#       Pipeline scan -> 7z -> test -> rclone upload per subdirectory of
+#       the selected date, run by qscheduler with separate CPU/IO lanes,
+#       several dates can be queued, live view of stages and lanes
+#       Multi-volume 7z archives, volumes uploaded in parallel (qvolumes)
+#       Prometheus textfile metrics, if $QT_WORKBENCH_TEXTFILE_DIR is set,
+#       per job for pipeline 7z/rclone jobs and zip archiving
+#       Archives recorded in archive member index (qarchindex), "Locate"
+#       search and extraction of single files
+#       Preview strip with thumbnails of the selected night (qpreview)
+#       Pipeline 7z uses compression settings of benchmark profile (qcompress)
+#       Pipeline tasks run on the scheduler shared by all tools in one
+#       process (qworkbench), cancel only affects this tool's tasks. Archive
+#       index and thumbnail cache are shared (qshared), closed at exit.
+#       Data root and all directories of recent nights are watched, empty
+#       ones too; catalog updates and the ready check run in worker threads.
+
+# Startup timing, must be imported first
+from qstartup import startup
 
 import sys
+import os
+import math
+import threading
+import time
 
 # The following libs must be installed with pip
-from icecream import ic
-ic.disable()
 
 # Local modules
 from qverbose import verbose, warning, error
+from qwatchdog import StallWatchdog
+from qdebug import ic
+from qprometheus import start_exporter, observer, QUEUE_DEPTH
+from qshared import shared, close_shared
+# qcatalog, qfitsindex, qzip, qdedup, qscheduler, qarchindex, qpreview, qcompress are imported on first use, they are not
+# needed to show the window
 
 # PyQt6 must be installed with pip
-from PyQt6.QtCore    import QProcess, QDate, Qt, pyqtSlot, QTimer
-from PyQt6.QtGui     import QAction, QActionGroup, QCloseEvent
+from PyQt6.QtCore    import QProcess, QDate, Qt, pyqtSlot, pyqtSignal, QTimer, QObject, QFileSystemWatcher
+from PyQt6.QtGui     import QAction, QActionGroup, QCloseEvent, QColor, QPainter
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -48,14 +85,45 @@ from PyQt6.QtWidgets import (
     QDateEdit,
     QLabel,
     QCheckBox,
-    QComboBox
+    QComboBox,
+    QListWidget,
+    QListWidgetItem
 )
 
 
-VERSION = "0.0 / 2024-10-12"
+VERSION = "0.1 / 2026-10-19"
 AUTHOR  = "Martin Junius"
 NAME    = "qtestcal"
 
+# Watch directories of this many most recent nights for changes
+WATCH_NIGHTS = 30
+# Output directory for archives
+ARCHIVE_DIR = "tmp"
+# Data is ready when no file was modified for this time
+READY_SECONDS = 120
+# Archive member listing duplicate files
+MANIFEST = "DUPLICATES.json"
+# Upload destination of the pipeline
+UPLOAD_DEST = "iasdata:test-upload/tmp"
+# Parallel tasks per scheduler lane, 7z itself is multi-threaded
+LANES = { "cpu": 1, "io": 4 }
+# Output directory for extracted files
+RESTORE_DIR = "restore"
+# Debounce for locate input
+LOCATE_MS = 300
+
+
+
+# Signals from background threads
+class WorkerSignals(QObject):
+    scan_done    = pyqtSignal(int)
+    zip_progress = pyqtSignal(int)
+    zip_done     = pyqtSignal(str)
+    task_state   = pyqtSignal(str)
+    extract_done = pyqtSignal(str)
+    dir_updated  = pyqtSignal(list)
+    ready_check  = pyqtSignal(bool)
+
 
 
 # Extend QDateEdit with "Today" button
@@ -75,10 +143,72 @@ class DateEdit(QDateEdit):
 
 
 
+# QCalendarWidget with cells colored by data volume per night
+class HeatCalendar(QCalendarWidget):
+    COLOR = QColor(255, 120, 0)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Julian day -> (files, bytes, alpha), precomputed in set_stats()
+        self.stats = {}
+
+    def set_stats(self, stats: dict):
+        max_log = math.log1p(max((size for _, size in stats.values()), default=0)) or 1
+        self.stats = {}
+        for date, (files, size) in stats.items():
+            jd = QDate.fromString(date, Qt.DateFormat.ISODate).toJulianDay()
+            alpha = 40 + int(160 * math.log1p(size) / max_log)
+            self.stats[jd] = (files, size, alpha)
+        self.updateCells()
+
+    def paintCell(self, painter: QPainter, rect, date: QDate):
+        super().paintCell(painter, rect, date)
+        s = self.stats.get(date.toJulianDay())
+        if s is None:
+            return
+        files, _, alpha = s
+        painter.save()
+        color = QColor(self.COLOR)
+        color.setAlpha(alpha)
+        painter.fillRect(rect.adjusted(1, 1, -1, -1), color)
+        font = painter.font()
+        font.setPointSizeF(font.pointSizeF() * 0.6)
+        painter.setFont(font)
+        painter.drawText(rect.adjusted(2, 1, -2, -1),
+                         Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignBottom, str(files))
+        painter.restore()
+
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
 
+        # Catalog of data root, set via "Select directory"
+        self.catalog = None
+        self.fitsindex = None
+        self.fits_lock = threading.Lock()
+        self.fits_pending = set()       # paths for background FITS indexing
+        self.fits_thread = None
+        self.signals = WorkerSignals()
+        self.signals.scan_done.connect(self.catalog_scan_done)
+        self.signals.zip_done.connect(self.zip_done)
+        self.zip_thread = None
+        self.scheduler = None
+        self.pipeline = set()           # own tasks on the shared scheduler
+        self.signals.task_state.connect(self.print_text)
+        self.archindex = None
+        self.signals.extract_done.connect(self.print_text)
+        self.wait_ready = False
+        self.ready_thread = None
+        self.signals.ready_check.connect(self.ready_checked)
+        self.dir_lock = threading.Lock()
+        self.dir_pending = set()        # changed directories for the catalog
+        self.dir_thread = None
+        self.signals.dir_updated.connect(self.catalog_dir_updated)
+        self.watcher = QFileSystemWatcher()
+        self.watcher.directoryChanged.connect(self.directory_changed)
+
         # Size
         self.setMinimumSize(500, 200) 
         self.setWindowTitle(f"{NAME} {VERSION}")
@@ -87,13 +217,18 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout()
         
         # Calendar to select date, default currentDate()
-        self.date = QCalendarWidget()
+        self.date = HeatCalendar()
         self.date.setGridVisible(True)
         self.date.clicked[QDate].connect(self.show_date)
         self.date.setSelectedDate(QDate.currentDate())
         self.date.setFocus()
         layout.addWidget(self.date)
 
+        # Thumbnails of selected night, created when a catalog is available
+        self.preview = None
+        self.preview_layout = QVBoxLayout()
+        layout.addLayout(self.preview_layout)
+
         # Subdirectory and target selector
         grid = QGridLayout()
         enable_subdir = QCheckBox()
@@ -127,6 +262,33 @@ class MainWindow(QMainWindow):
         run_ready = QPushButton("Wait for and zip ready data")
         run_ready.clicked.connect(self.click_run_ready)
         layout.addWidget(run_ready)
+        run_pipeline = QPushButton("Archive, test and upload selected date")
+        run_pipeline.clicked.connect(self.click_run_pipeline)
+        layout.addWidget(run_pipeline)
+        cancel_pipeline = QPushButton("Cancel pipeline")
+        cancel_pipeline.clicked.connect(self.cancel_pipeline)
+        layout.addWidget(cancel_pipeline)
+
+        # Locate files in archive index
+        locate = QHBoxLayout()
+        self.locate = QLineEdit()
+        self.locate.setPlaceholderText("Locate file in archives (path prefix, file name prefix or glob)")
+        self.locate.setClearButtonEnabled(True)
+        self.locate_timer = QTimer(self)
+        self.locate_timer.setSingleShot(True)
+        self.locate_timer.setInterval(LOCATE_MS)
+        self.locate_timer.timeout.connect(self.run_locate)
+        self.locate.textChanged.connect(self.locate_timer.start)
+        locate.addWidget(self.locate)
+        extract = QPushButton("Extract")
+        extract.clicked.connect(self.click_extract)
+        locate.addWidget(extract)
+        layout.addLayout(locate)
+        self.locate_results = QListWidget()
+        self.locate_results.setMaximumHeight(120)
+        self.locate_results.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
+        self.locate_results.hide()
+        layout.addWidget(self.locate_results)
 
         # TextEdit for log output, used also by verbose()
         layout.addWidget(QLabel("Log:"))
@@ -138,6 +300,12 @@ class MainWindow(QMainWindow):
         self.progress = QProgressBar()
         self.progress.setValue(0)
         layout.addWidget(self.progress)
+        self.signals.zip_progress.connect(self.progress.setValue)
+
+        # Pipeline status, created on first use
+        self.schedview = None
+        self.schedview_layout = QVBoxLayout()
+        layout.addLayout(self.schedview_layout)
 
         # edit = QDateEdit()
         # edit.setDate(QDate(2024, 1, 1))
@@ -184,6 +352,11 @@ class MainWindow(QMainWindow):
         menu_debug = QAction("Debug", self, checkable=True)
         menu_debug.triggered.connect(self.toggle_debug)
         menu_options.addAction(menu_debug)
+        self.watchdog = StallWatchdog(self)
+        self.exporter = start_exporter(NAME)
+        if self.exporter:
+            self.exporter.add_collector(self.collect_metrics)
+        self.watchdog.add_actions(menu_options)
         menu_options.addSeparator()
 
         settings_group = QActionGroup(menu_options)
@@ -205,6 +378,19 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event: QCloseEvent):
         warning("quit?")
         if self.yes_no_dialog("Really quit?"):
+            self.watchdog.stop()
+            if self.scheduler:
+                self.scheduler.cancel(list(self.pipeline))
+                self.scheduler.remove_listener(self.task_listener)
+            if self.exporter:
+                self.exporter.remove_collector(self.collect_metrics)
+                self.exporter.stop()
+            if self.catalog:
+                self.catalog.close()
+            if self.fitsindex and self.fits_thread is None:
+                self.fitsindex.close()
+            if self.preview:
+                self.preview.shutdown()
             event.accept()
         else:
             event.ignore()
@@ -216,7 +402,11 @@ class MainWindow(QMainWindow):
         ic(date)
         isodate = date.toString(Qt.DateFormat.ISODate)
         self.print_status(f"Date: {isodate}")
+        s = self.date.stats.get(date.toJulianDay())
+        if s:
+            self.print_status(f"Date: {isodate}, {s[0]} files, {s[1] / 1e6:.1f} MB")
         self.date_label.setText(f"_{isodate}")
+        self.update_preview()
 
     def subdir_changed(self, i: int):
         d = self.subdir.currentText()
@@ -235,9 +425,19 @@ class MainWindow(QMainWindow):
 
     def click_run_last(self):
         verbose("run_last button clicked")
+        self.start_zip()
 
     def click_run_ready(self):
         verbose("run_ready button clicked")
+        if self.selected_files() is None:
+            return
+        self.wait_ready = True
+        self.print_status(f"Waiting for data of {self.selected_date()} to be ready ...")
+
+
+    def click_run_pipeline(self):
+        verbose("run_pipeline button clicked")
+        self.start_pipeline()
 
 
     def open_file(self):
@@ -251,6 +451,7 @@ class MainWindow(QMainWindow):
 
         if directory:
             verbose(f"select dir {directory}")
+            self.set_data_root(directory)
 
 
     def toggle_verbose(self):
@@ -287,22 +488,410 @@ class MainWindow(QMainWindow):
         self.statusBar().showMessage(" ".join(args))
 
 
+    # Catalog of data root
+    def set_data_root(self, directory: str):
+        if self.catalog:
+            self.catalog.close()
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        from qcatalog import Catalog
+        self.catalog = Catalog(directory)
+        # Cached aggregates from previous run, refreshed after scan
+        self.date.set_stats(self.catalog.night_stats())
+        self.print_status(f"Scanning {directory} ...")
+        self.catalog.start_scan(self.signals.scan_done.emit)
+
+    def catalog_scan_done(self, changed: int):
+        # Messages of the scan thread, logged in the GUI thread
+        self.catalog.log_scan_messages()
+        nights = self.catalog.nights()
+        self.print_status(f"Catalog: {len(nights)} nights, {changed} directories updated")
+        if changed:
+            self.date.set_stats(self.catalog.night_stats())
+        for subdir in self.catalog.subdirs():
+            if subdir and self.subdir.findText(subdir) < 0:
+                self.subdir.addItem(subdir)
+        self.update_watcher()
+        self.update_preview()
+        self.index_fits(self.catalog.paths())
+
+    # Data root (new nights) and all directories of the latest nights,
+    # empty ones too, new subdirectories are added after their update
+    def update_watcher(self):
+        dirs = { self.catalog.root }
+        dirs.update(self.catalog.recent_dirs(WATCH_NIGHTS))
+        watched = set(self.watcher.directories())
+        new = [ d for d in dirs if d not in watched ]
+        if new:
+            self.watcher.addPaths(new)
+
+    # Catalog update in the background, one thread collecting changes
+    def directory_changed(self, path: str):
+        ic(path)
+        if not self.catalog:
+            return
+        with self.dir_lock:
+            self.dir_pending.add(path)
+            if self.dir_thread is not None:
+                return
+            self.dir_thread = threading.Thread(target=self._update_dirs, args=(self.catalog,), name="catalog", daemon=True)
+            self.dir_thread.start()
+
+    def _update_dirs(self, catalog):
+        while True:
+            with self.dir_lock:
+                dirs = list(self.dir_pending)
+                self.dir_pending.clear()
+                if not dirs:
+                    self.dir_thread = None
+                    return
+            files = []
+            for dir in dirs:
+                try:
+                    catalog.update_dir(dir)
+                    files += [ e.path for e in os.scandir(dir) if e.is_file() ]
+                except OSError:
+                    # Removed in the meantime, update_dir() dropped it
+                    pass
+                except Exception as e:
+                    warning(f"catalog {dir}: {e}")
+            self.signals.dir_updated.emit(files)
+
+    def catalog_dir_updated(self, files: list):
+        if not self.catalog:
+            return
+        self.date.set_stats(self.catalog.night_stats())
+        self.update_watcher()
+        if files:
+            self.index_fits(files)
+
+    def update_preview(self):
+        if not self.catalog:
+            return
+        if self.preview is None:
+            from qpreview import PreviewStrip
+            self.preview = PreviewStrip()
+            self.preview_layout.addWidget(self.preview)
+        from qthumbs import is_image
+        self.preview.set_files([ path for path, _ in self.catalog.files(self.selected_date()) if is_image(path) ])
+
+    # Lanes of the host if running in qworkbench, created before pools of
+    # this tool (FITS index, zip) run in its cpu lane
+    def shared_scheduler(self):
+        from qscheduler import shared_scheduler
+        return shared_scheduler(LANES)
+
+    def fits_index(self):
+        if self.fitsindex is None:
+            from qfitsindex import FitsIndex
+            self.fitsindex = FitsIndex()
+        return self.fitsindex
+
+    # Index FITS headers in the background, only new/changed files are
+    # parsed, one thread collecting requests
+    def index_fits(self, paths: list):
+        index = self.fits_index()
+        self.shared_scheduler()
+        with self.fits_lock:
+            self.fits_pending.update(paths)
+            if self.fits_thread is not None:
+                return
+            self.fits_thread = threading.Thread(target=self._index_fits, args=(index,), name="fitsindex", daemon=True)
+            self.fits_thread.start()
+
+    def _index_fits(self, index):
+        while True:
+            with self.fits_lock:
+                paths = list(self.fits_pending)
+                self.fits_pending.clear()
+                if not paths:
+                    self.fits_thread = None
+                    return
+            try:
+                index.update(paths)
+            except Exception as e:
+                warning(f"FITS index: {e}")
+
+    def archive_index(self):
+        if self.archindex is None:
+            from qarchindex import ArchiveIndex
+            self.archindex = shared("archindex", ArchiveIndex)
+        return self.archindex
+
+    def selected_date(self) -> str:
+        return self.date.selectedDate().toString(Qt.DateFormat.ISODate)
+
+    # List of (path, size) for selected date, subdirectory and targets
+    def selected_files(self) -> list:
+        if not self.catalog:
+            warning("no data directory selected")
+            self.print_status("Select data directory first!")
+            return None
+        subdir = self.subdir.currentText() if self.subdir.isEnabled() else None
+        files = self.catalog.files(self.selected_date(), subdir)
+        if self.target.isEnabled():
+            targets = [ t.strip() for t in self.target.text().split(",") if t.strip() ]
+            if targets:
+                # Target as directory name or FITS OBJECT, index is
+                # refreshed in the background
+                selected = self.fits_index().target_paths(targets)
+                selected.update(path for path, _ in self.catalog.files(self.selected_date(), subdir, targets))
+                files = [ f for f in files if f[0] in selected ]
+        return files
+
+
+    # Archiving
+    def start_zip(self):
+        if self.zip_thread is not None:
+            self.print_status("Archiving already running!")
+            return
+        files = self.selected_files()
+        if not files:
+            self.print_status("No data for selected date.")
+            return
+        total = sum(size for _, size in files)
+        subdir = self.subdir.currentText() if self.subdir.isEnabled() else ""
+        zipname = os.path.join(ARCHIVE_DIR, f"{subdir}_{self.selected_date()}.zip")
+        self.print_text(f"{len(files)} files, {total / 1e6:.1f} MB -> {zipname}")
+        self.progress.setValue(0)
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        members = [ (path, os.path.relpath(path, self.catalog.root)) for path, _ in files ]
+        self.shared_scheduler()
+        self.zip_thread = threading.Thread(target=self.run_zip, args=(zipname, members), daemon=True)
+        self.zip_thread.start()
+
+    # Runs in zip_thread
+    def run_zip(self, zipname: str, members: list):
+        import json
+        from qzip import ParallelZip
+        from qdedup import find_duplicates
+        from qscheduler import run_in_lane
+        from qjobs import BYTES, EXIT
+
+        t0 = time.perf_counter()
+        percent = -1
+        observe = observer("zip", NAME, zipname)
+        def progress(done: int, total: int):
+            nonlocal percent
+            observe((BYTES, done))
+            p = done * 100 // total if total else 100
+            if p != percent:
+                percent = p
+                self.signals.zip_progress.emit(p)
+        # Hashing and compression threads in a cpu slot of the shared scheduler
+        def archive(workers: int):
+            arcnames = dict(members)
+            dups = find_duplicates(list(arcnames), workers)
+            with ParallelZip(zipname, workers) as z:
+                z.write_files([ (path, arcnames[path]) for path in dups.unique ], progress)
+                if dups.aliases:
+                    manifest = { arcnames[d]: arcnames[o] for d, o in sorted(dups.aliases.items()) }
+                    z.write_data(MANIFEST, json.dumps(manifest, indent=1).encode("utf8"))
+            return dups, z
+        # zip_done() resets zip_thread, whatever happens here
+        code = 1
+        msg = f"ERROR: {zipname}: failed"
+        try:
+            dups, z = run_in_lane(f"zip {zipname}", archive, stage="archive")
+            self.archive_index().add_zip(zipname)
+            code = 0
+            dt = time.perf_counter() - t0
+            msg = f"{zipname}: {z.bytes_in / 1e6:.1f} MB in {dt:.1f}s, {z.bytes_in / 1e6 / dt:.1f} MB/s"
+            if dups.aliases:
+                msg += f", {len(dups.aliases)} duplicates, {dups.saved / 1e6:.1f} MB saved"
+        except Exception as e:
+            msg = f"ERROR: {zipname}: {e}"
+            if not isinstance(e, (OSError, RuntimeError)):
+                raise
+        finally:
+            observe((EXIT, code))
+            self.signals.zip_done.emit(msg)
+
+    def zip_done(self, msg: str):
+        self.zip_thread = None
+        self.progress.setValue(100)
+        self.print_text(msg)
+        self.print_status("Archiving done.")
+
+    # Pipeline, tasks for further dates are added to the running scheduler
+    def start_pipeline(self):
+        if not self.catalog:
+            self.print_status("Select data directory first!")
+            return
+        date = self.selected_date()
+        roots = self.catalog.night_roots(date)
+        if not roots:
+            self.print_status("No data for selected date.")
+            return
+        if self.scheduler is None:
+            from qschedview import SchedulerView
+            self.scheduler = self.shared_scheduler()
+            self.scheduler.add_listener(self.task_listener)
+            self.schedview = SchedulerView()
+            self.schedview_layout.addWidget(self.schedview)
+            self.schedview.set_scheduler(self.scheduler)
+        for task in self.pipeline_tasks(date, roots):
+            self.pipeline.add(task)
+            self.scheduler.add(task)
+        self.print_status(f"Pipeline for {date} started, {len(roots)} archives.")
+
+    def pipeline_tasks(self, date: str, roots: dict) -> list:
+        from qscheduler import Task, job_task, lane_threads
+        from qjobs import Job
+        from qvolumes import volume_options, volumes, first_volume, upload_volumes
+        from qcompress import profile_options, limit_threads
+        from qarchindex import record_archive
+
+        def scan(task):
+            for dir in self.catalog.night_dirs(date):
+                if task.cancelled():
+                    break
+                self.catalog.update_dir(dir)
+
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        scan_task = Task(f"scan {date}", scan, lane="io", stage="scan")
+        tasks = [ scan_task ]
+        for subdir, dirs in roots.items():
+            archive = os.path.join(ARCHIVE_DIR, f"{subdir}_{date}.7z")
+            def archive_func(task, archive=archive, subdir=subdir, dirs=dirs):
+                # Worker thread, volume options need rclone config and job history
+                total = sum(size for _, size in self.catalog.files(date, subdir))
+                options = (limit_threads(profile_options(), lane_threads(scheduler=self.scheduler))
+                           + volume_options(total, UPLOAD_DEST))
+                # 7z a would add to an archive left over from a previous run
+                for vol in volumes(archive):
+                    os.remove(vol)
+                return job_task(Job.seven_zip(archive, dirs, options), tool=NAME)(task)
+            def test_func(task, archive=archive):
+                code = job_task(Job.seven_zip_test(first_volume(archive)), tool=NAME)(task)
+                record_archive(archive)
+                return code
+            def upload_func(task, archive=archive):
+                code = upload_volumes(archive, UPLOAD_DEST, cancel=task.cancel_event, tool=NAME)
+                if code != 0 and not task.cancelled():
+                    raise RuntimeError(f"rclone exit code {code}")
+                record_archive(archive, UPLOAD_DEST, add=False)
+            a = Task(f"7z {archive}", archive_func, [ scan_task ], lane="cpu", stage="archive")
+            t = Task(f"test {archive}", test_func, [ a ], lane="cpu", stage="test")
+            u = Task(f"upload {archive}", upload_func, [ t ], lane="io", stage="upload")
+            tasks.extend([ a, t, u ])
+        return tasks
+
+    # Worker threads
+    def task_listener(self, task, state: str):
+        from qscheduler import RUNNING, FINAL
+        if task not in self.pipeline:
+            return
+        if state == RUNNING or state in FINAL:
+            msg = f"{task.name}: {state}"
+            if task.error:
+                msg += f" ({task.error})"
+            self.signals.task_state.emit(msg)
+        # Finished tasks are not needed anymore, set doesn't grow
+        if state in FINAL:
+            self.pipeline.discard(task)
+
+    # Exporter thread
+    def collect_metrics(self):
+        from qscheduler import PENDING, READY
+        if self.scheduler is None:
+            return
+        for stage, counts in self.scheduler.status()["stages"].items():
+            QUEUE_DEPTH.set(counts[PENDING] + counts[READY], tool=NAME, stage=stage)
+
+    def cancel_pipeline(self):
+        if self.scheduler:
+            self.scheduler.cancel(list(self.pipeline))
+
+
+    # Archive index search, results as list items with Location as data
+    def run_locate(self):
+        self.locate_results.clear()
+        query = self.locate.text().strip()
+        if not query:
+            self.locate_results.hide()
+            return
+        t0 = time.perf_counter()
+        found = self.archive_index().locate(query)
+        for loc in found:
+            vol = f", volume {loc.volume + 1}/{loc.volumes}" if loc.volumes > 1 else ""
+            remote = f", {loc.remote}" if loc.remote else ""
+            item = QListWidgetItem(f"{loc.path}  [{os.path.basename(loc.archive)}{vol}{remote}]")
+            item.setData(Qt.ItemDataRole.UserRole, loc)
+            self.locate_results.addItem(item)
+        self.locate_results.setVisible(bool(found))
+        self.print_status(f"Locate: {len(found)} files in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    def click_extract(self):
+        items = self.locate_results.selectedItems() or \
+                [ self.locate_results.item(i) for i in range(min(1, self.locate_results.count())) ]
+        if not items:
+            self.print_status("Locate a file first!")
+            return
+        locs = [ item.data(Qt.ItemDataRole.UserRole) for item in items ]
+        threading.Thread(target=self.run_extract, args=(locs,), daemon=True).start()
+
+    # Runs in thread, fetches volumes from remote if needed
+    def run_extract(self, locs: list):
+        import subprocess
+        for loc in locs:
+            try:
+                t0 = time.perf_counter()
+                target = self.archive_index().extract(loc, RESTORE_DIR)
+                self.signals.extract_done.emit(f"{target}: extracted in {time.perf_counter() - t0:.1f}s")
+            except (OSError, ValueError, subprocess.CalledProcessError) as e:
+                self.signals.extract_done.emit(f"ERROR: {loc.path}: {e}")
+
+
+    # True if no file of selected date was modified for READY_SECONDS,
+    # worker thread, files may be removed meanwhile
+    def data_ready(self, files: list) -> bool:
+        latest = None
+        for path, _ in files:
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            latest = mtime if latest is None else max(latest, mtime)
+        return latest is not None and time.time() - latest >= READY_SECONDS
+
+    def check_ready(self, files: list):
+        try:
+            self.signals.ready_check.emit(self.data_ready(files))
+        finally:
+            self.ready_thread = None
+
+    def ready_checked(self, ready: bool):
+        if ready and self.wait_ready and self.zip_thread is None:
+            self.wait_ready = False
+            self.start_zip()
+
+
     # Testing widgets
     def run_timer(self):
         ic("run_timer")
         # self.print_text("run_timer")
+        if self.wait_ready and self.zip_thread is None and self.ready_thread is None:
+            files = self.selected_files()
+            if files:
+                self.ready_thread = threading.Thread(target=self.check_ready, args=(files,), name="ready", daemon=True)
+                self.ready_thread.start()
 
 
 
 def main():
+    startup.mark("main")
     verbose.set_prog(NAME)
     verbose.enable()
 
     app = QApplication(sys.argv)
     # app.setStyle("Fusion")
     window = MainWindow()
+    startup.mark("window")
+    startup.watch(app, window)
     window.show()
     app.exec()
+    close_shared()
 
 
 
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Thumbnails of FITS frames and images, rendered with numpy/Pillow in
+#       a process pool. Content-addressed disk cache (key = partial content
+#       hash, size and thumbnail size), LRU eviction by access time with a
+#       size cap. No Qt imports, the module is loaded by the pool workers.
+#       Each render is a task in the cpu lane of the shared scheduler, the
+#       pool has one worker per cpu slot.
+#
+#       Usage:  thumbs = Thumbnailer(callback)      callback(path, thumbfile or None), from worker threads
+#               thumbs.request(path)
+#               thumbs.cancel()                     drop pending requests
+#               thumbs.shutdown()
+#               python qthumbs.py FILE...           render to cache, print thumbnail paths
+
+import os
+import mmap
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Local modules
+from qverbose import verbose, warning, error
+from qcache import cache_dir
+from qdedup import partial_hash
+from qfitsindex import is_fits, parse_value, BLOCK, CARD
+
+# numpy and Pillow are imported by the workers only
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qthumbs"
+
+
+
+THUMB_SIZE = 160
+CACHE_MB   = 256                # disk cache cap
+QUALITY    = 85                 # JPEG quality
+IMAGE_EXT  = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp")
+LOOKUPS    = 4                  # threads for hashing/cache lookup
+
+DTYPES = { 8: ">u1", 16: ">i2", 32: ">i4", 64: ">i8", -32: ">f4", -64: ">f8" }
+
+
+
+def is_image(path: str) -> bool:
+    return is_fits(path) or path.lower().endswith(IMAGE_EXT)
+
+
+##### Rendering, process pool workers #####
+# Header cards of primary HDU and data offset
+def fits_header(m) -> tuple:
+    header = {}
+    for block in range(0, len(m) - BLOCK + 1, BLOCK):
+        for pos in range(block, block + BLOCK, CARD):
+            key = m[pos:pos + 8].rstrip().decode("ascii", "replace")
+            if key == "END":
+                return header, block + BLOCK
+            if m[pos + 8:pos + 10] == b"= ":
+                header[key] = parse_value(m[pos + 10:pos + CARD].decode("ascii", "replace"))
+    raise ValueError("no END card")
+
+
+# First image plane, sampled down to about 2x the thumbnail size before
+# scaling, so only a fraction of the pixels is converted
+def fits_image(path: str, size: int):
+    import numpy as np
+    from PIL import Image
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        header, offset = fits_header(m)
+        bitpix = int(header.get("BITPIX", 0))
+        naxis = int(header.get("NAXIS", 0))
+        if naxis < 2 or bitpix not in DTYPES:
+            raise ValueError(f"unsupported FITS image (NAXIS={naxis}, BITPIX={bitpix})")
+        w, h = int(header["NAXIS1"]), int(header["NAXIS2"])
+        data = np.frombuffer(m, dtype=DTYPES[bitpix], count=w * h, offset=offset).reshape(h, w)
+        step = max(1, max(w, h) // (2 * size))
+        # Copy, releases the mmap buffer
+        data = data[::step, ::step].astype(np.float32)
+    data = data * float(header.get("BSCALE", 1.0)) + float(header.get("BZERO", 0.0))
+    # Stretch: clip to percentiles, asinh for faint structures
+    lo, hi = np.nanpercentile(data, (0.5, 99.8))
+    data = np.clip((data - lo) / ((hi - lo) or 1.0), 0.0, 1.0)
+    data = np.arcsinh(data * 10.0) / np.arcsinh(10.0)
+    # FITS origin is bottom left
+    img = Image.fromarray((data[::-1] * 255).astype(np.uint8), mode="L")
+    img.thumbnail((size, size))
+    return img
+
+
+def render(args: tuple) -> str:
+    path, thumbfile, size = args
+    from PIL import Image
+
+    if is_fits(path):
+        img = fits_image(path, size)
+    else:
+        img = Image.open(path)
+        img.draft("RGB", (size, size))
+        img.thumbnail((size, size))
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+    tmp = f"{thumbfile}.{os.getpid()}.tmp"
+    img.save(tmp, "JPEG", quality=QUALITY)
+    os.replace(tmp, thumbfile)
+    return thumbfile
+
+
+
+##### Disk cache #####
+class ThumbCache:
+    def __init__(self, dir: str=None, cap_mb: int=CACHE_MB):
+        self.dir = dir or cache_dir("thumbs")
+        self.cap = cap_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        self.total = sum(e.stat().st_size for e in os.scandir(self.dir) if e.name.endswith(".jpg"))
+
+    # Same content at another path or after copying gives the same key
+    def key(self, path: str, size: int=THUMB_SIZE) -> str:
+        h = hashlib.blake2b(partial_hash(path), digest_size=16)
+        h.update(f"{os.path.getsize(path)}:{size}".encode())
+        return h.hexdigest()
+
+    def file(self, key: str) -> str:
+        return os.path.join(self.dir, key + ".jpg")
+
+    # Hit updates access time for LRU
+    def lookup(self, key: str) -> str:
+        thumbfile = self.file(key)
+        try:
+            os.utime(thumbfile)
+            return thumbfile
+        except OSError:
+            return None
+
+    def added(self, thumbfile: str):
+        with self.lock:
+            self.total += os.path.getsize(thumbfile)
+            if self.total > self.cap:
+                self.evict()
+
+    # Least recently used first, down to 90% of cap
+    def evict(self):
+        entries = sorted((e for e in os.scandir(self.dir) if e.name.endswith(".jpg")),
+                         key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in entries)
+        removed = 0
+        for e in entries:
+            if total <= self.cap * 0.9:
+                break
+            try:
+                size = e.stat().st_size
+                os.remove(e.path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        self.total = total
+        verbose(f"thumbnail cache: {removed} evicted, {total / 1e6:.0f} MB")
+
+
+
+##### Request handling #####
+class Thumbnailer:
+    def __init__(self, callback, size: int=THUMB_SIZE, workers: int=None, cache: ThumbCache=None,
+                 scheduler=None):
+        self.callback = callback
+        self.size = size
+        self.workers = workers
+        self.scheduler = scheduler
+        self.cache = cache or ThumbCache()
+        self.keys = {}                  # (path, mtime, size) -> key
+        self.lookups = ThreadPoolExecutor(LOOKUPS, thread_name_prefix=NAME)
+        self.pool = None
+        self.generation = 0             # requests of older generations are dropped
+        self.renders = set()            # scheduler tasks
+        self.lock = threading.Lock()    # keys, pool, renders
+
+    def request(self, path: str):
+        self.lookups.submit(self._lookup, path, self.generation)
+
+    # Renders not yet started are cancelled, running ones are not reported
+    def cancel(self):
+        with self.lock:
+            self.generation += 1
+            renders = list(self.renders)
+            self.renders.clear()
+        if renders:
+            self.scheduler.cancel(renders)
+
+    def shutdown(self):
+        self.cancel()
+        self.lookups.shutdown(wait=False, cancel_futures=True)
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    # Lookup thread
+    def _lookup(self, path: str, generation: int):
+        if generation != self.generation:
+            return
+        try:
+            st = os.stat(path)
+            ident = (path, st.st_mtime, st.st_size)
+            with self.lock:
+                key = self.keys.get(ident)
+            if key is None:
+                key = self.cache.key(path, self.size)
+                with self.lock:
+                    self.keys[ident] = key
+        except OSError as e:
+            warning(f"{path}: {e}")
+            self.callback(path, None)
+            return
+        thumbfile = self.cache.lookup(key)
+        if thumbfile:
+            self.callback(path, thumbfile)
+            return
+        from qscheduler import Task, shared_scheduler
+        with self.lock:
+            # Night changed during the lookup
+            if generation != self.generation:
+                return
+            if self.scheduler is None:
+                self.scheduler = shared_scheduler()
+            if self.pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self.pool = ProcessPoolExecutor(self.workers or self.scheduler.lanes["cpu"])
+            task = Task(f"thumbnail {os.path.basename(path)}", self._render_func(path, key, generation),
+                        lane="cpu", stage="thumbs")
+            self.renders.add(task)
+        self.scheduler.add(task)
+
+    # Scheduler worker thread, holds the cpu slot while the pool renders
+    def _render_func(self, path: str, key: str, generation: int):
+        def func(task):
+            try:
+                if generation != self.generation:
+                    return
+                try:
+                    thumbfile = self.pool.submit(render, (path, self.cache.file(key), self.size)).result()
+                except Exception as e:
+                    verbose(f"{path}: no thumbnail: {e}")
+                    thumbfile = None
+                if thumbfile:
+                    self.cache.added(thumbfile)
+                if generation == self.generation and not task.cancelled():
+                    self.callback(path, thumbfile)
+            finally:
+                with self.lock:
+                    self.renders.discard(task)
+        return func
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Render thumbnails of FITS frames and images to cache",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-s", "--size", type=int, default=THUMB_SIZE, help=f"thumbnail size (default {THUMB_SIZE})")
+    arg.add_argument("files", nargs="+", help="FITS/image files")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose)
+
+    done = threading.Semaphore(0)
+    def callback(path: str, thumbfile: str):
+        print(f"{path} -> {thumbfile}")
+        done.release()
+
+    t0 = time.perf_counter()
+    thumbs = Thumbnailer(callback, args.size)
+    files = [ f for f in args.files if is_image(f) ]
+    for f in files:
+        thumbs.request(f)
+    for _ in files:
+        done.acquire()
+    thumbs.shutdown()
+    verbose(f"{len(files)} thumbnails in {time.perf_counter() - t0:.2f}s")
+
+
+
+if __name__ == "__main__":
+    main()
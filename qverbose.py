@@ -36,27 +36,61 @@
 #       New:
 #               .set_widget(w)          set PyQt6 QPlainTextEdit widget for logging
 #               .set_stdout(flag)       enable print() output
+# Version 1.1 / 2026-10-19
+#       PyQt6 is imported for type checking only, so headless tools
+#       do not load QtWidgets
+# Version 1.2 / 2026-10-19
+#       Thread-safe: messages are passed to the widgets via a queued Qt
+#       signal, print() is serialized. Several widgets can be attached,
+#       a shared widget (tool host) ignores later .set_widget() calls.
+#       New:
+#               .add_widget(w)          additional QPlainTextEdit widget
+#               .set_shared_widget(w)   single log for all tools in one process
+# Version 1.3 / 2026-10-19
+#       New:
+#               .set_file(f)            print() to file, e.g. sys.stderr
+#                                       while stdout carries JSON output
 
 import sys
+import threading
+from typing import TYPE_CHECKING
 
 # The following libs must be installed with pip
 
-# PyQt6
-from PyQt6.QtWidgets import QPlainTextEdit
+# PyQt6, only needed for type hints
+if TYPE_CHECKING:
+    from PyQt6.QtWidgets import QPlainTextEdit
 
 
 
 global VERSION, AUTHOR, NAME
-VERSION = "1.0 / 2024-10-10"
+VERSION = "1.3 / 2026-10-19"
 AUTHOR  = "Martin Junius"
 NAME    = "qverbose"
 
 
 
+# QObject with signal, created with the first widget, so QtCore is only
+# loaded by GUI tools. Emitting from a worker thread queues the message to
+# the widgets' (GUI) thread.
+def _make_sink():
+    from PyQt6.QtCore import QObject, pyqtSignal
+
+    class Sink(QObject):
+        message = pyqtSignal(str)
+
+    return Sink()
+
+
+
 class Verbose:
     progname = None             # global program name
     stdout = False              # Use print()
-    pyqt = None                 # QPlainTextEdit widget to show messages
+    file = None                 # print() to this file, default sys.stdout
+    pyqt = None                 # Sink for QPlainTextEdit widgets to show messages
+    widgets = []
+    shared = False              # widget set by .set_shared_widget()
+    lock = threading.Lock()
 
 
     def __init__(self, flag : bool=False, prefix : str=None, abort : bool=False):
@@ -77,9 +111,10 @@ class Verbose:
         txt = " ".join(txt_list)
 
         if Verbose.stdout:
-            print(txt)
+            with Verbose.lock:
+                print(txt, file=Verbose.file or sys.stdout, flush=Verbose.file is not None)
         if Verbose.pyqt:
-            Verbose.pyqt.appendPlainText(txt)
+            Verbose.pyqt.message.emit(txt)
 
         if self.abort:
             self._exit()
@@ -96,16 +131,42 @@ class Verbose:
     def set_errno(self, errno: int):
         self.errno = errno
 
-    def set_widget(self, widget: QPlainTextEdit):
-        Verbose.pyqt = widget
+    def set_widget(self, widget: "QPlainTextEdit"):
+        if Verbose.shared:
+            return
+        with Verbose.lock:
+            if Verbose.pyqt:
+                for w in Verbose.widgets:
+                    try:
+                        Verbose.pyqt.message.disconnect(w.appendPlainText)
+                    except (TypeError, RuntimeError):
+                        pass            # widget already deleted
+            Verbose.widgets = []
+        self.add_widget(widget)
+
+    def add_widget(self, widget: "QPlainTextEdit"):
+        with Verbose.lock:
+            if Verbose.pyqt is None:
+                Verbose.pyqt = _make_sink()
+            Verbose.pyqt.message.connect(widget.appendPlainText)
+            Verbose.widgets.append(widget)
+
+    def set_shared_widget(self, widget: "QPlainTextEdit"):
+        Verbose.shared = False
+        self.set_widget(widget)
+        Verbose.shared = True
 
     def set_stdout(self, flag: bool=True):
         Verbose.stdout = flag
 
+    def set_file(self, file):
+        Verbose.file = file
+
     def _exit(self):
+        file = Verbose.file or sys.stdout
         if Verbose.progname:
-            print(Verbose.progname + ": ", end="")
-        print(f"exiting ({self.errno})")
+            print(Verbose.progname + ": ", end="", file=file)
+        print(f"exiting ({self.errno})", file=file)
         sys.exit(self.errno)
 
 
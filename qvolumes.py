@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Multi-volume archives: 7z -v volume size chosen from total size,
+#       measured upload throughput (qmetrics history) and the remote's
+#       multipart chunk size / upload cutoff. Volumes are uploaded by one
+#       rclone copy with parallel transfers, a retry only sends the volumes
+#       missing or different on the remote.
+#       Measured throughput is that of the whole job, the volume size uses
+#       its share per transfer.
+#
+#       Usage:  options = volume_options(total, "iasdata:test-upload/tmp")
+#               Job.seven_zip("tmp/test.7z", sources, options)
+#               upload_volumes("tmp/test.7z", "iasdata:test-upload/tmp")
+#               python qvolumes.py -s 12000 iasdata:test-upload/tmp   show volume size for 12 GB
+#               python qvolumes.py -B 500 --bwlimit-file 20M          benchmark against single archive
+
+import os
+import re
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# Local modules
+from qverbose import verbose, warning, error
+from qjobs import Job, RCLONE, run_blocking
+from qmetrics import remote_of, run_recorded
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qvolumes"
+
+
+
+MB  = 1000 * 1000
+MiB = 1024 * 1024
+
+TARGET_SECONDS     = 60         # upload time per volume, bounds the cost of a retry
+VOLUMES_PER_STREAM = 2          # keep all transfers busy until the end
+MIN_VOLUME         = 64 * MiB
+MAX_VOLUME         = 4096 * MiB
+TRANSFERS          = 4          # parallel rclone transfers
+RETRIES            = 3
+DEFAULT_THROUGHPUT = 10 * MB    # per transfer, without history
+THROUGHPUT_MONTHS  = 2          # upload history read for the throughput
+
+# Multipart characteristics per rclone backend type: (chunk size, upload cutoff),
+# rclone defaults. Files above the cutoff are uploaded in chunks, a volume
+# should be a multiple of the chunk size or fit into a single-part upload.
+PROFILES = {
+    "local":    (0, 0),
+    "s3":       (5 * MiB, 200 * MiB),
+    "b2":       (96 * MiB, 200 * MiB),
+    "swift":    (5120 * MiB, 5120 * MiB),
+    "drive":    (8 * MiB, 8 * MiB),
+    "onedrive": (10 * MiB, 0),
+    "webdav":   (0, 0),
+    "sftp":     (0, 0),
+}
+DEFAULT_PROFILE = "s3"
+
+_remote_types = None
+
+
+
+# Backend type of remote from "rclone config dump", local paths are "local"
+def remote_type(dest: str, program: str=None) -> str:
+    global _remote_types
+    remote = remote_of(dest)
+    if remote == "local":
+        return "local"
+    if _remote_types is None:
+        try:
+            out = subprocess.run([ program or RCLONE, "config", "dump" ], capture_output=True, check=True).stdout
+            _remote_types = { name: conf.get("type", "") for name, conf in json.loads(out).items() }
+        except (OSError, subprocess.CalledProcessError, ValueError) as e:
+            warning(f"rclone config dump: {e}")
+            _remote_types = {}
+    return _remote_types.get(remote, DEFAULT_PROFILE)
+
+
+# Median throughput of successful rclone jobs to this remote (whole job,
+# all transfers), without history DEFAULT_THROUGHPUT for each transfer
+def measured_throughput(dest: str) -> float:
+    try:
+        from qmetrics import MetricsStore
+        df = MetricsStore().jobs([ "kind", "remote", "throughput", "exit_code" ], months=THROUGHPUT_MONTHS)
+    except (ImportError, OSError) as e:
+        verbose(f"no job history: {e}")
+        return DEFAULT_THROUGHPUT * TRANSFERS
+    df = df[(df["kind"] == "rclone") & (df["remote"] == remote_of(dest)) & (df["exit_code"] == 0)]
+    df = df[df["throughput"] > 0]
+    if df.empty:
+        return DEFAULT_THROUGHPUT * TRANSFERS
+    return float(df["throughput"].tail(20).median())
+
+
+# Volume size in bytes, 0 = single archive. throughput of the whole job,
+# each transfer uploads its volume at a share of it.
+def volume_size(total: int, throughput: float, rtype: str, transfers: int=TRANSFERS) -> int:
+    if total <= MIN_VOLUME * VOLUMES_PER_STREAM:
+        return 0
+    chunk, cutoff = PROFILES.get(rtype, PROFILES[DEFAULT_PROFILE])
+    size = throughput / transfers * TARGET_SECONDS
+    size = min(size, total / (transfers * VOLUMES_PER_STREAM))
+    size = max(size, MIN_VOLUME)
+    # Single-part upload if the volume is close to the cutoff
+    if cutoff and cutoff < size < 2 * cutoff:
+        size = cutoff
+    elif chunk:
+        size = -(-size // chunk) * chunk
+    size = min(size, MAX_VOLUME)
+    return int(size // MiB) * MiB
+
+
+def volume_options(total: int, dest: str, transfers: int=TRANSFERS, program: str=None) -> list:
+    rtype = remote_type(dest, program)
+    throughput = measured_throughput(dest)
+    size = volume_size(total, throughput, rtype, transfers)
+    verbose(f"{total / MB:.0f} MB to {dest} ({rtype}, {throughput / MB:.1f} MB/s): "
+            + (f"volumes of {size // MiB} MiB" if size else "single archive"))
+    return [ f"-v{size // MiB}m" ] if size else []
+
+
+# Total size of files and directory trees
+def tree_size(paths: list) -> int:
+    total = 0
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                total += sum(os.path.getsize(os.path.join(dirpath, f)) for f in filenames)
+        elif os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+
+# archive.7z.001, archive.7z.002, ... or archive itself
+def volumes(archive: str) -> list:
+    vols = sorted(glob.glob(glob.escape(archive) + ".[0-9][0-9][0-9]"))
+    return vols or ([ archive ] if os.path.exists(archive) else [])
+
+def first_volume(archive: str) -> str:
+    vols = volumes(archive)
+    return vols[0] if vols else archive
+
+
+# rclone copy of archive and its volumes, parallel transfers. rclone's own
+# retries copy only the files still missing or different on the remote.
+def rclone_volumes(archive: str, dest: str, transfers: int=TRANSFERS, retries: int=RETRIES,
+                   options: list=None, program: str=None) -> Job:
+    name = re.sub(r"([\\*?\[\]{}])", r"\\\1", os.path.basename(archive))
+    opts = [ "--include", name, "--include", name + ".[0-9][0-9][0-9]",
+             "--transfers", str(transfers), "--retries", str(retries) ] + (options or [])
+    # Without -I, retries skip the volumes already uploaded
+    job = Job.rclone(os.path.dirname(archive) or ".", dest, opts, program, ignore_times=False)
+    job.info["source"] = archive
+    return job
+
+
+# Blocking upload, repeated until no volume failed, each attempt sends only
+# the volumes not yet on the remote
+def upload_volumes(archive: str, dest: str, transfers: int=TRANSFERS, retries: int=RETRIES,
+                   callback=None, cancel=None, options: list=None, program: str=None, tool: str=None) -> int:
+    code = 0
+    for attempt in range(retries):
+        job = rclone_volumes(archive, dest, transfers, 1, options, program)
+        code = run_recorded(job, callback, cancel, tool=tool)
+        if code == 0 or (cancel is not None and cancel.is_set()):
+            break
+        warning(f"upload {archive} attempt {attempt + 1} failed, exit code {code}")
+    return code
+
+
+
+def benchmark(total_mb: int, transfers: int, options: list, dest: str=None):
+    from qzip import make_testdata
+
+    tmp = tempfile.mkdtemp(prefix=NAME)
+    try:
+        data = os.path.join(tmp, "data")
+        os.mkdir(data)
+        make_testdata(data, total_mb)
+        total = sum(os.path.getsize(os.path.join(data, f)) for f in os.listdir(data))
+        vol = volume_size(total, DEFAULT_THROUGHPUT * transfers, "local", transfers) or MIN_VOLUME
+        results = []
+        for label, vopts in (("single", []), (f"volumes {vol // MiB}M", [ f"-v{vol // MiB}m" ])):
+            dir = os.path.join(tmp, label.split()[0])
+            os.mkdir(dir)
+            archive = os.path.join(dir, "test.7z")
+            t0 = time.perf_counter()
+            code = run_blocking(Job.seven_zip(archive, [ data ], [ "-mx1" ] + vopts))
+            t_7z = time.perf_counter() - t0
+            if code != 0:
+                error(f"7z exit code {code}")
+            remote = os.path.join(dest or tmp, "remote-" + label.split()[0])
+            t0 = time.perf_counter()
+            code = upload_volumes(archive, remote, transfers, options=options)
+            t_up = time.perf_counter() - t0
+            if code != 0:
+                error(f"rclone exit code {code}")
+            size = sum(os.path.getsize(v) for v in volumes(archive))
+            results.append((label, len(volumes(archive)), size, t_7z, t_up))
+
+        print(f"data: {total / MB:.0f} MB, {transfers} transfers, rclone options {' '.join(options) or '-'}")
+        for label, n, size, t_7z, t_up in results:
+            print(f"{label:14s} {n:4d} files {size / MB:7.0f} MB  7z {t_7z:6.1f}s  "
+                  f"upload {t_up:6.1f}s {size / MB / t_up:7.1f} MB/s")
+        print(f"upload speedup {results[0][4] / results[1][4]:.1f}x")
+    finally:
+        shutil.rmtree(tmp)
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Volume size selection and parallel upload of multi-volume archives",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-t", "--transfers", type=int, default=TRANSFERS, help=f"parallel transfers (default {TRANSFERS})")
+    arg.add_argument("-s", "--size", type=int, metavar="MB", help="show volume size for total size MB")
+    arg.add_argument("-B", "--benchmark", type=int, metavar="MB", help="benchmark volumes against single archive, rclone local backend")
+    arg.add_argument("--bwlimit-file", help="rclone per-transfer bandwidth limit for benchmark, e.g. 20M")
+    arg.add_argument("dest", nargs="?", help="rclone destination remote:path, benchmark: local directory")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose)
+
+    if args.benchmark:
+        options = [ "--bwlimit-file", args.bwlimit_file ] if args.bwlimit_file else []
+        benchmark(args.benchmark, args.transfers, options, args.dest)
+    elif args.size:
+        if not args.dest:
+            arg.error("dest required")
+        verbose.enable()
+        print(volume_options(args.size * MB, args.dest, args.transfers))
+    else:
+        arg.print_help()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Event loop stall watchdog: a high-frequency QTimer measures dispatch
+#       drift, a helper thread samples the GUI thread's Python stack while
+#       the timer is late and attributes the stall to a function
+#
+#       Usage:  self.watchdog = StallWatchdog(self)
+#               self.watchdog.add_actions(menu_options)     "Watchdog", "Export stall summary..."
+#               self.watchdog.start() / .stop()
+
+import os
+import sys
+import time
+import threading
+
+# Local modules
+from qverbose import verbose, warning, error
+
+# PyQt6 must be installed with pip
+from PyQt6.QtCore    import QObject, QTimer, Qt
+from PyQt6.QtGui     import QAction
+from PyQt6.QtWidgets import QFileDialog, QWidget
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qwatchdog"
+
+
+
+INTERVAL_MS  = 10           # timer interval
+THRESHOLD_MS = 100          # drift reported as stall
+SAMPLE_MS    = 5            # stack sampling interval during stall
+
+# Frames from these files are used for attribution
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+
+# Innermost function from our own source files, e.g. "print_text (qrun-7z.py:180)"
+def attribute(frame) -> str:
+    innermost = None
+    while frame is not None:
+        code = frame.f_code
+        if innermost is None:
+            innermost = f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+        if os.path.dirname(os.path.abspath(code.co_filename)) == SOURCE_DIR and \
+           not code.co_filename.endswith(os.path.basename(__file__)):
+            return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+        frame = frame.f_back
+    # Only Qt event loop, i.e. stall in C++ code
+    return innermost or "<Qt event loop>"
+
+
+
+class StallWatchdog(QObject):
+    def __init__(self, parent: QWidget=None, threshold_ms: int=THRESHOLD_MS):
+        super().__init__(parent)
+        self.window = parent
+        self.threshold = threshold_ms / 1000
+        self.gui_ident = threading.get_ident()
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(INTERVAL_MS)
+        self.timer.timeout.connect(self.tick)
+        self.thread = None
+        self.running = False
+        self.last_tick = 0.0
+        self.samples = {}               # function -> count, for current stall
+        self.lock = threading.Lock()
+        self.stalls = []                # (time, duration, function)
+        self.max_drift = 0.0
+
+
+    def add_actions(self, menu):
+        menu.addSeparator()
+        action = QAction("Watchdog", self, checkable=True, checked=self.running)
+        action.triggered.connect(self.toggle)
+        menu.addAction(action)
+        action = QAction("Export stall summary...", self)
+        action.triggered.connect(self.export_dialog)
+        menu.addAction(action)
+
+    def toggle(self, checked: bool):
+        if checked:
+            self.start()
+        else:
+            self.stop()
+
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.last_tick = time.perf_counter()
+        self.timer.start()
+        self.thread = threading.Thread(target=self.sampler, name=NAME, daemon=True)
+        self.thread.start()
+        verbose(f"watchdog started, threshold {self.threshold * 1000:.0f}ms")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.timer.stop()
+        self.thread.join()
+        self.thread = None
+        verbose(f"watchdog stopped, {len(self.stalls)} stalls")
+
+
+    # GUI thread
+    def tick(self):
+        now = time.perf_counter()
+        drift = now - self.last_tick - INTERVAL_MS / 1000
+        self.last_tick = now
+        self.max_drift = max(self.max_drift, drift)
+        if drift < self.threshold:
+            return
+        with self.lock:
+            samples = self.samples
+            self.samples = {}
+        func = max(samples, key=samples.get) if samples else "<unknown>"
+        self.stalls.append((time.time(), drift, func))
+        warning(f"GUI stalled {drift * 1000:.0f}ms in {func}")
+
+
+    # Helper thread, samples the GUI thread's stack while the timer is late
+    def sampler(self):
+        while self.running:
+            time.sleep(SAMPLE_MS / 1000)
+            if time.perf_counter() - self.last_tick < self.threshold:
+                continue
+            frame = sys._current_frames().get(self.gui_ident)
+            if frame is None:
+                continue
+            func = attribute(frame)
+            del frame
+            with self.lock:
+                self.samples[func] = self.samples.get(func, 0) + 1
+
+
+    # function -> (count, total s, max s), sorted by total
+    def summary(self) -> list:
+        funcs = {}
+        for _, duration, func in self.stalls:
+            n, total, mx = funcs.get(func, (0, 0.0, 0.0))
+            funcs[func] = (n + 1, total + duration, max(mx, duration))
+        return sorted(((f,) + v for f, v in funcs.items()), key=lambda r: r[2], reverse=True)
+
+    def export(self, filename: str):
+        with open(filename, "w") as f:
+            f.write(f"# {NAME} stall summary, threshold {self.threshold * 1000:.0f}ms, "
+                    f"max drift {self.max_drift * 1000:.0f}ms\n")
+            f.write("function;stalls;total_ms;max_ms\n")
+            for func, n, total, mx in self.summary():
+                f.write(f"{func};{n};{total * 1000:.0f};{mx * 1000:.0f}\n")
+            f.write("\n# time;duration_ms;function\n")
+            for t, duration, func in self.stalls:
+                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t))};{duration * 1000:.0f};{func}\n")
+        verbose(f"stall summary -> {filename}")
+
+    def export_dialog(self):
+        filename, _ = QFileDialog.getSaveFileName(self.window, "Export stall summary", "stalls.csv",
+                                                  "CSV Files (*.csv)")
+        if filename:
+            self.export(filename)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       Host for qtestcal, qrun-7z and qrun-rclone in one process: one
+#       QApplication, tool windows as tabs (loaded when first selected),
+#       one log dock for all tools (qverbose shared widget), one scheduler
+#       with global CPU/IO lane limits and scheduler view dock, one set of
+#       shared indexes/caches (qshared) and one Prometheus exporter
+#
+#       Usage:  python qworkbench.py
+#               python qworkbench.py --cpu 2 --io 4 qtestcal.py qrun-7z.py
+
+# Startup timing, must be imported first
+from qstartup import startup
+
+import os
+import sys
+import argparse
+import importlib.util
+
+# Local modules
+from qverbose import verbose, warning, error
+from qwatchdog import StallWatchdog
+from qscheduler import shared_scheduler, DEFAULT_LANES
+from qschedview import SchedulerView
+from qshared import close_shared
+from qprometheus import start_exporter
+
+# PyQt6 must be installed with pip
+from PyQt6.QtCore    import Qt
+from PyQt6.QtGui     import QAction, QCloseEvent
+from PyQt6.QtWidgets import (
+    QApplication,
+    QMainWindow,
+    QPlainTextEdit,
+    QTabWidget,
+    QDockWidget,
+    QLabel,
+    QMessageBox
+)
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qworkbench"
+
+
+
+TOOLS      = [ "qtestcal.py", "qrun-7z.py", "qrun-rclone.py" ]
+LOG_LINES  = 10000              # shared log is bounded
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+
+# Tool script as module, e.g. qrun-7z.py -> qrun_7z. Its main() is not run.
+def load_tool(tool: str):
+    name = os.path.splitext(os.path.basename(tool))[0].replace("-", "_")
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SOURCE_DIR, tool))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+
+class MainWindow(QMainWindow):
+    def __init__(self, tools: list):
+        super().__init__()
+
+        # Size
+        self.setMinimumSize(900, 700)
+        self.setWindowTitle(f"{NAME} {VERSION}")
+
+        # Shared log, set before the tools are created, their own
+        # set_widget() calls are ignored
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setMaximumBlockCount(LOG_LINES)
+        verbose.set_shared_widget(self.text)
+        dock = QDockWidget("Log", self)
+        dock.setWidget(self.text)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock)
+
+        # Scheduler with global limits, created before the tools
+        self.scheduler = shared_scheduler()
+        self.schedview = SchedulerView()
+        self.schedview.set_scheduler(self.scheduler)
+        sched_dock = QDockWidget("Scheduler", self)
+        sched_dock.setWidget(self.schedview)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, sched_dock)
+
+        # Tool windows as tabs, created when the tab is first selected
+        self.tools = tools
+        self.windows = {}               # tab index -> tool MainWindow
+        self.tabs = QTabWidget()
+        for tool in tools:
+            self.tabs.addTab(QLabel(f"Loading {tool} ..."), os.path.splitext(tool)[0])
+        self.tabs.currentChanged.connect(self.load_tab)
+        self.setCentralWidget(self.tabs)
+
+        # Menu bar
+        menu = self.menuBar()
+
+        menu_file = menu.addMenu("&File")
+        menu_quit = QAction("Quit", self)
+        menu_quit.setShortcut("Ctrl+Q")
+        menu_quit.triggered.connect(self.close)
+        menu_file.addAction(menu_quit)
+
+        menu_view = menu.addMenu("&View")
+        menu_view.addAction(dock.toggleViewAction())
+        menu_view.addAction(sched_dock.toggleViewAction())
+
+        menu_options = menu.addMenu("&Options")
+        menu_verbose = QAction("Verbose", self, checkable=True, checked=verbose.enabled)
+        menu_verbose.triggered.connect(self.toggle_verbose)
+        menu_options.addAction(menu_verbose)
+        self.watchdog = StallWatchdog(self)
+        self.watchdog.add_actions(menu_options)
+
+        # First exporter of the process, the tools share it
+        self.exporter = start_exporter(NAME)
+
+        # Status bar
+        self.statusBar().setEnabled(True)
+        self.print_status(f"lanes {self.scheduler.lanes}")
+
+        self.load_tab(0)
+        verbose("READY.")
+
+
+    # Catch closeEvent, asked once for all tools
+    def closeEvent(self, event: QCloseEvent):
+        if not self.yes_no_dialog("Really quit?"):
+            event.ignore()
+            self.print_status("Quit cancelled.")
+            return
+        for window in self.windows.values():
+            # Tools ask themselves otherwise
+            window.yes_no_dialog = lambda question: True
+            window.close()
+        self.watchdog.stop()
+        if self.exporter:
+            self.exporter.stop()
+        event.accept()
+
+
+    def load_tab(self, i: int):
+        if i < 0 or i in self.windows:
+            return
+        tool = self.tools[i]
+        startup.mark(tool)
+        try:
+            mod = load_tool(tool)
+            window = mod.MainWindow()
+        except Exception as e:
+            warning(f"{tool}: {e}")
+            return
+        # Embedded as widget, keeps its own menu and status bar
+        window.setWindowFlags(Qt.WindowType.Widget)
+        self.windows[i] = window
+        self.tabs.blockSignals(True)
+        self.tabs.widget(i).deleteLater()
+        self.tabs.removeTab(i)
+        self.tabs.insertTab(i, window, os.path.splitext(tool)[0])
+        self.tabs.setCurrentIndex(i)
+        self.tabs.blockSignals(False)
+        verbose(f"{tool} {mod.VERSION} loaded")
+
+
+    def toggle_verbose(self):
+        option_v = self.sender().isChecked()
+        self.print_status("Verbose", "enabled" if option_v else "disabled")
+        verbose.enable(option_v)
+
+
+    # Dialogs
+    def yes_no_dialog(self, question: str):
+        dlg = QMessageBox(self)
+        dlg.setWindowTitle(f"{NAME}")
+        dlg.setText(question)
+        dlg.setStandardButtons(
+            QMessageBox.StandardButton.Yes
+            | QMessageBox.StandardButton.No
+        )
+        dlg.setIcon(QMessageBox.Icon.Question)
+        button = dlg.exec()
+        # Look up the button enum entry for the result.
+        button = QMessageBox.StandardButton(button)
+        return button == QMessageBox.StandardButton.Yes
+
+
+    # Helper methods
+    def print_status(self, *args):
+        self.statusBar().showMessage(" ".join(args))
+
+
+
+def main():
+    startup.mark("main")
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Run the workbench tools in one process",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("--cpu", type=int, default=DEFAULT_LANES["cpu"], help=f"parallel CPU tasks of all tools (default {DEFAULT_LANES['cpu']})")
+    arg.add_argument("--io", type=int, default=DEFAULT_LANES["io"], help=f"parallel I/O tasks of all tools (default {DEFAULT_LANES['io']})")
+    arg.add_argument("tools", nargs="*", default=TOOLS, help=f"tool scripts (default {' '.join(TOOLS)})")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.enable()
+
+    # Global limits, the tools get this scheduler from shared_scheduler()
+    shared_scheduler({ "cpu": args.cpu, "io": args.io })
+
+    app = QApplication(sys.argv[:1])
+    window = MainWindow(args.tools)
+    startup.mark("window")
+    startup.watch(app, window)
+    window.show()
+    app.exec()
+    close_shared()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+
+# Copyright 2024 Martin Junius
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# ChangeLog
+# Version 0.1 / 2026-10-19
+#       In-process parallel ZIP64 writer. Files are split into chunks,
+#       compressed in a thread pool (zlib releases the GIL) and written
+#       in order by a single writer, in-flight data is bounded.
+#       No central directory for a failed write, the partial file is removed.
+#
+#       Usage:  z = ParallelZip("out.zip", workers=8, level=6)
+#               z.write_files([ (path, arcname), ... ], progress=callback)
+#               z.write_data(arcname, data)     e.g. manifest
+#               z.close()
+#               with ParallelZip(...) as z:     archive removed if the body raises
+#               python qzip.py --benchmark 500     compare with zipfile
+
+import os
+import sys
+import time
+import zlib
+import struct
+import random
+import shutil
+import zipfile
+import tempfile
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Local modules
+from qverbose import verbose, warning, error
+
+
+
+VERSION = "0.1 / 2026-10-19"
+AUTHOR  = "Martin Junius"
+NAME    = "qzip"
+
+
+
+CHUNK        = 4 * 1024 * 1024          # compression unit
+MAX_INFLIGHT = 128 * 1024 * 1024        # raw bytes submitted but not yet written
+STORE_EXT    = (".zip", ".7z", ".gz", ".bz2", ".xz", ".jpg", ".jpeg", ".png", ".fz")
+
+ZIP64_LIMIT = 0xFFFFFFFF
+DEFLATED    = 8
+STORED      = 0
+
+
+
+##### CRC-32 combine, port of zlib's crc32_combine() #####
+def _gf2_times(mat: list, vec: int) -> int:
+    s = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            s ^= mat[i]
+        vec >>= 1
+        i += 1
+    return s
+
+def _gf2_square(mat: list) -> list:
+    return [ _gf2_times(mat, mat[n]) for n in range(32) ]
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    if len2 <= 0:
+        return crc1
+    odd = [ 0xEDB88320 ] + [ 1 << n for n in range(31) ]
+    even = _gf2_square(odd)
+    odd = _gf2_square(even)
+    while True:
+        even = _gf2_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+        odd = _gf2_square(even)
+        if len2 & 1:
+            crc1 = _gf2_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+    return crc1 ^ crc2
+
+
+
+def dos_datetime(mtime: float) -> tuple:
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return (0, (1 << 5) | 1)
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+# Worker: read and compress one chunk, raw deflate stream without final block
+# unless last chunk, so that chunks can be concatenated
+def compress_chunk(path: str, offset: int, length: int, method: int, level: int, last: bool) -> tuple:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    crc = zlib.crc32(data)
+    if method == STORED:
+        return (crc, len(data), data)
+    c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    out = c.compress(data) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return (crc, len(data), out)
+
+
+
+class Member:
+    def __init__(self, arcname: str, mtime: float, method: int, offset: int):
+        self.arcname = arcname
+        self.mtime = mtime
+        self.method = method
+        self.offset = offset
+        self.crc = 0
+        self.size = 0
+        self.csize = 0
+
+
+
+class ParallelZip:
+    def __init__(self, filename: str, workers: int=None, level: int=6,
+                 max_inflight: int=MAX_INFLIGHT, chunk: int=CHUNK):
+        self.filename = filename
+        self.workers = workers or os.cpu_count() or 4
+        self.level = level
+        self.max_inflight = max_inflight
+        self.chunk = chunk
+        self.f = open(filename, "wb")
+        self.members = []
+        self.bytes_in = 0
+        self.peak_inflight = 0
+
+
+    # files = list of (path, arcname), progress(done_bytes, total_bytes)
+    def write_files(self, files: list, progress=None):
+        total = 0
+        jobs = []
+        for path, arcname in files:
+            st = os.stat(path)
+            total += st.st_size
+            jobs.append((path, arcname, st.st_size, st.st_mtime))
+
+        done = 0
+        inflight = 0
+        queue = deque()         # (member, future, raw length, first, last) in archive order
+
+        def write_next():
+            nonlocal inflight, done
+            member, fut, length, first, last = queue.popleft()
+            crc, size, data = fut.result()
+            if first:
+                member.offset = self.f.tell()
+                self._write_local_header(member)
+                self.members.append(member)
+            self.f.write(data)
+            member.crc = crc32_combine(member.crc, crc, size) if member.size else crc
+            member.size += size
+            member.csize += len(data)
+            if last:
+                self._finish_member(member)
+            inflight -= length
+            done += length
+            if progress:
+                progress(done, total)
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            for path, arcname, size, mtime in jobs:
+                method = STORED if path.lower().endswith(STORE_EXT) or size == 0 else DEFLATED
+                member = Member(arcname, mtime, method, 0)
+                offset = 0
+                while True:
+                    length = min(self.chunk, size - offset)
+                    last = offset + length >= size
+                    while queue and inflight + length > self.max_inflight:
+                        write_next()
+                    fut = pool.submit(compress_chunk, path, offset, length, method, self.level, last)
+                    queue.append((member, fut, length, offset == 0, last))
+                    inflight += length
+                    self.peak_inflight = max(self.peak_inflight, inflight)
+                    offset += length
+                    if last:
+                        break
+            while queue:
+                write_next()
+        self.bytes_in += total
+
+
+    def write_data(self, arcname: str, data: bytes):
+        member = Member(arcname, time.time(), DEFLATED, self.f.tell())
+        c = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        out = c.compress(data) + c.flush()
+        self._write_local_header(member)
+        self.members.append(member)
+        self.f.write(out)
+        member.crc = zlib.crc32(data)
+        member.size = len(data)
+        member.csize = len(out)
+        self._finish_member(member)
+
+
+    # Sizes and CRC are patched in _finish_member()
+    def _write_local_header(self, member: Member):
+        name = member.arcname.replace(os.sep, "/").encode("utf8")
+        t, d = dos_datetime(member.mtime)
+        extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+        self.f.write(struct.pack("<4sHHHHHIIIHH", b"PK\x03\x04", 45, 0x0800, member.method, t, d,
+                                 0, ZIP64_LIMIT, ZIP64_LIMIT, len(name), len(extra)))
+        self.f.write(name)
+        self.f.write(extra)
+
+
+    def _finish_member(self, member: Member):
+        pos = self.f.tell()
+        name_len = len(member.arcname.replace(os.sep, "/").encode("utf8"))
+        self.f.seek(member.offset + 14)
+        self.f.write(struct.pack("<I", member.crc))
+        self.f.seek(member.offset + 30 + name_len + 4)
+        self.f.write(struct.pack("<QQ", member.size, member.csize))
+        self.f.seek(pos)
+
+
+    def close(self):
+        cd_offset = self.f.tell()
+        for m in self.members:
+            name = m.arcname.replace(os.sep, "/").encode("utf8")
+            t, d = dos_datetime(m.mtime)
+            zip64 = []
+            size, csize, offset = m.size, m.csize, m.offset
+            if size >= ZIP64_LIMIT or csize >= ZIP64_LIMIT:
+                zip64 += [ size, csize ]
+                size = csize = ZIP64_LIMIT
+            if offset >= ZIP64_LIMIT:
+                zip64.append(offset)
+                offset = ZIP64_LIMIT
+            extra = struct.pack(f"<HH{len(zip64)}Q", 0x0001, 8 * len(zip64), *zip64) if zip64 else b""
+            self.f.write(struct.pack("<4sHHHHHHIIIHHHHHII", b"PK\x01\x02", 45, 45, 0x0800, m.method, t, d,
+                                     m.crc, csize, size, len(name), len(extra), 0, 0, 0, 0o644 << 16, offset))
+            self.f.write(name)
+            self.f.write(extra)
+        cd_end = self.f.tell()
+        cd_size = cd_end - cd_offset
+        n = len(self.members)
+
+        # Always write ZIP64 end of central directory record and locator
+        self.f.write(struct.pack("<4sQHHIIQQQQ", b"PK\x06\x06", 44, 45, 45, 0, 0, n, n, cd_size, cd_offset))
+        self.f.write(struct.pack("<4sIQI", b"PK\x06\x07", 0, cd_end, 1))
+        self.f.write(struct.pack("<4sHHHHIIH", b"PK\x05\x06", 0, 0, min(n, 0xFFFF), min(n, 0xFFFF),
+                                 min(cd_size, ZIP64_LIMIT), min(cd_offset, ZIP64_LIMIT), 0))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    # Partial archive without central directory, removed
+    def abort(self):
+        self.f.close()
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+
+
+##### Benchmark #####
+def make_testdata(dir: str, total_mb: int, file_mb: int=16):
+    # Low-signal 16 bit "images": random low byte, mostly constant high byte
+    rnd = random.Random(42)
+    size = file_mb * 1024 * 1024
+    for i in range(max(1, total_mb // file_mb)):
+        data = bytearray(size)
+        data[0::2] = rnd.randbytes(size // 2)
+        data[1::2] = bytes(rnd.choices(b"\x00\x00\x00\x01", k=size // 2))
+        with open(os.path.join(dir, f"frame-{i:04d}.fits"), "wb") as f:
+            f.write(data)
+
+
+def benchmark(total_mb: int, workers: int, level: int):
+    tmp = tempfile.mkdtemp(prefix=NAME)
+    try:
+        data = os.path.join(tmp, "data")
+        os.mkdir(data)
+        make_testdata(data, total_mb)
+        files = [ (os.path.join(data, f), f) for f in sorted(os.listdir(data)) ]
+        total = sum(os.path.getsize(p) for p, _ in files)
+
+        t0 = time.perf_counter()
+        with zipfile.ZipFile(os.path.join(tmp, "zipfile.zip"), "w", zipfile.ZIP_DEFLATED, compresslevel=level) as z:
+            for path, arcname in files:
+                z.write(path, arcname)
+        t_zipfile = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with ParallelZip(os.path.join(tmp, "parallel.zip"), workers=workers, level=level) as z:
+            z.write_files(files)
+        t_parallel = time.perf_counter() - t0
+
+        with zipfile.ZipFile(os.path.join(tmp, "parallel.zip")) as z:
+            bad = z.testzip()
+        if bad:
+            error(f"CRC error in {bad}")
+
+        mb = total / 1e6
+        print(f"data:     {len(files)} files, {mb:.0f} MB, level {level}")
+        print(f"zipfile:  {t_zipfile:6.2f}s {mb / t_zipfile:7.1f} MB/s  "
+              f"{os.path.getsize(os.path.join(tmp, 'zipfile.zip')) / 1e6:.0f} MB")
+        print(f"parallel: {t_parallel:6.2f}s {mb / t_parallel:7.1f} MB/s  "
+              f"{os.path.getsize(os.path.join(tmp, 'parallel.zip')) / 1e6:.0f} MB  "
+              f"{workers or os.cpu_count()} workers, speedup {t_zipfile / t_parallel:.1f}x")
+    finally:
+        shutil.rmtree(tmp)
+
+
+
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Parallel ZIP64 archiver",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-j", "--workers", type=int, help="number of compression threads (default CPU count)")
+    arg.add_argument("-l", "--level", type=int, default=6, help="compression level (default 6)")
+    arg.add_argument("-B", "--benchmark", type=int, metavar="MB", help="benchmark against zipfile with MB of synthetic data")
+    arg.add_argument("zipfile", nargs="?", help="output archive")
+    arg.add_argument("files", nargs="*", help="files and directories to archive")
+    args = arg.parse_args()
+
+    verbose.set_prog(NAME)
+    verbose.set_stdout()
+    verbose.enable(args.verbose)
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.workers, args.level)
+        return
+    if not args.zipfile:
+        arg.error("zipfile required")
+
+    files = []
+    for name in args.files:
+        if os.path.isdir(name):
+            for dirpath, _, filenames in os.walk(name):
+                files.extend((os.path.join(dirpath, f), os.path.join(dirpath, f)) for f in sorted(filenames))
+        else:
+            files.append((name, name))
+    with ParallelZip(args.zipfile, workers=args.workers, level=args.level) as z:
+        z.write_files(files)
+    verbose(f"{len(files)} files, {z.bytes_in / 1e6:.1f} MB")
+
+
+
+if __name__ == "__main__":
+    main()